@@ -0,0 +1,145 @@
+import collections
+import json
+import os
+
+# Colunas do Parquet; ``meta`` (dicionário livre da fonte) vai como JSON
+COLUMNS = ('uuid', 'title', 'house', 'type', 'number', 'year', 'presentation_date', 'author',
+           'subject', 'url', 'length', 'scraped_at', 'duplicate_of', 'full_text',
+           'full_text_original', 'meta')
+INT_COLUMNS = ('number', 'year', 'length')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('Instale o pacote pyarrow para ler/gravar arquivos .parquet') from e
+    return pyarrow
+
+
+def is_parquet(path):
+    return str(path).endswith('.parquet')
+
+
+def parquet_schema():
+    pa = _pyarrow()
+    types = {'number': pa.int64(), 'year': pa.int64(), 'length': pa.int64(),
+             'author': pa.list_(pa.string()), 'full_text': pa.large_string(),
+             'full_text_original': pa.large_string()}
+    return pa.schema([(name, types.get(name, pa.string())) for name in COLUMNS])
+
+
+def _as_int(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def item_row(item):
+    """Converte um item para uma linha do Parquet (tipos fixos por coluna)"""
+    row = {name: item.get(name) for name in COLUMNS}
+    for name in INT_COLUMNS:
+        row[name] = _as_int(row[name])
+    author = row['author']
+    if author is not None and not isinstance(author, (list, tuple)):
+        row['author'] = [str(author)]
+    if row['meta'] is not None:
+        row['meta'] = json.dumps(row['meta'], ensure_ascii=False)
+    for name in ('uuid', 'title', 'house', 'type', 'presentation_date', 'subject', 'url',
+                 'scraped_at', 'duplicate_of', 'full_text', 'full_text_original'):
+        if row[name] is not None and not isinstance(row[name], str):
+            row[name] = str(row[name])
+    return row
+
+
+class ParquetItemWriter:
+    """Grava itens num Parquet, um row group a cada ``row_group_size`` itens.
+
+    O arquivo é montado em ``.part`` e renomeado atomicamente no ``close``.
+    """
+
+    def __init__(self, path, row_group_size=1000, compression='zstd'):
+        pa = _pyarrow()
+        self.path = path
+        self.tmp_path = f'{path}.part'
+        self.row_group_size = row_group_size
+        self.schema = parquet_schema()
+        self.rows = []
+        self.count = 0
+        self.writer = pa.parquet.ParquetWriter(self.tmp_path, self.schema, compression=compression,
+                                               use_dictionary=['house', 'type'])
+
+    def write(self, item):
+        self.rows.append(item_row(item))
+        self.count += 1
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            pa = _pyarrow()
+            table = pa.Table.from_pylist(self.rows, schema=self.schema)
+            self.writer.write_table(table, row_group_size=len(self.rows))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+
+class ItemFilter(collections.namedtuple('ItemFilter', 'houses year_from types',
+                                        defaults=((), None, ()))):
+    """Filtro de itens por casa, ano mínimo e tipo.
+
+    Nos arquivos Parquet vira uma expressão do pyarrow (``expression``),
+    aplicada na leitura: row groups cujas estatísticas não batem nem são
+    lidos. Nas demais entradas, ``matches`` filtra item a item.
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.houses or self.year_from is not None or self.types)
+
+    def matches(self, item):
+        if self.houses and item.get('house') not in self.houses:
+            return False
+        if self.year_from is not None and (_as_int(item.get('year')) or 0) < self.year_from:
+            return False
+        if self.types and str(item.get('type') or '').upper() not in self.types:
+            return False
+        return True
+
+    def expression(self):
+        pa = _pyarrow()
+        field = pa.dataset.field
+        conditions = []
+        if self.houses:
+            conditions.append(field('house').isin(list(self.houses)))
+        if self.year_from is not None:
+            conditions.append(field('year') >= self.year_from)
+        if self.types:
+            conditions.append(field('type').isin(list(self.types)))
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+
+def read_parquet_items(path, columns=None, where=None, batch_size=256):
+    """Lê itens de um Parquet só com as ``columns`` pedidas e o filtro ``where``"""
+    pa = _pyarrow()
+    dataset = pa.dataset.dataset(path, format='parquet')
+    if columns is not None:
+        columns = [name for name in columns if name in dataset.schema.names]
+    expression = where.expression() if where else None
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size):
+        for row in batch.to_pylist():
+            if row.get('meta') is not None:
+                row['meta'] = json.loads(row['meta'])
+            yield row
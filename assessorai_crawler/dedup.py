@@ -0,0 +1,231 @@
+import collections
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import unicodedata
+
+_WORD_RE = re.compile(r'\w+')
+
+# Resultado de ``DedupIndex.check``: ``kind`` é "exact" ou "near" e
+# ``canonical`` o uuid do primeiro item visto com o mesmo texto
+Duplicate = collections.namedtuple('Duplicate', 'kind canonical similarity')
+
+
+def text_words(text):
+    """Palavras do texto normalizado (NFKC, minúsculas, sem pontuação)"""
+    return _WORD_RE.findall(unicodedata.normalize('NFKC', text or '').casefold())
+
+
+def text_hash(words):
+    """Hash do texto normalizado: igual para textos que só diferem em espaços,
+    pontuação e caixa"""
+    return hashlib.blake2b(' '.join(words).encode('utf-8'), digest_size=16).digest()
+
+
+class MinHasher:
+    """Assinaturas MinHash de shingles de ``shingle_size`` palavras.
+
+    Usa one-permutation hashing: cada shingle recebe um único hash de 64
+    bits, que cai num dos ``num_perm`` compartimentos e disputa o mínimo
+    dele; compartimentos vazios (textos curtos) copiam o vizinho seguinte
+    (densificação por rotação). Uma passada pelos shingles em vez de
+    ``num_perm``, o que mantém o custo perto de 1 ms por texto sem numpy.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.salt = seed.to_bytes(8, 'little')
+
+    def shingle_hashes(self, words):
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = {' '.join(words)}
+        else:
+            shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        salt = self.salt
+        return [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8,
+                                               salt=salt).digest(), 'little')
+                for shingle in shingles]
+
+    def signature(self, words):
+        num_perm = self.num_perm
+        empty = 1 << 64
+        signature = [empty] * num_perm
+        for value in self.shingle_hashes(words):
+            slot, value = value % num_perm, value // num_perm
+            if value < signature[slot]:
+                signature[slot] = value
+        if empty in signature:
+            original = signature[:]
+            span = (1 << 64) // num_perm
+            for slot in range(num_perm):
+                offset = 1
+                while original[slot] == empty and signature[slot] == empty:
+                    value = original[(slot + offset) % num_perm]
+                    if value != empty:
+                        # Deslocamento por distância: cópias só coincidem
+                        # entre textos com o mesmo vizinho à mesma distância
+                        signature[slot] = (value + offset * span) & (empty - 1)
+                    offset += 1
+        return signature
+
+
+def _integrate(func, start, stop, steps=100):
+    step = (stop - start) / steps
+    return sum(func(start + (i + 0.5) * step) for i in range(steps)) * step
+
+
+@functools.lru_cache(maxsize=None)
+def lsh_params(threshold, num_perm):
+    """(bandas, linhas por banda) que minimizam falsos positivos + falsos
+    negativos em torno de ``threshold`` (Jaccard)"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        false_positive = _integrate(lambda s, rows=rows, bands=bands: 1 - (1 - s ** rows) ** bands,
+                                    0.0, threshold)
+        false_negative = _integrate(lambda s, rows=rows, bands=bands: (1 - s ** rows) ** bands,
+                                    threshold, 1.0)
+        error = false_positive + false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class DedupIndex:
+    """Índice em disco (SQLite) de textos já vistos, para achar duplicatas.
+
+    ``check(uuid, text)`` procura primeiro o hash exato do texto normalizado
+    e, com ``threshold``, candidatos a quase-duplicata pelas bandas LSH das
+    assinaturas MinHash; o candidato só conta se a similaridade estimada
+    (fração de posições iguais na assinatura) for ``>= threshold``. Textos
+    novos são registrados; duplicatas não, então cada grupo fica
+    representado pelo primeiro item (o canônico). Como tudo fica no SQLite,
+    a memória não cresce com o número de documentos e o índice pode ser
+    reaproveitado entre execuções: um uuid registrado numa execução
+    anterior com o mesmo texto não é duplicata de si mesmo. Já na mesma
+    execução (tabela temporária ``seen``), o uuid repetido (o uuid vem do
+    título) é comparado também com o próprio registro, então a mesma
+    proposição duas vezes no dump conta como ``exact``.
+    """
+
+    def __init__(self, path, threshold=0.9, num_perm=128, shingle_size=5, seed=1,
+                 commit_every=1000):
+        self.path = path
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size, seed) if threshold else None
+        self.bands, self.rows = lsh_params(threshold, num_perm) if threshold else (0, 0)
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # importer --engine async consulta o índice na thread do chunking
+        # (asyncio.to_thread); os acessos nunca são simultâneos
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS docs '
+                          '(uuid TEXT PRIMARY KEY, hash BLOB, signature BLOB) WITHOUT ROWID')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS docs_hash ON docs (hash)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS bands '
+                          '(bucket INTEGER, uuid TEXT, PRIMARY KEY (bucket, uuid)) WITHOUT ROWID')
+        # uuids vistos nesta execução; TEMP, some ao fechar a conexão
+        self.conn.execute('CREATE TEMP TABLE seen (uuid TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._check_config({'num_perm': num_perm, 'shingle_size': shingle_size, 'seed': seed,
+                            'bands': self.bands, 'rows': self.rows})
+
+    def _check_config(self, config):
+        value = json.dumps(config, sort_keys=True)
+        row = self.conn.execute("SELECT value FROM info WHERE name = 'config'").fetchone()
+        if row is None:
+            with self.conn:
+                self.conn.execute("INSERT INTO info (name, value) VALUES ('config', ?)", (value,))
+        elif row[0] != value:
+            raise ValueError(f"Índice de duplicatas {self.path} foi criado com outros parâmetros "
+                             f"({row[0]}); use outro arquivo ou apague este")
+
+    def buckets(self, signature):
+        """Chave (inteiro de 64 bits com sinal) de cada banda da assinatura"""
+        rows = self.rows
+        return [int.from_bytes(hashlib.blake2b(
+                    struct.pack(f'<H{rows}Q', band, *signature[band * rows:(band + 1) * rows]),
+                    digest_size=8).digest(), 'little', signed=True)
+                for band in range(self.bands)]
+
+    def similarity(self, signature, packed):
+        other = struct.unpack(f'<{len(signature)}Q', packed)
+        return sum(a == b for a, b in zip(signature, other)) / len(signature)
+
+    def check(self, uuid, text):
+        """Retorna um ``Duplicate`` se o texto já foi visto; senão registra e retorna None"""
+        words = text_words(text)
+        if not words:
+            return None
+        digest = text_hash(words)
+        uuid = uuid or digest.hex()
+        repeated = self.conn.execute('INSERT OR IGNORE INTO seen (uuid) VALUES (?)',
+                                     (uuid,)).rowcount == 0
+        current = self.conn.execute('SELECT hash, signature FROM docs WHERE uuid = ?',
+                                    (uuid,)).fetchone()
+        if current is not None and current[0] == digest:
+            return Duplicate('exact', uuid, 1.0) if repeated else None
+        # Repetido nesta execução, o uuid também pode ser o canônico (``IS NOT NULL``)
+        exclude = None if repeated else uuid
+        row = self.conn.execute('SELECT uuid FROM docs WHERE hash = ? AND uuid IS NOT ? LIMIT 1',
+                                (digest, exclude)).fetchone()
+        if row is not None:
+            return Duplicate('exact', row[0], 1.0)
+        signature = buckets = None
+        if self.hasher is not None:
+            signature = self.hasher.signature(words)
+            buckets = self.buckets(signature)
+            found = self.nearest(exclude, signature, buckets)
+            if found is not None:
+                return found
+        self.register(uuid, digest, signature, buckets, current)
+        return None
+
+    def nearest(self, exclude, signature, buckets, limit=50):
+        candidates = self.conn.execute(
+            f"SELECT DISTINCT d.uuid, d.signature FROM bands b JOIN docs d ON d.uuid = b.uuid "
+            f"WHERE b.bucket IN ({','.join('?' * len(buckets))}) AND b.uuid IS NOT ? LIMIT ?",
+            (*buckets, exclude, limit)).fetchall()
+        best = None
+        for candidate, packed in candidates:
+            score = self.similarity(signature, packed)
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = Duplicate('near', candidate, score)
+        return best
+
+    def register(self, uuid, digest, signature=None, buckets=None, previous=None):
+        if previous is not None and previous[1] is not None and self.hasher is not None:
+            # Texto do uuid mudou: tira as bandas da assinatura antiga
+            old = struct.unpack(f'<{self.hasher.num_perm}Q', previous[1])
+            self.conn.executemany('DELETE FROM bands WHERE bucket = ? AND uuid = ?',
+                                  ((bucket, uuid) for bucket in self.buckets(old)))
+        packed = struct.pack(f'<{len(signature)}Q', *signature) if signature is not None else None
+        self.conn.execute('INSERT OR REPLACE INTO docs (uuid, hash, signature) VALUES (?, ?, ?)',
+                          (uuid, digest, packed))
+        if buckets:
+            self.conn.executemany('INSERT OR IGNORE INTO bands (bucket, uuid) VALUES (?, ?)',
+                                  ((bucket, uuid) for bucket in buckets))
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.uncommitted = 0
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def close(self):
+        self.commit()
+        self.conn.close()
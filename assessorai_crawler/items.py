@@ -10,11 +10,13 @@ class ProposicaoItem(scrapy.Item):
     author = scrapy.Field()
     subject = scrapy.Field()
     full_text = scrapy.Field()
+    full_text_original = scrapy.Field()
     length = scrapy.Field()
     meta = scrapy.Field()
     url = scrapy.Field()
     uuid = scrapy.Field()
     scraped_at = scrapy.Field()
+    duplicate_of = scrapy.Field()
 
     def missing_fields(self):
         """Retorna lista de campos obrigatórios que estão vazios ou None"""
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from .source_state import record_hash
+
+# Campos guardados por item, além do uuid e do full_text (que fica no FTS)
+FIELDS = ('house', 'type', 'number', 'year', 'title', 'subject', 'author', 'presentation_date',
+          'url', 'length', 'scraped_at', 'duplicate_of')
+INT_FIELDS = ('number', 'year', 'length')
+
+
+def is_local_index(path):
+    return str(path).endswith('.sqlite')
+
+
+def text_hash(text):
+    return hashlib.blake2b((text or '').encode('utf-8'), digest_size=16).digest()
+
+
+def _as_int(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LocalIndex:
+    """Índice local (SQLite + FTS5) dos itens raspados.
+
+    A tabela ``items`` guarda os metadados, o hash do texto e o hash do
+    registro (``source_state.record_hash``), com índices por ``uuid`` e por
+    (casa, tipo, número, ano): ``get``, ``find`` e ``text_matches`` são
+    buscas em B-tree, sem ler a saída JSON. Títulos, ementas e textos ficam
+    na tabela FTS5 ``items_fts`` (mesmo rowid), para ``search`` por
+    palavras-chave. ``upsert`` só reescreve itens novos ou alterados; o
+    modo WAL deixa vários spiders atualizarem o mesmo arquivo.
+    """
+
+    def __init__(self, path, commit_every=500):
+        self.path = path
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        columns = ', '.join(f'{name} INTEGER' if name in INT_FIELDS else f'{name} TEXT'
+                            for name in FIELDS)
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, '
+                          f'uuid TEXT UNIQUE NOT NULL, {columns}, text_hash BLOB, record_hash BLOB)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS items_key ON items (house, type, number, year)')
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5"
+                              "(title, subject, full_text, tokenize='unicode61 remove_diacritics 2')")
+        except sqlite3.OperationalError as e:
+            raise RuntimeError('O SQLite deste Python não tem FTS5; atualize o Python/SQLite '
+                               'para usar o índice local') from e
+        self.conn.commit()
+
+    def upsert(self, item):
+        """Grava o item; retorna "new", "updated" ou "unchanged" """
+        uuid = item.get('uuid')
+        digest = record_hash(item)
+        row = self.conn.execute('SELECT id, record_hash FROM items WHERE uuid = ?',
+                                (uuid,)).fetchone()
+        if row is not None and row['record_hash'] == digest:
+            return 'unchanged'
+        values = [_as_int(item.get(name)) if name in INT_FIELDS else item.get(name)
+                  for name in FIELDS]
+        values[FIELDS.index('author')] = self._author(item.get('author'))
+        text = item.get('full_text') or ''
+        if row is None:
+            cursor = self.conn.execute(
+                f"INSERT INTO items (uuid, {', '.join(FIELDS)}, text_hash, record_hash) "
+                f"VALUES ({', '.join('?' * (len(FIELDS) + 3))})",
+                (uuid, *values, text_hash(text), digest))
+            rowid = cursor.lastrowid
+        else:
+            rowid = row['id']
+            self.conn.execute(
+                f"UPDATE items SET {', '.join(f'{name} = ?' for name in FIELDS)}, "
+                f"text_hash = ?, record_hash = ? WHERE id = ?",
+                (*values, text_hash(text), digest, rowid))
+            self.conn.execute('DELETE FROM items_fts WHERE rowid = ?', (rowid,))
+        self.conn.execute('INSERT INTO items_fts (rowid, title, subject, full_text) '
+                          'VALUES (?, ?, ?, ?)', (rowid, item.get('title'), item.get('subject'), text))
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+        return 'new' if row is None else 'updated'
+
+    @staticmethod
+    def _author(author):
+        if author is None or isinstance(author, str):
+            return author
+        return json.dumps(list(author), ensure_ascii=False)
+
+    def _item(self, row, full_text=False):
+        item = {name: row[name] for name in ('uuid', *FIELDS)}
+        author = item['author']
+        if author and author.startswith('['):
+            item['author'] = json.loads(author)
+        item['text_hash'] = row['text_hash'].hex()
+        if full_text:
+            item['full_text'] = row['full_text']
+        return item
+
+    def get(self, uuid):
+        """Metadados do item pelo uuid (ou None)"""
+        row = self.conn.execute('SELECT * FROM items WHERE uuid = ?', (uuid,)).fetchone()
+        return self._item(row) if row is not None else None
+
+    def find(self, house=None, type=None, number=None, year=None):
+        """Itens com a chave (casa, tipo, número, ano); campos None não filtram"""
+        conditions, params = self._conditions(house=house, type=type, number=_as_int(number),
+                                              year=_as_int(year))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.conn.execute(f'SELECT * FROM items{where} ORDER BY id', params)
+        return [self._item(row) for row in rows]
+
+    def text_matches(self, uuid, text):
+        """True/False se o texto do item indexado é igual a ``text``; None se não há o item"""
+        row = self.conn.execute('SELECT text_hash FROM items WHERE uuid = ?', (uuid,)).fetchone()
+        return None if row is None else row['text_hash'] == text_hash(text)
+
+    def search(self, query, limit=20, house=None):
+        """Busca por palavras-chave (sintaxe FTS5), ordenada por relevância (bm25)"""
+        conditions, params = self._conditions('i.', house=house)
+        rows = self.conn.execute(
+            f"SELECT i.*, bm25(items_fts) AS score, "
+            f"snippet(items_fts, -1, '[', ']', '...', 16) AS snippet "
+            f"FROM items_fts JOIN items i ON i.id = items_fts.rowid "
+            f"WHERE {' AND '.join(['items_fts MATCH ?', *conditions])} ORDER BY score LIMIT ?",
+            (query, *params, limit))
+        return [{**self._item(row), 'score': round(row['score'], 3), 'snippet': row['snippet']}
+                for row in rows]
+
+    def iter_items(self, where=None):
+        """Gera os itens com ``full_text``, filtrados por um ``columnar.ItemFilter``"""
+        conditions, params = [], []
+        if where and where.houses:
+            conditions.append(f"i.house IN ({', '.join('?' * len(where.houses))})")
+            params += where.houses
+        if where and where.year_from is not None:
+            conditions.append('i.year >= ?')
+            params.append(where.year_from)
+        if where and where.types:
+            conditions.append(f"upper(i.type) IN ({', '.join('?' * len(where.types))})")
+            params += where.types
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.conn.execute(
+            f'SELECT i.*, f.full_text FROM items i JOIN items_fts f ON f.rowid = i.id'
+            f'{clause} ORDER BY i.id', params)
+        for row in rows:
+            item = self._item(row, full_text=True)
+            del item['text_hash']
+            yield item
+
+    @staticmethod
+    def _conditions(prefix='', **fields):
+        """Condições de igualdade (e parâmetros) dos campos não nulos"""
+        fields = {name: value for name, value in fields.items() if value is not None}
+        return [f'{prefix}{name} = ?' for name in fields], list(fields.values())
+
+    def commit(self):
+        self.conn.commit()
+        self.uncommitted = 0
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+
+    def close(self):
+        self.commit()
+        self.conn.close()
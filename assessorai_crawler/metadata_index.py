@@ -0,0 +1,67 @@
+import json
+import os
+import sqlite3
+
+
+class MetadataIndex:
+    """Índice em disco (SQLite) das entradas de metadados para o join com os textos.
+
+    Substitui o dicionário ``spider.metadata``: expõe ``get(key, default)`` e
+    guarda cada entrada como JSON, chaveada pela chave de join do spider. O
+    índice registra a impressão digital do arquivo de origem (tamanho, mtime)
+    e só é reconstruído quando o arquivo muda.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, entry TEXT) WITHOUT ROWID'
+        )
+
+    @classmethod
+    def for_dataset(cls, source_file, index_dir, variant=''):
+        """Abre o índice de ``source_file`` em ``index_dir``.
+
+        ``variant`` entra na impressão digital para que mudanças na forma de
+        gerar as chaves (ex.: outro spider) invalidem o índice.
+        """
+        stat = os.stat(source_file)
+        fingerprint = f'{os.path.abspath(source_file)}:{stat.st_size}:{stat.st_mtime_ns}:{variant}'
+        name = os.path.basename(source_file)
+        if variant:
+            name = f'{variant}_{name}'
+        return cls(os.path.join(index_dir, f'{name}.sqlite'), fingerprint)
+
+    def is_current(self):
+        """Verifica se o índice foi construído a partir do arquivo atual"""
+        row = self.conn.execute("SELECT value FROM info WHERE name = 'fingerprint'").fetchone()
+        return row is not None and row[0] == self.fingerprint
+
+    def build(self, keyed_entries):
+        """Reconstrói o índice a partir de pares (chave, entrada)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM info WHERE name = 'fingerprint'")
+            self.conn.execute('DELETE FROM metadata')
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO metadata (key, entry) VALUES (?, ?)',
+                ((key, json.dumps(entry, ensure_ascii=False)) for key, entry in keyed_entries),
+            )
+            self.conn.execute(
+                "INSERT INTO info (name, value) VALUES ('fingerprint', ?)", (self.fingerprint,)
+            )
+
+    def get(self, key, default=None):
+        row = self.conn.execute('SELECT entry FROM metadata WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM metadata').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -3,11 +3,20 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import json
+import os
+import resource
+import sys
+import time
+
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from .utils import record_stage
+
 
 class AssessoraiCrawlerSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -98,3 +107,201 @@ class AssessoraiCrawlerDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class StageTimingSpiderMiddleware:
+    """Mede o tempo gasto dentro dos callbacks e do start_requests do spider.
+
+    Fica o mais perto possível do spider (ordem alta em SPIDER_MIDDLEWARES) e
+    cronometra só as chamadas ao gerador do callback; o processamento dos
+    itens nos pipelines acontece fora dessas chamadas e não entra na conta.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    @staticmethod
+    def stage_name(response):
+        callback = getattr(getattr(response, 'request', None), 'callback', None)
+        return f"callback/{getattr(callback, '__name__', None) or 'parse'}"
+
+    def process_spider_output(self, response, result, spider):
+        name = self.stage_name(response)
+        iterator = iter(result)
+        while True:
+            start = time.perf_counter()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                record_stage(self.stats, name, time.perf_counter() - start)
+                return
+            record_stage(self.stats, name, time.perf_counter() - start)
+            yield output
+
+    async def process_spider_output_async(self, response, result, spider):
+        name = self.stage_name(response)
+        iterator = result.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                output = await iterator.__anext__()
+            except StopAsyncIteration:
+                record_stage(self.stats, name, time.perf_counter() - start)
+                return
+            record_stage(self.stats, name, time.perf_counter() - start)
+            yield output
+
+    async def process_start(self, start):
+        iterator = start.__aiter__()
+        while True:
+            begin = time.perf_counter()
+            try:
+                output = await iterator.__anext__()
+            except StopAsyncIteration:
+                record_stage(self.stats, 'start_requests', time.perf_counter() - begin)
+                return
+            record_stage(self.stats, 'start_requests', time.perf_counter() - begin)
+            yield output
+
+
+class CrawlMetrics:
+    """Extensão que exporta métricas por etapa do crawl (JSON e Prometheus).
+
+    Junta o que ``StageTimingSpiderMiddleware``, ``utils.stage_timer`` e
+    ``utils.timed_process_item`` (tempo de cada pipeline) acumulam nas stats
+    (``stages/<etapa>/seconds`` e ``/calls``) à latência de leitura/download,
+    aos itens por segundo, aos itens descartados por motivo e ao pico de
+    memória. A cada
+    ``METRICS_INTERVAL`` segundos e no fechamento grava, em ``METRICS_DIR``,
+    ``{spider}_stats.json`` e ``{spider}.prom`` (formato texto do Prometheus,
+    para o textfile collector do node exporter).
+    """
+
+    def __init__(self, crawler, metrics_dir, interval):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.metrics_dir = metrics_dir
+        self.interval = interval
+        self.task = None
+        self.started = None
+        self.dropped = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('METRICS_ENABLED', True):
+            raise NotConfigured
+        ext = cls(crawler, settings.get('METRICS_DIR', 'output/metrics'),
+                  settings.getfloat('METRICS_INTERVAL', 30.0))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+        if self.interval:
+            from twisted.internet import task
+            self.task = task.LoopingCall(self.emit, spider)
+            self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.emit(spider, finished=True)
+
+    def item_dropped(self, item, response, exception, spider):
+        # "Campos faltando: [...]" -> "Campos faltando"
+        reason = str(exception).split(':', 1)[0].strip() or type(exception).__name__
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+
+    def response_received(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            record_stage(self.stats, 'download', latency)
+
+    def snapshot(self, spider, finished=False):
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        scraped = self.stats.get_value('item_scraped_count', 0)
+        stages = {}
+        for key, value in self.stats.get_stats().items():
+            if key.startswith('stages/'):
+                stage, field = key[len('stages/'):].rsplit('/', 1)
+                stages.setdefault(stage, {})[field] = value
+        for values in stages.values():
+            calls = values.get('calls', 0)
+            values['avg_ms'] = values.get('seconds', 0.0) / calls * 1e3 if calls else 0.0
+        return {
+            'spider': spider.name,
+            'finished': finished,
+            'elapsed_seconds': elapsed,
+            'items_scraped': scraped,
+            'items_per_second': scraped / elapsed if elapsed else 0.0,
+            'items_dropped': dict(self.dropped),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': stages,
+        }
+
+    def emit(self, spider, finished=False):
+        snapshot = self.snapshot(spider, finished)
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        stats = {**snapshot, 'scrapy_stats': self.stats.get_stats()}
+        write_atomic(os.path.join(self.metrics_dir, f'{spider.name}_stats.json'),
+                     json.dumps(stats, ensure_ascii=False, indent=2, default=str))
+        write_atomic(os.path.join(self.metrics_dir, f'{spider.name}.prom'),
+                     prometheus_text(snapshot))
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def write_atomic(path, text):
+    """Grava via arquivo temporário + rename, para o coletor nunca ler pela metade"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(snapshot):
+    """Converte o snapshot de ``CrawlMetrics`` no formato texto do Prometheus"""
+    spider = _label(snapshot['spider'])
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP assessorai_crawl_{name} {help_text}')
+        lines.append(f'# TYPE assessorai_crawl_{name} {kind}')
+        for labels, value in samples:
+            labels = ','.join([f'spider="{spider}"'] + [f'{k}="{_label(v)}"' for k, v in labels])
+            lines.append(f'assessorai_crawl_{name}{{{labels}}} {value}')
+
+    metric('items_scraped_total', 'counter', 'Itens gravados pelos pipelines',
+           [((), snapshot['items_scraped'])])
+    metric('items_per_second', 'gauge', 'Itens gravados por segundo desde o início',
+           [((), round(snapshot['items_per_second'], 3))])
+    metric('items_dropped_total', 'counter', 'Itens descartados, por motivo',
+           [((('reason', reason),), count) for reason, count in snapshot['items_dropped'].items()])
+    metric('stage_seconds_total', 'counter', 'Tempo acumulado por etapa',
+           [((('stage', stage),), round(values.get('seconds', 0.0), 6))
+            for stage, values in snapshot['stages'].items()])
+    metric('stage_calls_total', 'counter', 'Chamadas por etapa',
+           [((('stage', stage),), values.get('calls', 0)) for stage, values in snapshot['stages'].items()])
+    metric('peak_rss_bytes', 'gauge', 'Pico de memória residente do processo',
+           [((), snapshot['peak_rss_bytes'])])
+    metric('elapsed_seconds', 'gauge', 'Duração do crawl até a última coleta',
+           [((), round(snapshot['elapsed_seconds'], 3))])
+    metric('finished', 'gauge', '1 quando o spider terminou',
+           [((), int(snapshot['finished']))])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,130 @@
+import collections
+import re
+import unicodedata
+
+from .utils import CONTROL_CODES
+
+# Regras aplicadas por ``TextNormalizer``, nesta ordem
+RULES = ('unicode', 'headers', 'whitespace')
+
+# Espaços especiais, caracteres invisíveis e ligaduras comuns em PDFs/OCR;
+# aplicados de uma vez com ``str.translate``. Não usa NFKC, que trocaria
+# "1º" por "1o".
+_CHAR_MAP = {
+    **{c: ' ' for c in (0x00a0, 0x1680, *range(0x2000, 0x200b), 0x202f, 0x205f, 0x3000)},
+    **{c: None for c in (0x00ad, 0x200b, 0x200c, 0x200d, 0x2060, 0xfeff)},
+    **{c: None for c in CONTROL_CODES if c != 9},
+    0x00b7: '.',
+    0x2028: '\n', 0x2029: '\n',
+    0xfb00: 'ff', 0xfb01: 'fi', 0xfb02: 'fl', 0xfb03: 'ffi', 0xfb04: 'ffl',
+}
+
+_SPACES_RE = re.compile(r'[^\S\r\n]+')
+_LINE_EDGES_RE = re.compile(r' ?(\r?\n|\r) ?')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+_LINE_BREAK_RE = re.compile(r'\r\n|[\r\n]')
+# Marcador de página numa linha: "Página 3 de 10", "Pág. 3", "- 12 -", "3/10"
+_PAGE_MARKER_RE = re.compile(
+    r'[-–—\s]*(?:p[áa]g(?:ina)?\.?\s*\d{1,4}(?:\s*(?:/|de)\s*\d{1,4})?'
+    r'|\d{1,4}\s*(?:/|de)\s*\d{1,4}|[-–—]\s*\d{1,4}\s*[-–—])[-–—\s]*',
+    re.IGNORECASE)
+# Número solto: só é numeração de página na borda de uma página
+_PAGE_NUMBER_RE = re.compile(r'\s*\d{1,4}\s*')
+_DIGITS_RE = re.compile(r'\d+')
+# Linhas que se repetem por serem dispositivos, não cabeçalhos
+_PROVISION_RE = re.compile(r'\s*(?:Art(?:igo)?\.?\s*\d|§|Par[áa]grafo|[IVXLC]+\s*[-–—.)]|[a-z]\))',
+                           re.IGNORECASE)
+
+
+class TextNormalizer:
+    """Limpeza do ``full_text`` antes da escrita e da tokenização.
+
+    Regras (``rules``, na ordem de ``RULES``):
+
+    - ``unicode``: NFC e um único ``str.translate`` para espaços especiais,
+      caracteres invisíveis e de controle, e ligaduras;
+    - ``headers``: nas bordas das páginas (até ``edge_lines`` linhas não
+      vazias depois e antes de cada quebra de página, ``\\f``, ou marcador
+      como "Página 3 de 10"), remove linhas curtas repetidas pelo menos
+      ``min_repeats`` vezes (cabeçalhos e rodapés, mantendo a primeira) e
+      números soltos; os marcadores e quebras também saem. Texto sem
+      quebras de página não é alterado, e linhas repetidas no corpo, como
+      "(VETADO)" ou itens numerados, ficam;
+    - ``whitespace``: junta espaços (inclusive os especiais), tira espaços
+      nas pontas das linhas e deixa no máximo uma linha em branco seguida.
+
+    As expressões são compiladas uma vez, no import do módulo, e cada regra
+    é uma passada sobre o texto inteiro (não linha a linha).
+    """
+
+    def __init__(self, rules=RULES, min_repeats=3, max_header_length=120, edge_lines=2):
+        unknown = set(rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Regras de normalização desconhecidas: {sorted(unknown)}")
+        self.steps = [getattr(self, f'_{rule}') for rule in RULES if rule in rules]
+        self.min_repeats = min_repeats
+        self.max_header_length = max_header_length
+        self.edge_lines = edge_lines
+        # ``headers`` precisa das quebras de página, que ``unicode`` apagaria
+        self.char_map = {**_CHAR_MAP, 0x0c: '\f'} if 'headers' in rules else _CHAR_MAP
+
+    def __call__(self, text):
+        if not text:
+            return text
+        for step in self.steps:
+            text = step(text)
+        return text.strip()
+
+    def _unicode(self, text):
+        if not text.isascii():
+            text = unicodedata.normalize('NFC', text)
+        return text.translate(self.char_map)
+
+    def _headers(self, text):
+        lines = _LINE_BREAK_RE.split(text.replace('\f', '\n\f\n')) if '\f' in text \
+            else _LINE_BREAK_RE.split(text)
+        boundaries = [line == '\f' or bool(_PAGE_MARKER_RE.fullmatch(line)) for line in lines]
+        if not any(boundaries):
+            return text
+        edges = self._page_edges(lines, boundaries)
+        keys = [self._header_key(line) if edge else None for line, edge in zip(lines, edges)]
+        counts = collections.Counter(key for key in keys if key is not None)
+        repeated = {key for key, count in counts.items() if count >= self.min_repeats}
+        kept = []
+        seen = set()
+        for line, boundary, edge, key in zip(lines, boundaries, edges, keys):
+            if boundary or (edge and _PAGE_NUMBER_RE.fullmatch(line)):
+                continue
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+        return '\n'.join(kept)
+
+    def _page_edges(self, lines, boundaries):
+        """Marca as ``edge_lines`` linhas não vazias depois e antes de cada
+        quebra de página (e do início e do fim do texto)"""
+        edges = [False] * len(lines)
+        for order in (range(len(lines)), range(len(lines) - 1, -1, -1)):
+            count = 0
+            for i in order:
+                if boundaries[i]:
+                    count = 0
+                elif lines[i].strip():
+                    edges[i] = edges[i] or count < self.edge_lines
+                    count += 1
+        return edges
+
+    def _header_key(self, line):
+        """Chave de comparação de uma linha candidata a cabeçalho (ou None)"""
+        line = line.strip()
+        if not line or len(line) > self.max_header_length or _PROVISION_RE.match(line):
+            return None
+        # "Página 3" e "Página 4" são o mesmo rodapé
+        return _DIGITS_RE.sub('#', ' '.join(line.split())).casefold()
+
+    def _whitespace(self, text):
+        text = _SPACES_RE.sub(' ', text)
+        text = _LINE_EDGES_RE.sub('\n', text)
+        return _BLANK_LINES_RE.sub('\n\n', text)
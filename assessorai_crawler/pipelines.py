@@ -1,12 +1,28 @@
 import json
 import os
+import time
+from itemadapter import ItemAdapter
 from scrapy.exceptions import DropItem
+from scrapy.utils.misc import load_object
+from .columnar import ParquetItemWriter
+from .dedup import DedupIndex
+from .local_index import LocalIndex
+from .normalize import RULES, TextNormalizer
+from .shards import ShardWriter
+from .utils import (check_compression, compression_suffix, open_compressed, record_stage,
+                    timed_process_item)
+
+def output_name(spider):
+    """Nome base dos arquivos de saída (``spider.output_name``, se houver)"""
+    return getattr(spider, 'output_name', None) or f'{spider.slug}_proposicoes'
+
 
 class JsonWriterPipeline:
     def open_spider(self, spider):
         self.output_dir = f'output/{spider.slug}'
         os.makedirs(self.output_dir, exist_ok=True)
 
+    @timed_process_item
     def process_item(self, item, spider):
         filename = f"{item['uuid']}.json"
         path = os.path.join(self.output_dir, filename)
@@ -15,26 +31,191 @@ class JsonWriterPipeline:
         return item
 
 class JsonWriterSinglePipeline:
+    """Grava todos os itens em um único arquivo, item a item.
+
+    Cada item é escrito assim que chega, como array JSON (padrão) ou JSON
+    Lines, opcionalmente comprimido. O arquivo é montado em ``.part`` e
+    renomeado atomicamente no fechamento do spider.
+
+    Com ``OUTPUT_SHARD_ITEMS``, ``OUTPUT_SHARD_BYTES`` ou ``OUTPUT_SHARD_BY``
+    a saída vira shards JSON Lines numa pasta com um manifesto de offsets
+    (``shards.ShardWriter``), para importação em paralelo e leitura por uuid.
+    """
+    def __init__(self, output_format='json', compression=None, flush_items=100, output_dir='output',
+                 shard_items=0, shard_bytes=0, shard_by=None):
+        if output_format not in ('json', 'jsonl'):
+            raise ValueError(f"OUTPUT_FORMAT inválido: {output_format}")
+        self.output_format = output_format
+        self.compression = check_compression(compression, 'OUTPUT_COMPRESSION')
+        self.flush_items = flush_items
+        self.output_dir = output_dir
+        self.shard_items = shard_items
+        self.shard_bytes = shard_bytes
+        self.shard_by = shard_by or None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            output_format=settings.get('OUTPUT_FORMAT', 'json'),
+            compression=settings.get('OUTPUT_COMPRESSION'),
+            flush_items=settings.getint('OUTPUT_FLUSH_ITEMS', 100),
+            output_dir=settings.get('OUTPUT_DIR', 'output'),
+            shard_items=settings.getint('OUTPUT_SHARD_ITEMS', 0),
+            shard_bytes=settings.getint('OUTPUT_SHARD_BYTES', 0),
+            shard_by=settings.get('OUTPUT_SHARD_BY'),
+        )
+
     def open_spider(self, spider):
-        # Inicializa a lista de itens
-        self.items = []
         # Garante pasta de saída
-        output_dir = f'output'
-        os.makedirs(output_dir, exist_ok=True)
-        self.file_path = os.path.join(output_dir, f'{spider.slug}_proposicoes.json')
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.shards = None
+        if self.shard_items or self.shard_bytes or self.shard_by:
+            self.shards = ShardWriter(self.output_dir, output_name(spider), self.shard_items,
+                                      self.shard_bytes, self.shard_by, self.compression)
+            return
+        filename = f'{output_name(spider)}.{self.output_format}{compression_suffix(self.compression)}'
+        self.file_path = os.path.join(self.output_dir, filename)
+        self.tmp_path = f'{self.file_path}.part'
+        self.file = open_compressed(self.tmp_path, 'wt', self.compression)
+        self.count = 0
+        if self.output_format == 'json':
+            self.file.write('[')
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        if self.shards is not None:
+            self.shards.write(item)
+            return item
+        line = json.dumps(dict(item), ensure_ascii=False)
+        if self.output_format == 'json':
+            line = (',\n' if self.count else '\n') + line
+        else:
+            line += '\n'
+        self.file.write(line)
+        self.count += 1
+        if self.count % self.flush_items == 0:
+            self.file.flush()
+        return item
+
+    def close_spider(self, spider):
+        if self.shards is not None:
+            path = self.shards.close()
+            spider.logger.info(f"{self.shards.count} itens gravados em {len(self.shards.done)} "
+                               f"shards; manifesto em {path}")
+            return
+        if self.output_format == 'json':
+            self.file.write('\n]\n')
+        self.file.close()
+        os.replace(self.tmp_path, self.file_path)
+        spider.logger.info(f"{self.count} itens gravados em {self.file_path}")
+
+class ParquetWriterPipeline:
+    """Grava os itens em Parquet, para leitura colunar e com filtros.
+
+    Cada ``PARQUET_ROW_GROUP_SIZE`` itens viram um row group, com
+    ``full_text`` e ``meta`` (JSON) em colunas próprias: quem lê só os
+    metadados não descomprime os textos, e as estatísticas por row group
+    permitem pular casas/anos/tipos filtrados (``importer.py --house``,
+    ``--year-from``, ``--type``). Requer o pacote pyarrow.
+    """
+    def __init__(self, row_group_size=1000, compression='zstd', output_dir='output'):
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.output_dir = output_dir
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            row_group_size=settings.getint('PARQUET_ROW_GROUP_SIZE', 1000),
+            compression=settings.get('PARQUET_COMPRESSION', 'zstd'),
+            output_dir=settings.get('OUTPUT_DIR', 'output'),
+        )
+
+    def open_spider(self, spider):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'{output_name(spider)}.parquet')
+        self.writer = ParquetItemWriter(path, self.row_group_size, self.compression)
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        self.writer.write(ItemAdapter(item))
+        return item
+
+    def close_spider(self, spider):
+        self.writer.close()
+        spider.logger.info(f"{self.writer.count} itens gravados em {self.writer.path}")
+
+class NormalizeTextPipeline:
+    """Normaliza o ``full_text`` antes da validação e da escrita.
 
+    Aplica as regras de ``normalize.TextNormalizer`` (``NORMALIZE_RULES``) e
+    atualiza ``length``. Com ``NORMALIZE_KEEP_ORIGINAL`` o texto bruto segue
+    em ``full_text_original``. As stats ``normalize/bytes_saved`` e
+    ``normalize/tokens_saved`` (com ``NORMALIZE_COUNT_TOKENS``, tokens do
+    modelo de embeddings do importer) mostram quanto o texto encolheu.
+    """
+    def __init__(self, stats, rules=RULES, keep_original=False, min_repeats=3, count_tokens=False):
+        self.stats = stats
+        self.normalizer = TextNormalizer(rules, min_repeats=min_repeats)
+        self.keep_original = keep_original
+        self.count_tokens = count_tokens
+        self.encoding = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            crawler.stats,
+            rules=settings.getlist('NORMALIZE_RULES', list(RULES)),
+            keep_original=settings.getbool('NORMALIZE_KEEP_ORIGINAL', False),
+            min_repeats=settings.getint('NORMALIZE_MIN_REPEATS', 3),
+            count_tokens=settings.getbool('NORMALIZE_COUNT_TOKENS', False),
+        )
+
+    def open_spider(self, spider):
+        if self.count_tokens:
+            # Mesmo tokenizer do importer; só importa quando vai contar
+            import importer
+            self.encoding = importer.get_encoding()
+
+    @timed_process_item
     def process_item(self, item, spider):
-        # Coleta cada item para depois gravar em lote
-        self.items.append(dict(item))
+        text = item.get('full_text')
+        if not text:
+            return item
+        start = time.perf_counter()
+        normalized = self.normalizer(text)
+        if self.keep_original:
+            item['full_text_original'] = text
+        item['full_text'] = normalized
+        if item.get('length') is not None:
+            item['length'] = len(normalized)
+        self.stats.inc_value('normalize/items')
+        self.stats.inc_value('normalize/bytes_before', len(text.encode('utf-8')))
+        self.stats.inc_value('normalize/bytes_saved',
+                             len(text.encode('utf-8')) - len(normalized.encode('utf-8')))
+        if self.encoding is not None:
+            self.stats.inc_value('normalize/tokens_saved',
+                                 len(self.encoding.encode(text)) - len(self.encoding.encode(normalized)))
+        record_stage(self.stats, 'normalize', time.perf_counter() - start)
         return item
 
     def close_spider(self, spider):
-        # Grava todos os itens em um único JSON
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.items, f, ensure_ascii=False, indent=2)
+        before = self.stats.get_value('normalize/bytes_before', 0)
+        saved = self.stats.get_value('normalize/bytes_saved', 0)
+        tokens = (f", {self.stats.get_value('normalize/tokens_saved', 0)} tokens"
+                  if self.encoding is not None else '')
+        spider.logger.info(
+            f"Normalização ({spider.slug}): {self.stats.get_value('normalize/items', 0)} textos, "
+            f"{saved} bytes a menos ({saved / max(before, 1):.1%}){tokens}"
+        )
+
 
 class ValidationPipeline:
     """Valida itens antes de enviá-los ao pipeline de escrita"""
+    @timed_process_item
     def process_item(self, item, spider):
         # Verifica se o item implementa validação
         missing = []
@@ -45,4 +226,260 @@ class ValidationPipeline:
                 f"Descartando item incompleto no pipeline (uuid={item.get('uuid')}), faltam: {missing}"
             )
             raise DropItem(f"Campos faltando: {missing}")
-        return item
\ No newline at end of file
+        return item
+
+
+class DedupPipeline:
+    """Descarta ou liga proposições com texto repetido (ver ``dedup.DedupIndex``).
+
+    Com ``DEDUP_ACTION = "drop"`` a duplicata é descartada; com ``"link"``
+    ela segue com ``duplicate_of`` apontando para o item canônico, e o
+    importer não gera chunks para ela. ``DEDUP_THRESHOLD`` é a similaridade
+    mínima das quase-duplicatas (0 compara só o texto exato). O índice fica
+    em ``DEDUP_INDEX_DIR/{spider}.sqlite``. As stats ``dedup/*`` contam as
+    duplicatas e os chunks e tokens que deixaram de ser gerados.
+    """
+
+    def __init__(self, stats, action='link', threshold=0.9, index_dir='.cache/dedup'):
+        if action not in ('drop', 'link'):
+            raise ValueError(f"DEDUP_ACTION inválido: {action}")
+        self.stats = stats
+        self.action = action
+        self.threshold = threshold or None
+        self.index_dir = index_dir
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            crawler.stats,
+            action=settings.get('DEDUP_ACTION', 'link'),
+            threshold=settings.getfloat('DEDUP_THRESHOLD', 0.9),
+            index_dir=settings.get('DEDUP_INDEX_DIR', '.cache/dedup'),
+        )
+
+    def open_spider(self, spider):
+        self.index = DedupIndex(os.path.join(self.index_dir, f'{spider.name}.sqlite'),
+                                threshold=self.threshold)
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        found = self.index.check(item.get('uuid'), item.get('full_text'))
+        if found is None:
+            return item
+        self.stats.inc_value(f'dedup/{found.kind}')
+        self.count_avoided(item.get('full_text'))
+        if self.action == 'drop':
+            raise DropItem(f"Duplicata {found.kind}: {item.get('uuid')} repete {found.canonical}")
+        item['duplicate_of'] = found.canonical
+        return item
+
+    def count_avoided(self, text):
+        # Mesmo chunking do importer; só roda para as duplicatas
+        import importer
+        chunks = importer.chunk_text(text)
+        self.stats.inc_value('dedup/chunks_avoided', len(chunks))
+        self.stats.inc_value('dedup/tokens_avoided', sum(chunk['tokens'] for chunk in chunks))
+
+    def close_spider(self, spider):
+        self.index.close()
+        spider.logger.info(
+            f"DedupPipeline: {self.stats.get_value('dedup/exact', 0)} duplicatas exatas, "
+            f"{self.stats.get_value('dedup/near', 0)} aproximadas, "
+            f"{self.stats.get_value('dedup/tokens_avoided', 0)} tokens evitados"
+        )
+
+
+class LocalIndexPipeline:
+    """Mantém o índice local (SQLite + FTS5) atualizado durante o crawl.
+
+    Cada item é gravado em ``LOCAL_INDEX_PATH`` (ver ``local_index.LocalIndex``),
+    um arquivo compartilhado por todos os spiders. Só itens novos ou
+    alterados são reescritos; com ``LOCAL_INDEX_DROP_UNCHANGED`` os que já
+    estão iguais no índice são descartados e não chegam aos escritores.
+    """
+
+    def __init__(self, stats, path='.cache/index.sqlite', drop_unchanged=False):
+        self.stats = stats
+        self.path = path
+        self.drop_unchanged = drop_unchanged
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            crawler.stats,
+            path=settings.get('LOCAL_INDEX_PATH', '.cache/index.sqlite'),
+            drop_unchanged=settings.getbool('LOCAL_INDEX_DROP_UNCHANGED', False),
+        )
+
+    def open_spider(self, spider):
+        self.index = LocalIndex(self.path)
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        status = self.index.upsert(ItemAdapter(item))
+        self.stats.inc_value(f'local_index/{status}')
+        if status == 'unchanged' and self.drop_unchanged:
+            raise DropItem(f"Já indexado: {item.get('uuid')} sem mudanças")
+        return item
+
+    def close_spider(self, spider):
+        self.index.close()
+        spider.logger.info(
+            f"Índice local {self.path}: {self.stats.get_value('local_index/new', 0)} novos, "
+            f"{self.stats.get_value('local_index/updated', 0)} alterados, "
+            f"{self.stats.get_value('local_index/unchanged', 0)} sem mudanças"
+        )
+
+
+class VectorStorePipeline:
+    """Envia os itens direto para o Weaviate durante o crawl.
+
+    Reaproveita o chunking e o esquema do importer (``build_chunk_objects``,
+    ``setup_schema``). Os itens são agrupados em lotes de
+    ``VECTOR_STORE_BATCH_SIZE``; chunking e envio rodam numa thread própria,
+    fora do reactor. Com ``VECTOR_STORE_MAX_PENDING`` lotes em voo, o
+    pipeline segura os próximos itens até um lote terminar (backpressure).
+    ``VECTOR_STORE_CLIENT`` aponta para uma fábrica de cliente, por exemplo
+    ``benchmarks.fakes.FakeWeaviateClient`` nos testes; sem ela, conecta com
+    as variáveis do .env, como o importer. ``VECTOR_STORE_CHUNKING`` escolhe
+    a estratégia de chunking (``tokens`` ou ``structure``).
+    """
+
+    def __init__(self, stats, class_name='Bill', batch_size=50, max_pending=4, normalized=False,
+                 client_factory=None, retries=3, retry_backoff=1.0, chunking='tokens'):
+        self.stats = stats
+        self.class_name = class_name
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.normalized = normalized
+        self.client_factory = client_factory
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.chunking = chunking
+        self.buffer = []
+        self.pending = []
+        self.waiters = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        factory = settings.get('VECTOR_STORE_CLIENT')
+        return cls(
+            crawler.stats,
+            class_name=settings.get('VECTOR_STORE_CLASS') or os.getenv('WEAVIATE_CLASS', 'Bill'),
+            batch_size=settings.getint('VECTOR_STORE_BATCH_SIZE', 50),
+            max_pending=settings.getint('VECTOR_STORE_MAX_PENDING', 4),
+            normalized=settings.getbool('VECTOR_STORE_NORMALIZED', False),
+            client_factory=load_object(factory) if factory else None,
+            retries=settings.getint('VECTOR_STORE_RETRIES', 3),
+            retry_backoff=settings.getfloat('VECTOR_STORE_RETRY_BACKOFF', 1.0),
+            chunking=settings.get('VECTOR_STORE_CHUNKING', 'tokens'),
+        )
+
+    def open_spider(self, spider):
+        # importer.py fica na raiz do projeto e traz weaviate/tiktoken: só
+        # importa quando o pipeline está ativo
+        import importer
+        from twisted.python.threadpool import ThreadPool
+
+        self.importer = importer
+        if self.client_factory is not None:
+            self.client = self.client_factory()
+        else:
+            self.client = importer.connect(importer.load_config())
+        importer.setup_schema(self.client, self.class_name, importer.vector_config(),
+                              normalized=self.normalized)
+        # Uma thread só: o batch do cliente síncrono não é compartilhável
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=1, name='vector-store')
+        self.threadpool.start()
+
+    @timed_process_item
+    def process_item(self, item, spider):
+        self.buffer.append(ItemAdapter(item).asdict())
+        if len(self.buffer) >= self.batch_size:
+            self.flush(spider)
+        if len(self.pending) < self.max_pending:
+            return item
+        # Backpressure: o item só segue quando algum lote em voo terminar
+        from twisted.internet import defer
+        waiter = defer.Deferred()
+        self.waiters.append(waiter)
+        self.stats.inc_value('vector_store/backpressure_waits')
+        return waiter.addCallback(lambda _: item)
+
+    def flush(self, spider):
+        from twisted.internet import reactor, threads
+        items, self.buffer = self.buffer, []
+        d = threads.deferToThreadPool(reactor, self.threadpool, self.upload, items)
+        self.pending.append(d)
+        d.addCallbacks(self.uploaded, self.upload_failed, errbackArgs=(spider, len(items)))
+        d.addBoth(self.release, d)
+        return d
+
+    def upload(self, items):
+        """Chunking e envio de um lote (roda na thread do pipeline)"""
+        importer = self.importer
+        start = time.perf_counter()
+        name = importer.chunk_class_name(self.class_name) if self.normalized else self.class_name
+        collection = self.client.collections.get(name)
+        documents = self.client.collections.get(self.class_name) if self.normalized else None
+        prepared = importer.build_chunk_objects(items, normalized=self.normalized,
+                                                strategy=self.chunking)
+        chunks = 0
+        if documents is not None:
+            with documents.batch.fixed_size(batch_size=self.batch_size) as batch:
+                for item in prepared:
+                    batch.add_object(properties=item.document[1], uuid=item.document[0])
+        with collection.batch.fixed_size(batch_size=self.batch_size) as batch:
+            for item in prepared:
+                references = {'bill': item.document[0]} if item.document is not None else None
+                for uuid, props in item.objects:
+                    batch.add_object(properties=props, uuid=uuid, references=references)
+                    chunks += 1
+        failed = list(collection.batch.failed_objects)
+        if documents is not None:
+            failed += documents.batch.failed_objects
+        failed = importer.retry_failed(self.client, failed, self.batch_size, self.retries,
+                                      self.retry_backoff)
+        return {'items': len(items), 'chunks': chunks, 'failed': len(failed),
+                'tokens': sum(item.tokens for item in prepared),
+                'seconds': time.perf_counter() - start}
+
+    def uploaded(self, result):
+        self.stats.inc_value('vector_store/items', result['items'])
+        self.stats.inc_value('vector_store/chunks', result['chunks'])
+        self.stats.inc_value('vector_store/tokens', result['tokens'])
+        self.stats.inc_value('vector_store/batches')
+        if result['failed']:
+            self.stats.inc_value('vector_store/failed_objects', result['failed'])
+        record_stage(self.stats, 'vector_store/upload', result['seconds'])
+
+    def upload_failed(self, failure, spider, count):
+        self.stats.inc_value('vector_store/failed_items', count)
+        spider.logger.error(f"Falha ao enviar lote de {count} itens ao Weaviate: {failure.value}")
+
+    def release(self, result, d):
+        """Tira o lote da fila e libera os itens que esperavam vaga"""
+        self.pending.remove(d)
+        if len(self.pending) < self.max_pending:
+            waiters, self.waiters = self.waiters, []
+            for waiter in waiters:
+                waiter.callback(None)
+        return result
+
+    def close_spider(self, spider):
+        from twisted.internet import defer
+        if self.buffer:
+            self.flush(spider)
+
+        def finish(_):
+            self.threadpool.stop()
+            self.client.close()
+            spider.logger.info(
+                f"VectorStorePipeline: {self.stats.get_value('vector_store/items', 0)} itens, "
+                f"{self.stats.get_value('vector_store/chunks', 0)} chunks enviados"
+            )
+
+        return defer.DeferredList(list(self.pending)).addBoth(finish)
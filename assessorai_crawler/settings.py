@@ -49,6 +49,10 @@ ROBOTSTXT_OBEY = True
 #SPIDER_MIDDLEWARES = {
 #    "assessorai_crawler.middlewares.AssessoraiCrawlerSpiderMiddleware": 543,
 #}
+# Mede o tempo dos callbacks; fica depois dos middlewares nativos, junto do spider
+SPIDER_MIDDLEWARES = {
+    "assessorai_crawler.middlewares.StageTimingSpiderMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -61,6 +65,15 @@ ROBOTSTXT_OBEY = True
 #EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 #}
+EXTENSIONS = {
+    "assessorai_crawler.middlewares.CrawlMetrics": 500,
+}
+
+# Métricas por etapa (CrawlMetrics): {spider}_stats.json e {spider}.prom em
+# METRICS_DIR, a cada METRICS_INTERVAL segundos e no fim do crawl
+METRICS_ENABLED = True
+METRICS_DIR = "output/metrics"
+METRICS_INTERVAL = 30.0
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -69,6 +82,65 @@ ITEM_PIPELINES = {
     "assessorai_crawler.pipelines.JsonWriterSinglePipeline": 300,
 }
 
+# Normalização do full_text (espaços, cabeçalhos/rodapés repetidos, Unicode)
+# antes da validação: descomente em ITEM_PIPELINES
+#    "assessorai_crawler.pipelines.NormalizeTextPipeline": 50,
+# NORMALIZE_KEEP_ORIGINAL guarda o texto bruto em full_text_original;
+# NORMALIZE_COUNT_TOKENS tokeniza o texto antes e depois (tiktoken) só para
+# a stat normalize/tokens_saved
+NORMALIZE_RULES = ["unicode", "headers", "whitespace"]
+NORMALIZE_KEEP_ORIGINAL = False
+NORMALIZE_MIN_REPEATS = 3
+NORMALIZE_COUNT_TOKENS = False
+
+# Saída do JsonWriterSinglePipeline: "json" (array) ou "jsonl", com
+# compressão opcional ("gzip" ou "zstd") e flush a cada N itens
+OUTPUT_DIR = "output"
+OUTPUT_FORMAT = "json"
+OUTPUT_COMPRESSION = None
+OUTPUT_FLUSH_ITEMS = 100
+# Saída em shards JSONL (pasta com índice SQLite de offsets + manifesto)
+# quando algum destes é definido: no máximo N itens e/ou N bytes por shard,
+# separados pelo valor de um campo (ex.: "year"); 0/None desliga
+OUTPUT_SHARD_ITEMS = 0
+OUTPUT_SHARD_BYTES = 0
+OUTPUT_SHARD_BY = None
+
+# Saída em Parquet (ParquetWriterPipeline, requer pyarrow): descomente em
+# ITEM_PIPELINES, junto ou no lugar do JsonWriterSinglePipeline
+#    "assessorai_crawler.pipelines.ParquetWriterPipeline": 310,
+PARQUET_ROW_GROUP_SIZE = 1000
+PARQUET_COMPRESSION = "zstd"
+
+# Índice local SQLite/FTS5 (lookup.py): descomente em ITEM_PIPELINES; o
+# arquivo é compartilhado entre spiders e atualizado a cada item
+#    "assessorai_crawler.pipelines.LocalIndexPipeline": 250,
+LOCAL_INDEX_PATH = ".cache/index.sqlite"
+LOCAL_INDEX_DROP_UNCHANGED = False
+
+# Deduplicação por texto (exato e quase-duplicatas via MinHash/LSH):
+# descomente em ITEM_PIPELINES, entre a validação e a escrita
+#    "assessorai_crawler.pipelines.DedupPipeline": 200,
+# DEDUP_ACTION: "link" (marca duplicate_of) ou "drop" (descarta)
+DEDUP_ACTION = "link"
+DEDUP_THRESHOLD = 0.9
+DEDUP_INDEX_DIR = ".cache/dedup"
+
+# Envio direto ao Weaviate durante o crawl, sem passar pelo importer.py:
+# descomente em ITEM_PIPELINES (ou use -s na linha de comando)
+#    "assessorai_crawler.pipelines.VectorStorePipeline": 400,
+# VECTOR_STORE_CLIENT aceita uma fábrica de cliente (ex.: o cliente falso
+# benchmarks.fakes.FakeWeaviateClient); sem ela, usa as variáveis do .env
+VECTOR_STORE_CLASS = None
+VECTOR_STORE_CLIENT = None
+VECTOR_STORE_BATCH_SIZE = 50
+VECTOR_STORE_MAX_PENDING = 4
+VECTOR_STORE_NORMALIZED = False
+VECTOR_STORE_RETRIES = 3
+VECTOR_STORE_RETRY_BACKOFF = 1.0
+# "tokens" (janelas com sobreposição) ou "structure" (artigos e parágrafos inteiros)
+VECTOR_STORE_CHUNKING = "tokens"
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
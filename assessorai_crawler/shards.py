@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import sqlite3
+
+from .utils import check_compression, compression_suffix, open_compressed
+
+MANIFEST_SUFFIX = '.manifest.json'
+# Índice uuid -> (shard, offset, tamanho), dentro da pasta dos shards
+INDEX_NAME = 'index.sqlite'
+
+
+def is_manifest(path):
+    return str(path).endswith(MANIFEST_SUFFIX)
+
+
+def manifest_path(output_dir, name):
+    return os.path.join(output_dir, f'{name}{MANIFEST_SUFFIX}')
+
+
+def split_shards(shards, parts):
+    """Divide shards do manifesto em até ``parts`` grupos de bytes parecidos.
+
+    Guloso: do maior shard para o menor, cada um vai para o grupo mais
+    leve. Retorna listas de caminhos, sempre as mesmas para a mesma entrada.
+    """
+    groups = [[0, []] for _ in range(max(1, parts))]
+    for shard in sorted(shards, key=lambda shard: (-shard['bytes'], shard['path'])):
+        group = min(groups, key=lambda group: group[0])
+        group[0] += shard['bytes']
+        group[1].append(shard['path'])
+    return [sorted(paths) for _, paths in groups if paths]
+
+
+class _Shard:
+    def __init__(self, id, key, seq, path, compression):
+        self.id = id
+        self.key = key
+        self.seq = seq
+        self.path = path
+        self.file = open_compressed(path, 'wb', compression)
+        self.records = 0
+        self.bytes = 0
+
+
+class ShardWriter:
+    """Grava itens em shards JSONL com limite de itens e/ou bytes.
+
+    Com ``shard_by`` (ex.: ``"year"``) cada valor do campo tem sua própria
+    sequência de shards. Os shards são montados em ``{name}.part/`` e, no
+    ``close``, substituem a pasta ``{name}/`` e ganham o manifesto
+    ``{name}.manifest.json``, com o caminho, a chave, o número de registros
+    e os bytes de cada shard. O offset (em bytes, no conteúdo
+    descomprimido) e o tamanho de cada registro vão, à medida que ele é
+    escrito, para o índice SQLite ``{name}/index.sqlite``, chaveado por
+    uuid: a memória não cresce com o número de registros. Sem compressão o
+    offset permite ler qualquer registro com um ``seek``.
+    """
+
+    def __init__(self, output_dir, name, max_items=0, max_bytes=0, shard_by=None, compression=None,
+                 commit_every=1000):
+        self.output_dir = output_dir
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.shard_by = shard_by
+        self.compression = check_compression(compression)
+        self.dir = os.path.join(output_dir, name)
+        self.tmp_dir = f'{self.dir}.part'
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        self.index = sqlite3.connect(os.path.join(self.tmp_dir, INDEX_NAME))
+        self.index.execute('PRAGMA journal_mode=OFF')
+        self.index.execute('PRAGMA synchronous=OFF')
+        self.index.execute('CREATE TABLE shards (id INTEGER PRIMARY KEY, path TEXT)')
+        # Um uuid repetido aponta para o último registro, como no Weaviate
+        self.index.execute('CREATE TABLE records (uuid TEXT PRIMARY KEY, shard INTEGER, '
+                           'offset INTEGER, length INTEGER) WITHOUT ROWID')
+        self.commit_every = commit_every
+        self.open = {}
+        self.done = []
+        self.sequences = {}
+        self.count = 0
+
+    def write(self, item):
+        key = str(item.get(self.shard_by) or 'sem_valor') if self.shard_by else 'all'
+        shard = self.open.get(key)
+        if shard is None:
+            seq = self.sequences.get(key, 0)
+            self.sequences[key] = seq + 1
+            filename = f'{key}-{seq:05d}.jsonl{compression_suffix(self.compression)}'
+            shard = self.open[key] = _Shard(len(self.done) + len(self.open), key, seq,
+                                            os.path.join(self.tmp_dir, filename), self.compression)
+            self.index.execute('INSERT INTO shards (id, path) VALUES (?, ?)', (shard.id, filename))
+        line = (json.dumps(dict(item), ensure_ascii=False) + '\n').encode('utf-8')
+        shard.file.write(line)
+        self.index.execute('INSERT OR REPLACE INTO records (uuid, shard, offset, length) '
+                           'VALUES (?, ?, ?, ?)', (item.get('uuid'), shard.id, shard.bytes, len(line)))
+        shard.records += 1
+        shard.bytes += len(line)
+        self.count += 1
+        if self.count % self.commit_every == 0:
+            self.index.commit()
+        if (self.max_items and shard.records >= self.max_items) or \
+                (self.max_bytes and shard.bytes >= self.max_bytes):
+            self._finish(key)
+
+    def _finish(self, key):
+        shard = self.open.pop(key)
+        shard.file.close()
+        self.done.append(shard)
+
+    def close(self):
+        """Fecha os shards, publica a pasta e grava o manifesto; retorna o caminho dele"""
+        for key in list(self.open):
+            self._finish(key)
+        self.index.commit()
+        self.index.close()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.replace(self.tmp_dir, self.dir)
+        shards = sorted(self.done, key=lambda shard: (shard.key, shard.seq))
+        manifest = {
+            'name': self.name,
+            'format': 'jsonl',
+            'compression': self.compression,
+            'shard_by': self.shard_by,
+            'records': self.count,
+            'index': os.path.join(self.name, INDEX_NAME),
+            'shards': [{'path': os.path.join(self.name, os.path.basename(shard.path)),
+                        'key': shard.key, 'records': shard.records, 'bytes': shard.bytes}
+                       for shard in shards],
+        }
+        path = manifest_path(self.output_dir, self.name)
+        with open(f'{path}.part', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(f'{path}.part', path)
+        return path
+
+
+class ShardManifest:
+    """Leitura de uma saída em shards a partir do manifesto.
+
+    O manifesto só tem o resumo de cada shard; ``shard_paths`` lista os
+    arquivos (absolutos) e ``get`` acha um registro pelo uuid no índice
+    SQLite e lê só ele, indo direto ao offset do shard.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, encoding='utf-8') as f:
+            self.data = json.load(f)
+        self.base = os.path.dirname(os.path.abspath(path))
+        self.shards = [{**shard, 'path': os.path.join(self.base, shard['path'])}
+                       for shard in self.data['shards']]
+        self.index = None
+
+    def __len__(self):
+        return self.data['records']
+
+    def shard_paths(self):
+        return [shard['path'] for shard in self.shards]
+
+    def locate(self, uuid):
+        """(caminho do shard, offset, tamanho) do registro, ou None"""
+        if self.index is None:
+            path = os.path.join(self.base, self.data['index'])
+            self.index = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        row = self.index.execute(
+            'SELECT s.path, r.offset, r.length FROM records r JOIN shards s ON s.id = r.shard '
+            'WHERE r.uuid = ?', (uuid,)).fetchone()
+        if row is None:
+            return None
+        return os.path.join(self.base, self.data['name'], row[0]), row[1], row[2]
+
+    def get(self, uuid):
+        """Lê um registro pelo uuid (None se não está no índice)"""
+        location = self.locate(uuid)
+        if location is None:
+            return None
+        path, offset, length = location
+        with open_compressed(path, 'rb') as f:
+            # Sem compressão o seek é direto; comprimido, descomprime só até o offset
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    def iter_items(self):
+        for path in self.shard_paths():
+            with open_compressed(path, 'rt') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
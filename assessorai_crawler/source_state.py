@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+# Campos que mudam a cada coleta e não indicam mudança no registro
+VOLATILE_FIELDS = ('scraped_at',)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record_hash(item):
+    """Hash do conteúdo de um item (sem os campos voláteis)"""
+    content = {key: value for key, value in dict(item).items() if key not in VOLATILE_FIELDS}
+    payload = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+class SourceState:
+    """Estado (SQLite) das fontes de um spider entre execuções.
+
+    Guarda a impressão digital de cada arquivo lido (tamanho, mtime e hash
+    do conteúdo) e o hash de cada registro emitido. ``file_unchanged``
+    compara só o ``stat`` quando tamanho e mtime batem, e recalcula o hash
+    do conteúdo apenas quando eles mudam. ``record_changed`` diz se um item é
+    novo ou alterado. Nada é gravado até ``commit``, chamado quando o crawl
+    termina bem: um crawl interrompido não marca registros como vistos.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS files '
+                          '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS records '
+                          '(uuid TEXT PRIMARY KEY, hash BLOB) WITHOUT ROWID')
+        self.conn.commit()
+        self.changed = 0
+        self.unchanged = 0
+
+    @classmethod
+    def for_spider(cls, state_dir, name):
+        return cls(os.path.join(state_dir, f'{name}.sqlite'))
+
+    def file_unchanged(self, path):
+        """Verifica se o arquivo é o mesmo da última execução concluída"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.conn.execute('SELECT size, mtime_ns, hash FROM files WHERE path = ?',
+                                (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            return True
+        digest = file_hash(path)
+        self.conn.execute('INSERT OR REPLACE INTO files (path, size, mtime_ns, hash) '
+                          'VALUES (?, ?, ?, ?)', (path, stat.st_size, stat.st_mtime_ns, digest))
+        # Mesmo conteúdo com outro mtime (ex.: dump copiado de novo)
+        return row is not None and row[2] == digest
+
+    def record_changed(self, item):
+        """Indica se o item é novo ou mudou, e registra o hash atual"""
+        uuid = item.get('uuid')
+        digest = record_hash(item)
+        row = self.conn.execute('SELECT hash FROM records WHERE uuid = ?', (uuid,)).fetchone()
+        if row is not None and row[0] == digest:
+            self.unchanged += 1
+            return False
+        self.conn.execute('INSERT OR REPLACE INTO records (uuid, hash) VALUES (?, ?)',
+                          (uuid, digest))
+        self.changed += 1
+        return True
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        # Sem commit: descarta o que não foi confirmado
+        self.conn.rollback()
+        self.conn.close()
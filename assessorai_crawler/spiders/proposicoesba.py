@@ -1,5 +1,5 @@
 from .proposicoeslegislapi import ProposicoesLegislapi
-from ..utils import clean_json_text
+from ..titles import title_parts
 
 #METADATA BROKEN
 
@@ -9,11 +9,10 @@ class ProposicoesBASpider(ProposicoesLegislapi):
     uf = 'ba'
     slug = name.replace(' ', '_').lower()
 
-    def build_url(self, entry, meta):
-        raw_title = entry.get('Titulo', '').strip()
-        tipo = raw_title.split()[0].upper()
-        numero = raw_title.split()[1].split("/")[0].strip()
-        ano = raw_title.split()[1].split("/")[1].strip() if '/' in raw_title.split()[1] else ''
+    def build_url(self, entry, meta, key=None):
+        # A URL usa o título como está (não o TitleKey normalizado), como sempre
+        tipo, numero, ano = title_parts(entry.get('Titulo', ''))
+        tipo = tipo.upper()
         
         if tipo and numero and ano:
             url = f'https://www.al.ba.gov.br/atividade-legislativa-nova/proposicao/{tipo}.-{numero}-{ano}'
@@ -3,6 +3,8 @@ import json
 import hashlib
 from datetime import datetime
 from ..items import ProposicaoItem
+from ..titles import parse_title, title_parts
+from ..utils import as_bool, iter_json_array
 
 import urllib.parse
 class ProposicoesCNSpider(scrapy.Spider):
@@ -11,55 +13,72 @@ class ProposicoesCNSpider(scrapy.Spider):
     slug = slug.encode('ascii', 'ignore').decode('ascii')
 
     # Read local JSON file
-    start_urls = ['file:///home/markun/devel/datasets/legisla/cn/ProposicaoComEmentas.json']
+    source_file = '/home/markun/devel/datasets/legisla/cn/ProposicaoComEmentas.json'
+    start_urls = [f'file://{source_file}']
+    # Stream the local file instead of loading it whole (-a stream=1)
+    stream = False
+
+    async def start(self):
+        # Scrapy >= 2.13; start_requests stays for older versions
+        for item_or_request in self.start_requests():
+            yield item_or_request
+
+    def start_requests(self):
+        if as_bool(self.stream):
+            for entry in iter_json_array(self.source_file):
+                yield self.build_item(entry)
+            return
+        for url in self.start_urls:
+            yield scrapy.Request(url, dont_filter=True)
 
     def parse(self, response):
         data = json.loads(response.text)
         for entry in data:
-            item = ProposicaoItem()
-            raw_title = entry.get('Titulo', '')
-            item['title'] = raw_title.strip()
+            yield self.build_item(entry)
+
+    def build_item(self, entry):
+        item = ProposicaoItem()
+        raw_title = entry.get('Titulo', '')
+        item['title'] = raw_title.strip()
+
+        # Parse type, number, year from title
+        key = parse_title(raw_title)
+        item['type'] = key.type if key else (raw_title.split() or [''])[0]
+        item['number'] = key.number if key else None
+        item['year'] = key.year if key else None
 
-            # Parse type, number, year from title
-            parts = raw_title.split()
-            item['type'] = parts[0] if parts else ''
-            num_year = parts[1] if len(parts) > 1 else ''
-            if '/' in num_year:
-                num, yr = num_year.split('/')
-                try:
-                    item['number'] = int(num)
-                    item['year'] = int(yr)
-                except ValueError:
-                    item['number'] = None
-                    item['year'] = None
-            else:
-                item['number'] = None
-                item['year'] = None
+        # Other fields
+        item['house'] = "Câmara dos Deputados"
+        authors = entry.get('Autoria', '')
+        item['author'] = [a.strip() for a in authors.split(',')] if authors else []
+        item['subject'] = entry.get('ementa', '')
+        item['full_text'] = entry.get('Texto', '')
+        item['presentation_date'] =  f"{item['year']}-01-01" if item['year'] else None
+        item['length'] = len(item['full_text'] or '')
+        #item['chunks'] = self.chunk_text(item['full_text'] or '')
 
-            # Other fields
-            item['house'] = "Câmara dos Deputados"
-            authors = entry.get('Autoria', '')
-            item['author'] = [a.strip() for a in authors.split(',')] if authors else []
-            item['subject'] = entry.get('ementa', '')
-            item['full_text'] = entry.get('Texto', '')
-            item['presentation_date'] =  f"{item['year']}-01-01" if item['year'] else None
-            item['length'] = len(item['full_text'] or '')
-            #item['chunks'] = self.chunk_text(item['full_text'] or '')
+        # URL e uuid usam o título como está (title_parts, não o TitleKey
+        # normalizado), para não mudar os ids já importados
+        kind, number, year = title_parts(raw_title)
+        try:
+            number, year = int(number), int(year)
+        except ValueError:
+            number = year = None
 
-            # Encode filters for URL
-            filters = json.dumps([
-                {"numero": str(item['number'])},
-                {"ano": str(item['year'])}
-            ])
-            encoded_filters = urllib.parse.quote(filters)
-            item['url'] = f'https://www.camara.leg.br/busca-portal?contextoBusca=BuscaProposicoes&filtros={encoded_filters}&tipos={item["type"]}&pagina=1'
+        # Encode filters for URL
+        filters = json.dumps([
+            {"numero": str(number)},
+            {"ano": str(year)}
+        ])
+        encoded_filters = urllib.parse.quote(filters)
+        item['url'] = f'https://www.camara.leg.br/busca-portal?contextoBusca=BuscaProposicoes&filtros={encoded_filters}&tipos={kind}&pagina=1'
 
-            # UUID based on house_type_number_year
-            uid_src = f"{item['house']}_{item['type']}_{item['number']}_{item['year']}"
-            item['uuid'] = hashlib.md5(uid_src.encode('utf-8')).hexdigest()
-            item['scraped_at'] = datetime.utcnow().date().isoformat()
+        # UUID based on house_type_number_year
+        uid_src = f"{item['house']}_{kind}_{number}_{year}"
+        item['uuid'] = hashlib.md5(uid_src.encode('utf-8')).hexdigest()
+        item['scraped_at'] = datetime.utcnow().date().isoformat()
 
-            yield item
+        return item
 
     def chunk_text(self, text, max_tokens=5000, overlap_tokens=50):
         words = text.split()
@@ -1,9 +1,14 @@
 import scrapy
+import functools
 import json
 import hashlib
+import itertools
 from datetime import datetime
 from ..items import ProposicaoItem
-from ..utils import clean_json_text
+from ..metadata_index import MetadataIndex
+from ..source_state import SourceState
+from ..titles import parse_title, parse_titles, title_key, title_keys
+from ..utils import as_bool, clean_json_text, iter_json_array, stage_timer
 
 class ProposicoesLegislapi(scrapy.Spider):
     name = 'proposicoessp'
@@ -11,74 +16,173 @@ class ProposicoesLegislapi(scrapy.Spider):
     folder = '/home/markun/devel/datasets/legisla'
     uf = 'sp'
     slug = name.replace(' ', '_').lower().encode('ascii', 'ignore').decode('ascii')
-    
+    # Lê os arquivos locais incrementalmente (scrapy crawl ... -a stream=1)
+    stream = False
+    # Pasta do índice SQLite de metadados; None mantém o dicionário em memória
+    # (scrapy crawl ... -a metadata_index=.cache/legisla)
+    metadata_index = None
+    metadata_store = None
+    # Pasta do estado entre execuções: pula arquivos que não mudaram e emite
+    # só proposições novas ou alteradas (scrapy crawl ... -a delta=.cache/delta)
+    delta = None
+    source_state = None
+
+    @functools.cached_property
+    def started_at(self):
+        return datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+
+    @property
+    def output_name(self):
+        """Nome base das saídas dos pipelines.
+
+        Cada execução com delta tem o próprio arquivo (com o horário de
+        início): o estado é confirmado ao final, então um delta ainda não
+        importado não pode ser sobrescrito pelo da execução seguinte.
+        """
+        if self.delta:
+            return f'{self.slug}_proposicoes_delta_{self.started_at}'
+        return f'{self.slug}_proposicoes'
+
     def get_metadata_file(self):
         """Retorna o caminho do arquivo de metadados"""
         return f'{self.folder}/{self.uf}/Proposicoes{self.uf.upper()}.json'
-    
+
     def get_text_file(self):
         """Retorna o caminho do arquivo de texto completo"""
         return f'{self.folder}/{self.uf}/ProjetoInteiroTeor{self.uf.upper()}.json'
-    
+
+    async def start(self):
+        # Scrapy >= 2.13; start_requests fica para versões anteriores
+        for item_or_request in self.start_requests():
+            yield item_or_request
+
     def start_requests(self):
+        if self.delta:
+            self.source_state = SourceState.for_spider(self.delta, self.name)
+            # Os dois arquivos são sempre checados, para registrar as novas impressões digitais
+            unchanged = [self.source_state.file_unchanged(path)
+                         for path in (self.get_metadata_file(), self.get_text_file())]
+            if all(unchanged):
+                self.logger.info("Arquivos de origem sem mudanças desde a última execução")
+                return
+        if self.metadata_index:
+            # "titlekey" invalida índices gravados com a chave antiga (md5 do título)
+            self.metadata_store = MetadataIndex.for_dataset(
+                self.get_metadata_file(), self.metadata_index, variant=f'{self.name}_titlekey'
+            )
+        metadata_ready = self.metadata_store is not None and self.metadata_store.is_current()
+        if metadata_ready:
+            # Índice em disco ainda vale para este arquivo: pula a leitura dos metadados
+            self.logger.info(f"Reutilizando índice de metadados {self.metadata_store.path}")
+            self.metadata = self.metadata_store
+
+        if as_bool(self.stream):
+            # Modo streaming: lê direto do disco, sem passar pelo handler file://
+            if not metadata_ready:
+                self.load_metadata(iter_json_array(self.get_metadata_file()))
+            items = (self.build_item(entry) for entry in iter_json_array(self.get_text_file()))
+            yield from self.changed_items(items)
+            return
+        if metadata_ready:
+            yield scrapy.Request(f'file://{self.get_text_file()}', callback=self.parse)
+            return
         # Carrega metadados primeiro
         yield scrapy.Request(f'file://{self.get_metadata_file()}', callback=self.parse_metadata)
 
-    def build_url(self, entry, meta):
-        """Constrói a URL pública da proposição"""
+    def build_url(self, entry, meta, key=None):
+        """Constrói a URL pública da proposição (``key`` é o TitleKey do título)"""
         id_orig = entry.get('IdProposicaoOrigem')
         if id_orig:
             return f'https://www.al.sp.gov.br/propositura/?id={id_orig}'
         return ''
-    
+
+    def keyed_metadata(self, entries, batch_size=1024):
+        """Gera (chave de join, entrada), normalizando os títulos em lote"""
+        entries = iter(entries)
+        while batch := list(itertools.islice(entries, batch_size)):
+            yield from zip(title_keys(entry.get('Titulo', '') for entry in batch), batch)
+
+    def load_metadata(self, entries):
+        """Indexa as entradas de metadados para o join com os textos"""
+        with stage_timer(self, 'metadata_load'):
+            if self.metadata_store is not None:
+                self.metadata_store.build(self.keyed_metadata(entries))
+                self.metadata = self.metadata_store
+                return
+            self.metadata = dict(self.keyed_metadata(entries))
+
+    def changed_items(self, items):
+        """Com ``delta``, filtra os itens iguais aos da última execução"""
+        if self.source_state is None:
+            yield from items
+            return
+        for item in items:
+            if self.source_state.record_changed(item):
+                yield item
+            else:
+                self.crawler.stats.inc_value('delta/unchanged_items')
+
+    def closed(self, reason):
+        if self.metadata_store is not None:
+            self.metadata_store.close()
+        if self.source_state is not None:
+            if reason == 'finished':
+                self.source_state.commit()
+            self.logger.info(f"Delta: {self.source_state.changed} proposições novas ou alteradas, "
+                             f"{self.source_state.unchanged} sem mudanças")
+            self.source_state.close()
+
     def parse_metadata(self, response):
-        self.metadata = {}
-        data = clean_json_text(response.text)
-        for entry in data:
-            key = hashlib.md5(entry['Titulo'].encode('utf-8')).hexdigest()
-            self.metadata[key] = entry
+        with stage_timer(self, 'json_decode'):
+            entries = clean_json_text(response.text)
+        self.load_metadata(entries)
         yield scrapy.Request(f'file://{self.get_text_file()}', callback=self.parse)
 
     def parse(self, response):
-        data = clean_json_text(response.text)
-        for entry in data:
-            item = ProposicaoItem()
-
-            # Título, Casa, Tipo
-            raw_title = entry.get('Titulo', '').strip()
-            item['title'] = raw_title
-            item['house'] = self.house
-            item['type'] = raw_title.split()[0] if raw_title else ''
-
-            # Número e Ano
-            num_year = raw_title.split()[1] if len(raw_title.split()) > 1 else ''
-            try:
-                num, yr = num_year.split('/')
-                number = int(num)
-                year = int(yr)
-            except ValueError:
-                number = None
-                year = None
-            item['number'] = number
-            item['year'] = year
-
-            # Metadados (autoria, ementa, data)
-            item['uuid'] = hashlib.md5(raw_title.encode('utf-8')).hexdigest()
-            meta = self.metadata.get(item["uuid"], {})
-            authors = meta.get('Autoria', '')
-            item['author'] = [a.strip() for a in authors.split(',')] if authors else []
-            item['subject'] = meta.get('Ementa', '')
-            item['presentation_date'] = meta.get('DataApresentacao')
-
-            # Texto e métricas
-            item['full_text'] = entry.get('Texto', '')
-            item['length'] = len(item['full_text'] or '')
-            item['meta'] = meta
-
-            # URL pública
-            item['url'] = self.build_url(entry, meta)
-
-            # UUID e timestamp
-            item['scraped_at'] = datetime.now().isoformat()
-
-            yield item
+        with stage_timer(self, 'json_decode'):
+            data = clean_json_text(response.text)
+        keys = parse_titles(entry.get('Titulo', '') for entry in data)
+        yield from self.changed_items(self.build_item(entry, key) for entry, key in zip(data, keys))
+
+    def build_item(self, entry, key=None):
+        """Monta o item a partir de uma entrada de texto e seus metadados
+
+        ``key`` é o TitleKey já calculado em lote (``parse_titles``); se
+        omitido, o título é analisado aqui. O ``uuid`` continua sendo o md5
+        do título bruto, de propósito: é o id dos objetos já importados no
+        Weaviate, no manifesto e no checkpoint, e não muda com a normalização.
+        """
+        item = ProposicaoItem()
+
+        # Título, Casa, Tipo, Número e Ano
+        raw_title = entry.get('Titulo', '').strip()
+        if key is None:
+            key = parse_title(raw_title)
+        item['title'] = raw_title
+        item['house'] = self.house
+        item['type'] = key.type if key else (raw_title.split() or [''])[0]
+        item['number'] = key.number if key else None
+        item['year'] = key.year if key else None
+
+        # Metadados (autoria, ementa, data); uuid do título bruto (ver docstring)
+        item['uuid'] = hashlib.md5(raw_title.encode('utf-8')).hexdigest()
+        join_key = key.key if key else title_key(raw_title)
+        with stage_timer(self, 'metadata_join'):
+            meta = self.metadata.get(join_key, {})
+        authors = meta.get('Autoria', '')
+        item['author'] = [a.strip() for a in authors.split(',')] if authors else []
+        item['subject'] = meta.get('Ementa', '')
+        item['presentation_date'] = meta.get('DataApresentacao')
+
+        # Texto e métricas
+        item['full_text'] = entry.get('Texto', '')
+        item['length'] = len(item['full_text'] or '')
+        item['meta'] = meta
+
+        # URL pública
+        item['url'] = self.build_url(entry, meta, key)
+
+        # UUID e timestamp
+        item['scraped_at'] = datetime.now().isoformat()
+
+        return item
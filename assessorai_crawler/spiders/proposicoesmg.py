@@ -1,5 +1,5 @@
 from .proposicoeslegislapi import ProposicoesLegislapi
-from ..utils import clean_json_text
+from ..titles import title_parts
 
 class ProposicoesMGSpider(ProposicoesLegislapi):
     name = 'proposicoesmg'
@@ -7,8 +7,9 @@ class ProposicoesMGSpider(ProposicoesLegislapi):
     uf = 'mg'
     slug = name.replace(' ', '_').lower()
 
-    def build_url(self, entry, meta):
-        tipo = meta.get('Titulo','').split()[0].upper()
+    def build_url(self, entry, meta, key=None):
+        # A URL usa o título como está (não o TitleKey normalizado), como sempre
+        tipo = title_parts(meta.get('Titulo', ''))[0].upper()
         numero = meta.get('Numero', '')
         ano = meta.get('Ano', '')
         if tipo and numero and ano:
@@ -7,7 +7,7 @@ class ProposicoesPRSpider(ProposicoesLegislapi):
     uf = 'pr'
     slug = name.replace(' ', '_').lower()
 
-    def build_url(self, entry, meta):
+    def build_url(self, entry, meta, key=None):
         url = f'https://consultas.assembleia.pr.leg.br/#/pesquisa-legislativa'
         return url
         
\ No newline at end of file
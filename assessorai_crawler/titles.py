@@ -0,0 +1,109 @@
+import collections
+import functools
+import re
+
+# Tipo (tudo antes do primeiro dígito, normalizado depois), número (com ou
+# sem separador de milhar) e ano opcional após "/", espaço ou "-"
+_TITLE_RE = re.compile(
+    r'(?P<type>\D*)(?P<number>\d+(?:\.\d{3})*)(?:\s*[/\-]\s*|\s+)?(?P<year>\d{4}|\d{2})?(?!\d)'
+)
+_TYPE_SEPARATORS_RE = re.compile(r'[\W_]+')
+# "nº", "N°", "no." entre o tipo e o número (mas não o N de "PLN")
+_NUMBER_MARK_RE = re.compile(r'(?:^|(?<=[\s.]))N[º°O]?\.?\s*$', re.IGNORECASE)
+
+
+class TitleKey(collections.namedtuple('TitleKey', 'type number year rest', defaults=('',))):
+    """Identificador normalizado de uma proposição: (tipo, número, ano).
+
+    ``key`` é a chave de join entre metadados e textos: variações de
+    grafia do mesmo título ("PL 12/2020", "PL. 012/2020", "PL 12 2020",
+    "PL nº 12/20") levam à mesma chave. O que sobra do título depois do
+    ano (``rest``, normalizado) também entra na chave, para que "Emenda 1
+    ao PL 123/2020" e "PL 12/2020 - Substitutivo" não colidam com outros
+    títulos.
+    """
+    __slots__ = ()
+
+    @property
+    def key(self):
+        key = f'{self.type}:{self.number}:{self.year or ""}'
+        return f'{key}:{self.rest}' if self.rest else key
+
+
+_new_key = tuple.__new__
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_type(kind):
+    # Poucos tipos distintos se repetem milhões de vezes: normaliza uma vez cada
+    kind = _NUMBER_MARK_RE.sub('', kind)
+    return _TYPE_SEPARATORS_RE.sub(' ', kind.replace('.', '')).strip().upper()
+
+
+def _normalize_rest(rest):
+    return _TYPE_SEPARATORS_RE.sub(' ', rest).strip().upper() if rest else ''
+
+
+def _build(kind, number, year, rest=''):
+    if year:
+        year = int(year)
+        if year < 100:
+            year += 2000 if year <= 50 else 1900
+    else:
+        year = None
+    if '.' in number:
+        number = number.replace('.', '')
+    # tuple.__new__ evita o __new__ em Python do namedtuple (caminho quente)
+    return _new_key(TitleKey, (_normalize_type(kind), int(number), year, _normalize_rest(rest)))
+
+
+def parse_title(title):
+    """Extrai (tipo, número, ano) de um título; None se não houver número"""
+    title = title or ''
+    match = _TITLE_RE.match(title)
+    if match is None:
+        return None
+    return _build(*match.group('type', 'number', 'year'), title[match.end():])
+
+
+def parse_titles(titles):
+    """Versão em lote de ``parse_title``, para listas grandes de títulos"""
+    match = _TITLE_RE.match
+    results = []
+    append = results.append
+    for title in titles:
+        title = title or ''
+        found = match(title)
+        append(_build(*found.group('type', 'number', 'year'), title[found.end():]) if found else None)
+    return results
+
+
+def _raw_key(title):
+    # Títulos sem número: a chave é o próprio texto normalizado
+    return 'raw:' + ' '.join((title or '').upper().split())
+
+
+def title_key(title):
+    """Chave de join de um título (ver ``TitleKey.key``)"""
+    parsed = parse_title(title)
+    return parsed.key if parsed is not None else _raw_key(title)
+
+
+def title_keys(titles):
+    """Versão em lote de ``title_key``"""
+    titles = list(titles)
+    return [parsed.key if parsed is not None else _raw_key(title)
+            for title, parsed in zip(titles, parse_titles(titles))]
+
+
+def title_parts(title):
+    """(tipo, número, ano) como texto, separados como os spiders sempre
+    fizeram ("pl 12/2020" -> "pl", "12", "2020"), sem normalizar.
+
+    Usado onde o valor entra em uuids e URLs já publicados, que não podem
+    mudar com a normalização de ``parse_title``.
+    """
+    parts = (title or '').split()
+    kind = parts[0] if parts else ''
+    pieces = parts[1].split('/') if len(parts) > 1 else ['']
+    return kind, pieces[0].strip(), pieces[1].strip() if len(pieces) > 1 else ''
@@ -1,7 +1,245 @@
+import codecs
+import contextlib
+import functools
+import gzip
 import json
+import re
+import time
 
+STREAM_CHUNK_SIZE = 1 << 20
 
-def clean_json_text(raw_text):
+# Caracteres de controle ASCII removidos antes do decode (mantém \n e \r)
+CONTROL_CODES = bytes(c for c in range(32) if c not in (10, 13))
+_CONTROL_RE = re.compile('[%s]' % re.escape(CONTROL_CODES.decode('ascii')))
+_CONTROL_RE_BYTES = re.compile(b'[%s]' % re.escape(CONTROL_CODES))
+
+
+class ControlCharSanitizer:
+    """Remove caracteres de controle de texto ou de blocos de bytes.
+
+    Usa ``bytes.translate`` (ou uma regex compilada para ``str``), ambos em
+    C, no lugar do gerador por caractere. Como bytes
+    abaixo de 0x20 nunca aparecem dentro de sequências UTF-8 multibyte, os
+    blocos podem ser limpos antes da decodificação, em qualquer fronteira.
+    Em modo ``strict`` guarda em ``found`` as posições (offset acumulado,
+    código) dos caracteres removidos, até ``max_report`` ocorrências; o
+    offset é em bytes ou em caracteres, conforme o tipo dos blocos.
+    """
+
+    def __init__(self, strict=False, max_report=100):
+        self.strict = strict
+        self.max_report = max_report
+        self.offset = 0
+        self.removed = 0
+        self.found = []
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            cleaned = chunk.translate(None, CONTROL_CODES)
+            pattern = _CONTROL_RE_BYTES
+        else:
+            cleaned = _CONTROL_RE.sub('', chunk)
+            pattern = _CONTROL_RE
+        removed = len(chunk) - len(cleaned)
+        if removed:
+            self.removed += removed
+            if self.strict and len(self.found) < self.max_report:
+                for match in pattern.finditer(chunk):
+                    if len(self.found) >= self.max_report:
+                        break
+                    self.found.append((self.offset + match.start(), ord(match.group())))
+        self.offset += len(chunk)
+        return cleaned
+
+    def report(self):
+        """Resumo legível das ocorrências encontradas em modo strict"""
+        positions = ', '.join(f'{pos} (0x{code:02x})' for pos, code in self.found)
+        more = '...' if self.removed > len(self.found) else ''
+        return f'{self.removed} caracteres de controle removidos: {positions}{more}'
+
+    def check(self):
+        """Em modo strict, falha se algum caractere de controle foi encontrado"""
+        if self.strict and self.removed:
+            raise ValueError(self.report())
+
+
+def strip_control_chars(raw_text):
+    """Remove caracteres de controle (exceto quebras de linha)"""
+    return _CONTROL_RE.sub('', raw_text)
+
+
+def clean_json_text(raw_text, strict=False):
     """Remove control characters before JSON decode"""
-    clean_json = ''.join(ch for ch in raw_text if ch in ('\n', '\r') or ord(ch) >= 32)
+    sanitizer = ControlCharSanitizer(strict=strict)
+    clean_json = sanitizer.feed(raw_text)
+    sanitizer.check()
     return json.loads(clean_json)
+
+
+def record_stage(stats, name, seconds):
+    """Acumula tempo e chamadas de uma etapa nas stats do crawler (stages/<nome>/...)"""
+    stats.inc_value(f'stages/{name}/seconds', seconds)
+    stats.inc_value(f'stages/{name}/calls')
+
+
+@contextlib.contextmanager
+def stage_timer(spider, name):
+    """Mede o bloco como a etapa ``name`` (ver ``CrawlMetrics``).
+
+    Sem crawler (spider instanciado à mão, benchmarks) só executa o bloco.
+    """
+    stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            record_stage(stats, name, time.perf_counter() - start)
+
+
+def timed_process_item(process_item):
+    """Decorador: mede o ``process_item`` de um pipeline como ``pipeline/<classe>``.
+
+    As stats vêm do próprio pipeline (``self.stats``) ou do crawler do
+    spider, quando o Scrapy ainda passa o spider; sem nenhum dos dois só
+    executa o método. A assinatura original é preservada (``functools.wraps``).
+    """
+    @functools.wraps(process_item)
+    def wrapper(self, item, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return process_item(self, item, *args, **kwargs)
+        finally:
+            spider = kwargs.get('spider', args[0] if args else None)
+            stats = getattr(self, 'stats', None) or \
+                getattr(getattr(spider, 'crawler', None), 'stats', None)
+            if stats is not None:
+                record_stage(stats, f'pipeline/{type(self).__name__}', time.perf_counter() - start)
+    return wrapper
+
+
+def as_bool(value):
+    """Converte argumentos de linha de comando (-a stream=1) em booleano"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'sim', 'on')
+    return bool(value)
+
+
+def iter_json_array(path, chunk_size=STREAM_CHUNK_SIZE, sanitizer=None):
+    """Lê um array JSON do disco incrementalmente, gerando uma entrada por vez.
+
+    O arquivo é lido em blocos de ``chunk_size`` bytes, limpo de caracteres de
+    controle e decodificado com ``raw_decode``; só a entrada corrente e o bloco
+    em leitura ficam em memória. Arquivos ``.gz``/``.zst`` são descomprimidos
+    no caminho. Um ``ControlCharSanitizer`` em modo strict pode ser passado
+    para falhar ao fim da leitura se houver sujeira.
+    """
+    sanitizer = sanitizer or ControlCharSanitizer()
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    with open_compressed(path, 'rb') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill(size):
+            # Acrescenta o próximo bloco ao buffer; retorna False no fim do arquivo
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            raw = f.read(size)
+            eof = not raw
+            text = reader.decode(sanitizer.feed(raw), final=eof)
+            if pos:
+                buf = buf[pos:]
+                pos = 0
+            buf += text
+            return True
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or not fill(chunk_size):
+                    return
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != '[':
+            raise ValueError(f'{path}: esperado array JSON')
+        pos += 1
+        first = True
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f'{path}: array JSON não terminado')
+            if buf[pos] == ']':
+                sanitizer.check()
+                return
+            if not first:
+                if buf[pos] != ',':
+                    raise ValueError(f'{path}: esperado "," na posição {pos}')
+                pos += 1
+                skip_ws()
+            first = False
+            while True:
+                try:
+                    entry, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Entrada incompleta: lê mais (dobrando) e tenta de novo
+                    if not fill(max(chunk_size, len(buf) - pos)):
+                        raise
+                    continue
+                if end == len(buf) and fill(chunk_size):
+                    # Um número no fim do buffer pode estar truncado
+                    continue
+                break
+            pos = end
+            yield entry
+
+
+# Compressões aceitas nas saídas (OUTPUT_COMPRESSION)
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+def check_compression(compression, name='compression'):
+    """Valida a compressão configurada; retorna None quando não há compressão"""
+    compression = compression or None
+    if compression not in COMPRESSIONS:
+        accepted = ', '.join(map(repr, COMPRESSIONS))
+        raise ValueError(f"{name} inválido: {compression!r} (aceitos: {accepted})")
+    return compression
+
+
+def compression_suffix(compression):
+    """Extensão de arquivo para a compressão configurada (None, gzip, zstd)"""
+    return {None: '', '': '', 'gzip': '.gz', 'zstd': '.zst'}[compression]
+
+
+def open_compressed(path, mode='rt', compression=None):
+    """Abre arquivos de saída em texto UTF-8 (ou binário), comprimidos ou não.
+
+    Sem ``compression`` explícita, ela é deduzida pela extensão do arquivo.
+    """
+    path = str(path)
+    encoding = None if 'b' in mode else 'utf-8'
+    if compression is None:
+        compression = 'gzip' if path.endswith('.gz') else 'zstd' if path.endswith('.zst') else None
+    if compression == 'gzip':
+        return gzip.open(path, mode, encoding=encoding)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError('Instale o pacote zstandard para ler/gravar arquivos .zst') from e
+        return zstandard.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding)
+
+
+def is_jsonl(path):
+    """Indica se o caminho é JSON Lines (ignorando a extensão de compressão)"""
+    path = str(path)
+    for suffix in ('.gz', '.zst'):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+    return path.endswith('.jsonl')
@@ -0,0 +1,130 @@
+"""Compara o chunker de importer.py com a implementação anterior (golden).
+
+Confere que os chunks são idênticos e mede o tempo de cada versão, num
+arquivo de saída do Scrapy ou em projetos de lei sintéticos longos. Também
+roda a estratégia ``structure`` (artigos e parágrafos inteiros) e mostra
+chunks e tokens de cada estratégia. Sem rede para baixar o vocabulário do
+tiktoken (ou com ``--byte-encoding``), as duas versões usam o
+``ByteEncoding`` de ``fakes.py``, um token por byte.
+
+Uso:
+    python benchmarks/bench_chunking.py --input output/proposicoessp_proposicoes.json
+    python benchmarks/bench_chunking.py --synthetic 200 --words 20000
+    python benchmarks/bench_chunking.py --synthetic 20 --byte-encoding
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import importer  # noqa: E402
+from fakes import ByteEncoding  # noqa: E402
+
+
+def load_encoding(byte_encoding=False):
+    """Encoder usado pelas duas versões; cai no ``ByteEncoding`` sem o tiktoken"""
+    if not byte_encoding:
+        try:
+            return importer.get_encoding()
+        except Exception as e:
+            print(f'tiktoken indisponível ({type(e).__name__}); usando ByteEncoding '
+                  f'(um token por byte)')
+    encoding = ByteEncoding()
+    importer.get_encoding = lambda model=importer.DEFAULT_EMBEDDING_MODEL: encoding
+    return encoding
+
+
+def legacy_chunk_text(encoding, text, max_tokens=3500, overlap_tokens=150):
+    """Implementação original de importer.chunk_text (referência para o golden)"""
+    tokens = encoding.encode(text)
+    chunks = []
+    i = 0
+    while i < len(tokens):
+        end = min(i + max_tokens, len(tokens))
+        chunk_tokens = tokens[i:end]
+        chunk = encoding.decode(chunk_tokens)
+        if end < len(tokens):
+            pos = chunk.rfind(' ')
+            if pos != -1:
+                chunk = chunk[:pos+1]
+                used = encoding.encode(chunk)
+                end = i + len(used)
+        chunks.append({"text": chunk, "number": len(chunks)})
+        if end >= len(tokens):
+            break
+        i = end - overlap_tokens
+        overlap = encoding.decode(tokens[i:i+overlap_tokens])
+        sp = overlap.find(' ')
+        if sp != -1:
+            adj = sp + 1
+            i += len(encoding.encode(overlap[:adj])) - overlap_tokens
+    return chunks
+
+
+def synthetic_bills(count, words, seed=42):
+    rnd = random.Random(seed)
+    vocab = ['Art.', '1º', 'Fica', 'instituído', 'o', 'Programa', 'Estadual', 'de',
+             'Proteção', 'à', 'Saúde', '§', '2º', 'Parágrafo', 'único.', 'Lei', 'nº',
+             '12.345,', 'de', '2023.', 'Esta', 'lei', 'entra', 'em', 'vigor', 'na',
+             'data', 'de', 'sua', 'publicação.', '\n', 'I', '-', 'II', ';']
+    for _ in range(count):
+        yield ' '.join(rnd.choice(vocab) for _ in range(rnd.randint(words // 2, words)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--input', help='Saída do Scrapy usada como corpus golden')
+    parser.add_argument('--synthetic', type=int, default=100,
+                        help='Número de projetos sintéticos (sem --input)')
+    parser.add_argument('--words', type=int, default=20000,
+                        help='Palavras por projeto sintético')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--byte-encoding', action='store_true',
+                        help='Usa o ByteEncoding de fakes.py no lugar do tiktoken')
+    args = parser.parse_args()
+    encoding = load_encoding(args.byte_encoding)
+
+    if args.input:
+        texts = [item.get('full_text') or '' for item in importer.load_items(args.input)]
+    else:
+        texts = list(synthetic_bills(args.synthetic, args.words))
+    texts = texts[:args.limit]
+    print(f'{len(texts)} textos, {sum(map(len, texts)) / 1e6:.1f} M caracteres')
+
+    start = time.perf_counter()
+    golden = [legacy_chunk_text(encoding, t) for t in texts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single = [importer.chunk_text(t) for t in texts]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = importer.chunk_texts(texts)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    structured = importer.chunk_texts(texts, strategy='structure')
+    structure_time = time.perf_counter() - start
+
+    def plain(chunks):
+        return [{'text': c['text'], 'number': c['number']} for c in chunks]
+
+    mismatches = sum(1 for a, b, c in zip(golden, single, batched) if not a == plain(b) == plain(c))
+    chunks = sum(map(len, golden))
+    print(f'legacy       {legacy_time:8.2f}s')
+    print(f'chunk_text   {single_time:8.2f}s  ({legacy_time / single_time:.1f}x)')
+    print(f'chunk_texts  {batch_time:8.2f}s  ({legacy_time / batch_time:.1f}x)')
+    print(f'structure    {structure_time:8.2f}s')
+    print(f'{chunks} chunks, {mismatches} textos divergentes')
+    for name, result in (('tokens', batched), ('structure', structured)):
+        print(f'{name:<10} {sum(map(len, result)):8d} chunks '
+              f'{sum(c["tokens"] for r in result for c in r):10d} tokens')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Compara a limpeza de caracteres de controle antiga com ControlCharSanitizer.
+
+Uso:
+    python benchmarks/bench_sanitizer.py --size-mb 1024
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assessorai_crawler.utils import ControlCharSanitizer  # noqa: E402
+
+BLOCK_SIZE = 1 << 20
+
+
+def legacy_strip(raw_text):
+    """Implementação original de utils.clean_json_text (sem o json.loads)"""
+    return ''.join(ch for ch in raw_text if ch in ('\n', '\r') or ord(ch) >= 32)
+
+
+def synthetic_block(noise=0.001, seed=42):
+    """Gera 1 MiB de texto de proposição com caracteres de controle espalhados"""
+    rnd = random.Random(seed)
+    words = ['Art.', '1º', 'Fica', 'instituído', 'o', 'Programa', 'Estadual', 'de',
+             'Proteção', 'à', 'Saúde', 'Parágrafo', 'único', '§', 'Lei', 'nº']
+    parts = []
+    size = 0
+    while size < BLOCK_SIZE:
+        word = rnd.choice(words)
+        if rnd.random() < noise:
+            word += chr(rnd.choice([0, 1, 7, 8, 9, 11, 12, 27, 31]))
+        parts.append(word)
+        size += len(word.encode('utf-8')) + 1
+    return ' '.join(parts).encode('utf-8')[:BLOCK_SIZE]
+
+
+def run(name, func, blocks, data):
+    start = time.perf_counter()
+    total = 0
+    for _ in range(blocks):
+        total += len(func(data))
+    elapsed = time.perf_counter() - start
+    mb = blocks * len(data) / 1e6
+    print(f'{name:<32} {elapsed:8.2f}s {mb / elapsed:10.1f} MB/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=1024,
+                        help='Volume sintético processado (padrão: 1 GB)')
+    parser.add_argument('--legacy-mb', type=int, default=None,
+                        help='Volume usado na versão antiga (mais lenta); padrão = --size-mb')
+    args = parser.parse_args()
+
+    raw = synthetic_block()
+    text = raw.decode('utf-8', errors='ignore')
+    legacy_blocks = args.legacy_mb or args.size_mb
+
+    old = legacy_blocks / run('legacy (gerador por caractere)', legacy_strip, legacy_blocks, text)
+    sanitizer = ControlCharSanitizer()
+    new_str = args.size_mb / run('ControlCharSanitizer (str)', sanitizer.feed, args.size_mb, text)
+    new_bytes = args.size_mb / run('ControlCharSanitizer (bytes)', sanitizer.feed, args.size_mb, raw)
+    strict = ControlCharSanitizer(strict=True)
+    run('ControlCharSanitizer (strict)', strict.feed, args.size_mb, raw)
+    print(f'speedup str:   {new_str / old:6.1f}x')
+    print(f'speedup bytes: {new_bytes / old:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
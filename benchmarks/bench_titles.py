@@ -0,0 +1,81 @@
+"""Compara o parsing de títulos antigo (split repetido) com assessorai_crawler.titles.
+
+Gera milhões de títulos sintéticos com as variações de grafia vistas nos
+dumps ("PL 12/2020", "PL. 012/2020", "PL 12 2020", "PL nº 12/20") e mede
+o caminho antigo de build_item + build_url, ``parse_title`` título a título
+e ``parse_titles`` em lote. Confere que as duas APIs novas concordam.
+
+Uso:
+    python benchmarks/bench_titles.py --count 2000000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assessorai_crawler.titles import parse_title, parse_titles, title_keys  # noqa: E402
+
+TYPES = ['PL', 'PLC', 'PEC', 'PDL', 'IND', 'REQ', 'MOC', 'Moção', 'Projeto de Lei']
+FORMATS = ['{t} {n}/{y}', '{t}. {n:04d}/{y}', '{t} {n} {y}', '{t} nº {n}/{y2:02d}', '{t} {n}']
+
+
+def synthetic_titles(count, seed=42):
+    rnd = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        year = rnd.randint(1990, 2025)
+        titles.append(rnd.choice(FORMATS).format(
+            t=rnd.choice(TYPES), n=rnd.randint(1, 9999), y=year, y2=year % 100))
+    return titles
+
+
+def legacy_parse(raw_title):
+    """build_item + build_url antigos: vários split() por título"""
+    raw_title = raw_title.strip()
+    kind = raw_title.split()[0] if raw_title else ''
+    num_year = raw_title.split()[1] if len(raw_title.split()) > 1 else ''
+    try:
+        num, yr = num_year.split('/')
+        number, year = int(num), int(yr)
+    except ValueError:
+        number, year = None, None
+    # build_url (BA/RS) repetia o split
+    tipo = raw_title.split()[0].upper()
+    numero = raw_title.split()[1].split('/')[0].strip() if len(raw_title.split()) > 1 else ''
+    return kind, number, year, tipo, numero
+
+
+def run(name, func, titles):
+    gc.collect()
+    start = time.perf_counter()
+    result = func(titles)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<28} {elapsed:8.2f}s {len(titles) / elapsed / 1e6:8.2f} M títulos/s')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=2_000_000, help='Número de títulos')
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.count)
+    # Congela os títulos fora da coleta de lixo, para não pesar nas medidas
+    gc.freeze()
+    run('legacy (split)', lambda ts: [legacy_parse(t) for t in ts], titles)
+    single = run('parse_title', lambda ts: [parse_title(t) for t in ts], titles)
+    batch = run('parse_titles (lote)', parse_titles, titles)
+    run('title_keys (lote)', title_keys, titles)
+    if single != batch:
+        print('ERRO: parse_title e parse_titles divergem')
+        sys.exit(1)
+    unparsed = sum(1 for key in batch if key is None)
+    print(f'{len(set(k.key for k in batch if k))} chaves distintas, {unparsed} títulos sem número')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Gera um corpus legislativo sintético no formato da Legislapi.
+
+Cria ``{pasta}/{uf}/Proposicoes{UF}.json`` (metadados) e
+``{pasta}/{uf}/ProjetoInteiroTeor{UF}.json`` (textos), que podem ser lidos
+pelos spiders derivados de ``ProposicoesLegislapi`` (``folder=pasta``).
+O tamanho dos textos segue uma distribuição log-normal e uma fração dos
+caracteres pode ser trocada por caracteres de controle. Com ``duplicates``,
+uma fração das proposições reaproveita o texto de uma anterior, igual ou
+com poucas palavras trocadas (reapresentações, substitutivos).
+
+Uso:
+    python benchmarks/corpus.py --out .cache/corpus --bills 5000 --words 1500
+"""
+import argparse
+import json
+import math
+import os
+import random
+
+TYPES = ['PL', 'PLC', 'PEC', 'PDL', 'IND', 'REQ', 'MOC']
+AUTHORS = ['Dep. Ana Souza', 'Dep. Carlos Lima', 'Dep. Maria Oliveira', 'Dep. João Santos',
+           'Dep. Paula Ribeiro', 'Mesa Diretora', 'Governador do Estado']
+VOCAB = ['Fica', 'instituído', 'o', 'Programa', 'Estadual', 'de', 'Proteção', 'à', 'Saúde',
+         'Lei', 'nº', 'Esta', 'lei', 'entra', 'em', 'vigor', 'na', 'data', 'sua', 'publicação',
+         'Poder', 'Executivo', 'regulamentará', 'no', 'prazo', 'dias', 'educação', 'escolas',
+         'públicas', 'municípios', 'recursos', 'orçamentárias', 'dotações', 'próprias', 'e',
+         'para', 'os', 'fins', 'disposto', 'artigo', 'inciso', 'alínea', 'órgão', 'competente']
+SUBJECTS = ['Institui o Programa Estadual de {}.', 'Dispõe sobre {} nas escolas públicas.',
+            'Declara de utilidade pública a Associação de {}.', 'Altera a Lei que trata de {}.']
+THEMES = ['saúde mental', 'proteção animal', 'mobilidade urbana', 'segurança alimentar',
+          'educação ambiental', 'combate à violência', 'inclusão digital']
+# Caracteres de controle vistos nos dumps reais (mantém \n e \r)
+NOISE = [chr(c) for c in (0, 1, 7, 8, 11, 12, 27, 31)]
+
+
+def bill_text(rnd, words, noise=0.0):
+    """Texto de proposição com artigos, parágrafos e incisos"""
+    parts = []
+    article = 1
+    remaining = words
+    while remaining > 0:
+        size = min(remaining, rnd.randint(20, 120))
+        sentence = ' '.join(rnd.choice(VOCAB) for _ in range(size))
+        if rnd.random() < 0.2:
+            parts.append(f'Parágrafo único. {sentence}.')
+        elif rnd.random() < 0.3:
+            parts.append(f'§ {rnd.randint(1, 5)}º {sentence}.')
+        else:
+            parts.append(f'Art. {article}º {sentence}.')
+            article += 1
+        remaining -= size
+    text = '\n'.join(parts)
+    if noise:
+        chars = list(text)
+        for _ in range(int(len(chars) * noise)):
+            chars[rnd.randrange(len(chars))] = rnd.choice(NOISE)
+        text = ''.join(chars)
+    return text
+
+
+def near_copy(rnd, text, changes=0.005):
+    """Cópia do texto com uma fração das palavras trocadas"""
+    words = text.split(' ')
+    for _ in range(max(1, int(len(words) * changes))):
+        words[rnd.randrange(len(words))] = rnd.choice(VOCAB)
+    return ' '.join(words)
+
+
+def generate(out, uf='sp', bills=1000, words=1500, sigma=0.8, noise=0.0001, seed=42,
+             duplicates=0.0):
+    """Grava o par de arquivos e retorna os caminhos (metadados, textos)"""
+    rnd = random.Random(seed)
+    folder = os.path.join(out, uf)
+    os.makedirs(folder, exist_ok=True)
+    metadata_path = os.path.join(folder, f'Proposicoes{uf.upper()}.json')
+    text_path = os.path.join(folder, f'ProjetoInteiroTeor{uf.upper()}.json')
+    # Média log-normal igual a ``words``
+    mu = math.log(words) - sigma ** 2 / 2
+    texts = []
+    with open(metadata_path, 'w', encoding='utf-8') as meta_file, \
+            open(text_path, 'w', encoding='utf-8') as text_file:
+        meta_file.write('[')
+        text_file.write('[')
+        for index in range(bills):
+            kind = rnd.choice(TYPES)
+            number = index + 1
+            year = rnd.randint(1995, 2025)
+            title = f'{kind} {number}/{year}'
+            meta = {
+                'Titulo': title,
+                'Numero': number,
+                'Ano': year,
+                'Autoria': ', '.join(rnd.sample(AUTHORS, rnd.randint(1, 3))),
+                'Ementa': rnd.choice(SUBJECTS).format(rnd.choice(THEMES)),
+                'DataApresentacao': f'{year}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}',
+                'IdProposicaoOrigem': 100000 + index,
+            }
+            if texts and duplicates and rnd.random() < duplicates:
+                body = rnd.choice(texts)
+                if rnd.random() < 0.5:
+                    body = near_copy(rnd, body)
+            else:
+                body = bill_text(rnd, max(1, int(rnd.lognormvariate(mu, sigma))), noise)
+                if duplicates:
+                    texts.append(body)
+            text = {
+                'Titulo': title,
+                'IdProposicaoOrigem': 100000 + index,
+                'Texto': body,
+            }
+            separator = ',\n' if index else '\n'
+            meta_file.write(separator + json.dumps(meta, ensure_ascii=False))
+            text_file.write(separator + json.dumps(text, ensure_ascii=False))
+        meta_file.write('\n]\n')
+        text_file.write('\n]\n')
+    return metadata_path, text_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='.cache/corpus', help='Pasta de saída')
+    parser.add_argument('--uf', default='sp', help='UF usada nos nomes dos arquivos')
+    parser.add_argument('--bills', type=int, default=1000, help='Número de proposições')
+    parser.add_argument('--words', type=int, default=1500, help='Palavras por texto (média)')
+    parser.add_argument('--sigma', type=float, default=0.8,
+                        help='Dispersão log-normal do tamanho dos textos')
+    parser.add_argument('--noise', type=float, default=0.0001,
+                        help='Fração de caracteres trocados por caracteres de controle')
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help='Fração de proposições que repetem o texto de outra')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    paths = generate(args.out, args.uf, args.bills, args.words, args.sigma, args.noise, args.seed,
+                     args.duplicates)
+    for path in paths:
+        print(f'{path}: {os.path.getsize(path) / 1e6:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Substitutos locais do cliente Weaviate para benchmarks e testes.
+
+Implementam só a parte da API v4 usada por importer.py e guardam os
+objetos em memória. ``ByteEncoding`` substitui o tokenizador do tiktoken
+quando o vocabulário não pode ser baixado.
+"""
+import asyncio
+import contextlib
+import random
+import types
+
+
+class FakeBatch:
+    def __init__(self, collection, batch_size, failed_objects):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.failed_objects = failed_objects
+        self.number_errors = 0
+
+    def add_object(self, properties, uuid=None, vector=None, references=None):
+        if self.collection.fail():
+            self.number_errors += 1
+            self.failed_objects.append(failed_object(
+                uuid, properties=properties, references=references, vector=vector,
+                collection=self.collection.name,
+            ))
+            return
+        self.collection.objects[str(uuid)] = {
+            'properties': properties, 'vector': vector, 'references': references,
+        }
+        self.collection.requests_sent += 1
+
+
+class FakeBatchManager:
+    def __init__(self, collection):
+        self.collection = collection
+        self.failed_objects = []
+
+    @contextlib.contextmanager
+    def fixed_size(self, batch_size=100, concurrent_requests=1):
+        # Como no weaviate, failed_objects reflete só o último contexto de batch
+        self.failed_objects = []
+        yield FakeBatch(self.collection, batch_size, self.failed_objects)
+
+
+class FakeData:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def delete_by_id(self, uuid):
+        return self.collection.objects.pop(str(uuid), None) is not None
+
+
+class FakeCollection:
+    def __init__(self, name, properties=None, object_error_rate=0.0, rng=None, **config):
+        self.name = name
+        self.object_error_rate = object_error_rate
+        self.rng = rng or random.Random(0)
+        self.properties = properties or []
+        self.config = config
+        self.objects = {}
+        self.requests_sent = 0
+        self.batch = FakeBatchManager(self)
+        self.data = FakeData(self)
+
+    def fail(self):
+        """Sorteia se o próximo objeto deve falhar (``object_error_rate``)"""
+        return self.object_error_rate > 0 and self.rng.random() < self.object_error_rate
+
+
+class FakeCollections:
+    def __init__(self, object_error_rate=0.0, seed=0):
+        self.by_name = {}
+        self.object_error_rate = object_error_rate
+        self.rng = random.Random(seed)
+
+    def exists(self, name):
+        return name in self.by_name
+
+    def create(self, name, properties=None, **config):
+        self.by_name[name] = FakeCollection(name, properties, self.object_error_rate, self.rng, **config)
+        return self.by_name[name]
+
+    def get(self, name):
+        if name not in self.by_name:
+            self.create(name)
+        return self.by_name[name]
+
+    def delete(self, name):
+        self.by_name.pop(name, None)
+
+
+class FakeWeaviateClient:
+    """Cliente em memória compatível com o que importer.py usa do weaviate v4
+
+    ``object_error_rate`` faz uma fração dos objetos falhar no batch, para
+    exercitar as novas tentativas e o checkpoint.
+    """
+
+    def __init__(self, object_error_rate=0.0, seed=0):
+        self.collections = FakeCollections(object_error_rate, seed)
+
+    def close(self):
+        pass
+
+
+def failed_object(uuid, message='fake error', properties=None, references=None, vector=None,
+                  collection=None):
+    """Monta um objeto com a forma de ``batch.failed_objects`` do weaviate"""
+    object_ = types.SimpleNamespace(uuid=uuid, properties=properties, references=references,
+                                    vector=vector, collection=collection)
+    return types.SimpleNamespace(object_=object_, message=message)
+
+
+class FakeAsyncData:
+    """``collection.data`` assíncrono com latência e falhas simuladas"""
+
+    def __init__(self, collection, server):
+        self.collection = collection
+        self.server = server
+
+    async def insert_many(self, objects):
+        server = self.server
+        server.in_flight += 1
+        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            await asyncio.sleep(server.latency + server.per_object_latency * len(objects))
+            if server.rng.random() < server.request_error_rate:
+                raise ConnectionError('fake: falha de rede simulada')
+            errors = {}
+            for index, obj in enumerate(objects):
+                if server.rng.random() < server.object_error_rate:
+                    errors[index] = failed_object(obj.uuid)
+                else:
+                    self.collection.objects[str(obj.uuid)] = {
+                        'properties': obj.properties,
+                        'vector': getattr(obj, 'vector', None),
+                        'references': getattr(obj, 'references', None),
+                    }
+            server.requests += 1
+            return types.SimpleNamespace(errors=errors, has_errors=bool(errors))
+        finally:
+            server.in_flight -= 1
+
+    async def delete_by_id(self, uuid):
+        return self.collection.objects.pop(str(uuid), None) is not None
+
+
+class FakeAsyncCollections(FakeCollections):
+    def __init__(self, server):
+        super().__init__()
+        self.server = server
+
+    def create(self, name, properties=None, **config):
+        collection = super().create(name, properties, **config)
+        collection.data = FakeAsyncData(collection, self.server)
+        return collection
+
+
+class FakeAsyncWeaviateClient:
+    """Cliente async em memória que injeta latência e erros, como um servidor lento.
+
+    Cada ``insert_many`` espera ``latency + per_object_latency * n`` segundos;
+    ``request_error_rate`` derruba lotes inteiros e ``object_error_rate``
+    rejeita objetos individuais.
+    """
+
+    def __init__(self, latency=0.05, per_object_latency=0.0005, request_error_rate=0.0,
+                 object_error_rate=0.0, seed=0):
+        self.latency = latency
+        self.per_object_latency = per_object_latency
+        self.request_error_rate = request_error_rate
+        self.object_error_rate = object_error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.collections = FakeAsyncCollections(self)
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class ByteEncoding:
+    """Encoder de um token por byte, com a interface do tiktoken usada pelo importer"""
+
+    def encode(self, text):
+        return list(text.encode('utf-8'))
+
+    def encode_batch(self, texts, num_threads=8):
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens):
+        return bytes(tokens).decode('utf-8', 'replace')
+
+    def decode_tokens_bytes(self, tokens):
+        return [bytes([token]) for token in tokens]
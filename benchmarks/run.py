@@ -0,0 +1,315 @@
+"""Suíte de benchmarks do crawler e do importer sobre um corpus sintético.
+
+Gera (ou reaproveita) um corpus com ``benchmarks/corpus.py`` e mede cada
+etapa em um processo próprio, para que o pico de memória (RSS) de uma não
+contamine a outra:
+
+- ``clean_json_text``: limpeza + ``json.loads`` do arquivo de textos;
+- ``spider_parse``: ``ProposicoesLegislapi.parse_metadata`` + ``parse``;
+- ``spider_stream``: o mesmo spider em modo ``stream``;
+- ``pipelines``: ``ValidationPipeline`` + ``JsonWriterSinglePipeline``;
+- ``chunk_text``: chunking de todos os textos;
+- ``dedup``: ``DedupIndex.check`` (hash exato + MinHash/LSH) em todos os textos;
+- ``import_dry_run``: ``import_items`` em dry-run com o cliente falso.
+
+Os resultados (tempo, vazão e pico de RSS) são gravados em JSON com o
+commit atual, e ``--compare`` mostra a variação contra uma execução anterior.
+
+Uso:
+    python benchmarks/run.py --bills 2000
+    python benchmarks/run.py --bills 2000 --compare benchmarks/results/<anterior>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import corpus  # noqa: E402
+
+
+class StageSkipped(Exception):
+    """A etapa não pode rodar neste ambiente (dependência ou dado ausente)"""
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo atual, em MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3
+
+
+def corpus_items(text_path):
+    """Itens no formato do importer, montados direto do arquivo de textos"""
+    from assessorai_crawler.utils import iter_json_array
+    for index, entry in enumerate(iter_json_array(text_path)):
+        title = entry.get('Titulo', '')
+        yield {
+            'uuid': f'bench-{index}', 'title': title, 'house': 'Benchmark',
+            'type': title.split()[0] if title else '', 'subject': title,
+            'full_text': entry.get('Texto', ''), 'url': '',
+        }
+
+
+def make_spider(folder, uf, **options):
+    from assessorai_crawler.spiders.proposicoeslegislapi import ProposicoesLegislapi
+    return ProposicoesLegislapi(folder=folder, uf=uf, **options)
+
+
+def file_response(path):
+    from scrapy.http import TextResponse
+    with open(path, 'rb') as f:
+        return TextResponse(url=f'file://{os.path.abspath(path)}', body=f.read(), encoding='utf-8')
+
+
+def spider_items(spider):
+    list(spider.parse_metadata(file_response(spider.get_metadata_file())))
+    return spider, list(spider.parse(file_response(spider.get_text_file())))
+
+
+def stage_clean_json_text(paths):
+    from assessorai_crawler.utils import clean_json_text
+    with open(paths['text'], 'r', encoding='utf-8') as f:
+        raw = f.read()
+    start = time.perf_counter()
+    entries = clean_json_text(raw)
+    return time.perf_counter() - start, len(entries), len(raw.encode('utf-8'))
+
+
+def stage_spider_parse(paths):
+    # Import do Scrapy e criação do spider fora da medida, como em spider_stream
+    spider = make_spider(paths['folder'], paths['uf'])
+    start = time.perf_counter()
+    _, items = spider_items(spider)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(items), paths['bytes']
+
+
+def stage_spider_stream(paths):
+    spider = make_spider(paths['folder'], paths['uf'], stream='1')
+    start = time.perf_counter()
+    count = sum(1 for _ in spider.start_requests())
+    return time.perf_counter() - start, count, paths['bytes']
+
+
+def stage_pipelines(paths):
+    from scrapy.exceptions import DropItem
+    from assessorai_crawler.pipelines import JsonWriterSinglePipeline, ValidationPipeline
+    spider, items = spider_items(make_spider(paths['folder'], paths['uf']))
+    validation = ValidationPipeline()
+    writer = JsonWriterSinglePipeline()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # O writer grava em output/ relativo ao diretório atual
+        os.chdir(tmp)
+        try:
+            start = time.perf_counter()
+            writer.open_spider(spider)
+            for item in items:
+                try:
+                    writer.process_item(validation.process_item(item, spider), spider)
+                except DropItem:
+                    pass
+            writer.close_spider(spider)
+            elapsed = time.perf_counter() - start
+            written = os.path.getsize(writer.file_path)
+        finally:
+            os.chdir(cwd)
+    return elapsed, len(items), written
+
+
+def load_encoding():
+    """Carrega o tiktoken (lazy) fora da medida; sem o vocabulário, pula a etapa"""
+    import importer
+    try:
+        importer.get_encoding()
+    except Exception as e:
+        raise StageSkipped(f'tiktoken sem o vocabulário ({type(e).__name__})') from e
+
+
+def stage_chunk_text(paths):
+    import importer
+    texts = [item['full_text'] for item in corpus_items(paths['text'])]
+    load_encoding()
+    start = time.perf_counter()
+    chunks = sum(len(importer.chunk_text(text)) for text in texts)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(texts), sum(len(text.encode('utf-8')) for text in texts), {'chunks': chunks}
+
+
+def stage_dedup(paths):
+    from assessorai_crawler.dedup import DedupIndex
+    items = list(corpus_items(paths['text']))
+    with tempfile.TemporaryDirectory() as tmp:
+        index = DedupIndex(os.path.join(tmp, 'dedup.sqlite'), threshold=0.9)
+        start = time.perf_counter()
+        found = [index.check(item['uuid'], item['full_text']) for item in items]
+        index.close()
+        elapsed = time.perf_counter() - start
+    return (elapsed, len(items), sum(len(item['full_text'].encode('utf-8')) for item in items),
+            {'exact': sum(1 for f in found if f and f.kind == 'exact'),
+             'near': sum(1 for f in found if f and f.kind == 'near')})
+
+
+def stage_import_dry_run(paths):
+    import importer
+    from fakes import FakeWeaviateClient
+    items = list(corpus_items(paths['text']))
+    load_encoding()
+    start = time.perf_counter()
+    # O dry-run imprime uma linha por chunk; a saída não entra na medida
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        importer.import_items(FakeWeaviateClient(), 'Bill', items, dry_run=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(items), sum(len(item['full_text'].encode('utf-8')) for item in items)
+
+
+STAGES = {
+    'clean_json_text': stage_clean_json_text,
+    'spider_parse': stage_spider_parse,
+    'spider_stream': stage_spider_stream,
+    'pipelines': stage_pipelines,
+    'chunk_text': stage_chunk_text,
+    'dedup': stage_dedup,
+    'import_dry_run': stage_import_dry_run,
+}
+
+
+def _child(name, paths, repeat, queue):
+    try:
+        rss_start = peak_rss_mb()
+        best = None
+        for _ in range(repeat):
+            elapsed, items, size, *extra = STAGES[name](paths)
+            if best is None or elapsed < best[0]:
+                best = (elapsed, items, size, extra[0] if extra else {})
+        elapsed, items, size, extra = best
+        queue.put({
+            'seconds': round(elapsed, 4),
+            'items': items,
+            'bytes': size,
+            'items_per_s': round(items / elapsed, 1) if elapsed else None,
+            'mb_per_s': round(size / 1e6 / elapsed, 2) if elapsed else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'start_rss_mb': round(rss_start, 1),
+            **extra,
+        })
+    except (ImportError, StageSkipped) as e:
+        queue.put({'skipped': str(e)})
+    except Exception:
+        queue.put({'error': traceback.format_exc()})
+
+
+def run_stage(name, paths, repeat=1):
+    """Roda uma etapa em um processo novo (spawn) e retorna suas métricas"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, paths, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, previous_path):
+    """Imprime a variação de vazão e memória contra um resultado anterior"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\nComparação com {previous.get('commit')} ({previous_path}):")
+    for name, current in results['stages'].items():
+        old = previous.get('stages', {}).get(name, {})
+        if not current.get('items_per_s') or not old.get('items_per_s'):
+            continue
+        speed = current['items_per_s'] / old['items_per_s']
+        memory = current['peak_rss_mb'] - old['peak_rss_mb']
+        flag = '  <- regressão' if speed < 0.9 else ''
+        print(f"{name:<18} {speed:6.2f}x vazão  {memory:+8.1f} MB RSS{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default='.cache/bench-corpus',
+                        help='Pasta do corpus sintético (gerado se não existir)')
+    parser.add_argument('--uf', default='sp')
+    parser.add_argument('--bills', type=int, default=1000)
+    parser.add_argument('--words', type=int, default=1500)
+    parser.add_argument('--sigma', type=float, default=0.8)
+    parser.add_argument('--noise', type=float, default=0.0001)
+    parser.add_argument('--duplicates', type=float, default=0.0)
+    parser.add_argument('--regenerate', action='store_true', help='Gera o corpus de novo')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=1, help='Repetições por etapa (vale a melhor)')
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results'),
+                        help='Pasta onde gravar o JSON de resultados')
+    parser.add_argument('--compare', help='JSON de uma execução anterior')
+    args = parser.parse_args()
+
+    params = {'uf': args.uf, 'bills': args.bills, 'words': args.words,
+              'sigma': args.sigma, 'noise': args.noise}
+    if args.duplicates:
+        # Fora do nome da pasta quando zerado, para reaproveitar corpora antigos
+        params['duplicates'] = args.duplicates
+    folder = os.path.join(args.corpus, '_'.join(f'{k}{v}' for k, v in params.items()))
+    metadata_path = os.path.join(folder, args.uf, f'Proposicoes{args.uf.upper()}.json')
+    text_path = os.path.join(folder, args.uf, f'ProjetoInteiroTeor{args.uf.upper()}.json')
+    if args.regenerate or not os.path.exists(text_path):
+        print(f'Gerando corpus em {folder}...')
+        corpus.generate(folder, **params)
+    paths = {
+        'folder': folder, 'uf': args.uf, 'metadata': metadata_path, 'text': text_path,
+        'bytes': os.path.getsize(metadata_path) + os.path.getsize(text_path),
+    }
+
+    results = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': {**params, 'bytes': paths['bytes']},
+        'stages': {},
+    }
+    print(f"{'etapa':<18} {'tempo':>9} {'itens/s':>10} {'MB/s':>8} {'pico RSS':>10}")
+    for name in args.stages:
+        result = run_stage(name, paths, args.repeat)
+        results['stages'][name] = result
+        if 'skipped' in result:
+            print(f"{name:<18} pulado: {result['skipped']}")
+        elif 'error' in result:
+            print(f"{name:<18} erro:\n{result['error']}")
+        else:
+            print(f"{name:<18} {result['seconds']:8.2f}s {result['items_per_s']:10.1f} "
+                  f"{result['mb_per_s']:8.2f} {result['peak_rss_mb']:8.1f}MB")
+
+    os.makedirs(args.output, exist_ok=True)
+    output = os.path.join(args.output, f"{time.strftime('%Y%m%d-%H%M%S')}_{results['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f'Resultados gravados em {output}')
+    if args.compare:
+        compare(results, args.compare)
+    if any('error' in result for result in results['stages'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
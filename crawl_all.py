@@ -0,0 +1,180 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from assessorai_crawler.utils import (compression_suffix, is_jsonl, iter_json_array,
+                                      open_compressed)
+from assessorai_crawler.shards import ShardManifest, is_manifest, manifest_path
+
+
+def _stats_value(value):
+    """Converte valores das stats do Scrapy (datetime etc.) para JSON"""
+    return value if isinstance(value, (int, float, str, bool, type(None))) else str(value)
+
+
+def crawl_state(job):
+    """Roda um spider num processo novo e devolve o resumo da execução.
+
+    Cada processo tem seu próprio reactor do Twisted, então os estados
+    decodificam JSON e montam itens em paralelo, em CPUs diferentes.
+    """
+    name, overrides, spider_args = job
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+    from assessorai_crawler.pipelines import output_name
+
+    started = time.time()
+    summary = {'spider': name, 'ok': False, 'finish_reason': None, 'items': 0,
+               'dropped': 0, 'errors': 0, 'elapsed_seconds': 0.0, 'output': None, 'stats': {}}
+    try:
+        settings = get_project_settings()
+        settings.setdict(overrides, priority='cmdline')
+        process = CrawlerProcess(settings, install_root_handler=False)
+        crawler = process.create_crawler(name)
+        process.crawl(crawler, **spider_args)
+        process.start()
+        stats = {key: _stats_value(value) for key, value in crawler.stats.get_stats().items()}
+        output = os.path.join(
+            settings.get('OUTPUT_DIR', 'output'),
+            f"{output_name(crawler.spider)}.{settings.get('OUTPUT_FORMAT', 'json')}"
+            f"{compression_suffix(settings.get('OUTPUT_COMPRESSION'))}",
+        )
+        if (settings.getint('OUTPUT_SHARD_ITEMS', 0) or settings.getint('OUTPUT_SHARD_BYTES', 0)
+                or settings.get('OUTPUT_SHARD_BY')):
+            output = manifest_path(settings.get('OUTPUT_DIR', 'output'), output_name(crawler.spider))
+        summary.update(
+            finish_reason=stats.get('finish_reason'),
+            items=stats.get('item_scraped_count', 0),
+            dropped=stats.get('item_dropped_count', 0),
+            errors=stats.get('log_count/ERROR', 0) + stats.get('spider_exceptions/count', 0),
+            output=output if os.path.exists(output) else None,
+            stats=stats,
+        )
+        summary['ok'] = (summary['finish_reason'] == 'finished'
+                         and not stats.get('spider_exceptions/count'))
+    except Exception as e:
+        summary['error'] = f'{type(e).__name__}: {e}'
+    summary['elapsed_seconds'] = round(time.time() - started, 2)
+    return summary
+
+
+def iter_output(path):
+    """Lê a saída de um spider (array JSON, JSONL ou manifesto de shards)"""
+    if is_manifest(path):
+        yield from ShardManifest(path).iter_items()
+    elif is_jsonl(path):
+        with open_compressed(path, 'rt') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_json_array(path)
+
+
+def merge_outputs(paths, merged_path):
+    """Concatena as saídas dos estados num único JSONL (lido pelo importer)"""
+    count = 0
+    tmp_path = f'{merged_path}.part'
+    with open_compressed(tmp_path, 'wt', compression=_compression_of(merged_path)) as out:
+        for path in paths:
+            for item in iter_output(path):
+                out.write(json.dumps(item, ensure_ascii=False) + '\n')
+                count += 1
+    os.replace(tmp_path, merged_path)
+    return count
+
+
+def _compression_of(path):
+    return 'gzip' if path.endswith('.gz') else 'zstd' if path.endswith('.zst') else None
+
+
+def parse_key_values(pairs, option):
+    values = {}
+    for pair in pairs or []:
+        if '=' not in pair:
+            raise SystemExit(f'{option} espera CHAVE=VALOR, recebeu: {pair}')
+        key, value = pair.split('=', 1)
+        values[key] = value
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Roda vários spiders de estados em paralelo, um processo por estado"
+    )
+    parser.add_argument("spiders", nargs="*",
+                        help="Spiders a rodar (padrão: todos os de 'scrapy list')")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processos simultâneos (padrão: nº de CPUs)")
+    parser.add_argument("--output-dir", default="output",
+                        help="Pasta comum das saídas (OUTPUT_DIR) e do resumo")
+    parser.add_argument("--merge",
+                        help="Também junta as saídas num único JSONL (.jsonl, .jsonl.gz ou .jsonl.zst)")
+    parser.add_argument("-s", "--set", action="append", metavar="NOME=VALOR",
+                        help="Setting do Scrapy aplicado a todos os spiders")
+    parser.add_argument("-a", "--arg", action="append", metavar="NOME=VALOR",
+                        help="Argumento de spider aplicado a todos (ex.: -a stream=1)")
+    args = parser.parse_args()
+
+    spiders = args.spiders
+    if not spiders:
+        from scrapy.spiderloader import SpiderLoader
+        from scrapy.utils.project import get_project_settings
+        spiders = SpiderLoader.from_settings(get_project_settings()).list()
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(spiders)))
+
+    overrides = parse_key_values(args.set, '-s')
+    overrides['OUTPUT_DIR'] = args.output_dir
+    overrides.setdefault('METRICS_DIR', os.path.join(args.output_dir, 'metrics'))
+    spider_args = parse_key_values(args.arg, '-a')
+    log_dir = os.path.join(args.output_dir, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    jobs = [(name, {'LOG_FILE': os.path.join(log_dir, f'{name}.log'), **overrides}, spider_args)
+            for name in spiders]
+
+    print(f"Rodando {len(spiders)} spiders com {workers} processos: {', '.join(spiders)}")
+    started = time.time()
+    results = []
+    # Um processo novo por spider: o reactor do Twisted não pode ser reiniciado
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers, maxtasksperchild=1) as pool:
+        for summary in pool.imap_unordered(crawl_state, jobs):
+            status = 'ok' if summary['ok'] else 'FALHOU'
+            print(f"[{status}] {summary['spider']}: {summary['items']} itens, "
+                  f"{summary['dropped']} descartados, {summary['errors']} erros, "
+                  f"{summary['elapsed_seconds']:.1f}s"
+                  + (f" ({summary['error']})" if summary.get('error') else ''))
+            results.append(summary)
+    elapsed = time.time() - started
+
+    results.sort(key=lambda summary: summary['spider'])
+    failed = [summary['spider'] for summary in results if not summary['ok']]
+    report = {
+        'elapsed_seconds': round(elapsed, 2),
+        'slowest_seconds': max((summary['elapsed_seconds'] for summary in results), default=0.0),
+        'sum_seconds': round(sum(summary['elapsed_seconds'] for summary in results), 2),
+        'items': sum(summary['items'] for summary in results),
+        'dropped': sum(summary['dropped'] for summary in results),
+        'failed': failed,
+        'states': results,
+    }
+    if args.merge:
+        outputs = [summary['output'] for summary in results if summary['output']]
+        report['merged'] = {'path': args.merge, 'items': merge_outputs(outputs, args.merge)}
+        print(f"{report['merged']['items']} itens juntados em {args.merge}")
+
+    summary_path = os.path.join(args.output_dir, 'crawl_summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Total: {report['items']} itens em {elapsed:.1f}s "
+          f"(soma dos estados: {report['sum_seconds']:.1f}s). Resumo em {summary_path}")
+    if failed:
+        print(f"Estados com falha: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import array
+import hashlib
+import math
+import os
+import sqlite3
+
+
+# Preço (USD por milhão de tokens) dos modelos de embeddings da OpenAI, para
+# as estimativas do ``importer.py --plan``
+EMBEDDING_PRICES = {
+    'text-embedding-ada-002': 0.10,
+    'text-embedding-3-small': 0.02,
+    'text-embedding-3-large': 0.13,
+}
+
+
+class VectorCache:
+    """Cache em disco (SQLite) de vetores, endereçado pelo conteúdo.
+
+    A chave é o sha256 do modelo e do texto exato enviado ao embedder, então
+    chunks idênticos (ementas repetidas, cabeçalhos, reimportações) são
+    calculados uma vez só. Os vetores são guardados como float32.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # O motor async chama o embedder a partir de threads do executor; com
+        # --shard-workers, vários processos dividem o arquivo
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB) WITHOUT ROWID'
+        )
+
+    @staticmethod
+    def key(model, text):
+        return hashlib.sha256(f'{model}\0{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Retorna {chave: vetor} para as chaves presentes no cache"""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(part))})", part
+            )
+            for key, blob in rows:
+                found[key] = array.array('f', blob).tolist()
+        return found
+
+    def put_many(self, vectors):
+        """Grava {chave: vetor} no cache"""
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)',
+                ((key, array.array('f', vector).tobytes()) for key, vector in vectors.items()),
+            )
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM vectors').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class OpenAIEmbedder:
+    """Calcula vetores com a API de embeddings da OpenAI, em lotes."""
+
+    DEFAULT_MODEL = 'text-embedding-3-small'
+
+    def __init__(self, model=DEFAULT_MODEL, api_key=None, batch_size=256):
+        try:
+            import openai
+        except ImportError as e:
+            raise ImportError('Instale o pacote openai para usar --embedder openai') from e
+        self.model = model
+        self.batch_size = batch_size
+        self.client = openai.OpenAI(api_key=api_key or os.getenv('OPENAI_APIKEY'))
+
+    def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(
+                model=self.model, input=texts[start:start + self.batch_size]
+            )
+            vectors.extend(data.embedding for data in response.data)
+        return vectors
+
+
+class FakeEmbedder:
+    """Embedder local e determinístico para testes e benchmarks.
+
+    O vetor é derivado do sha256 do texto (e normalizado), então o mesmo
+    texto sempre gera o mesmo vetor, sem rede nem custo.
+    """
+
+    def __init__(self, model='fake', dimensions=64):
+        self.model = f'{model}-{dimensions}'
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text):
+        values = []
+        seed = text.encode('utf-8')
+        counter = 0
+        while len(values) < self.dimensions:
+            digest = hashlib.sha256(seed + counter.to_bytes(4, 'little')).digest()
+            values.extend(b / 127.5 - 1.0 for b in digest)
+            counter += 1
+        values = values[:self.dimensions]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+
+class CachedEmbedder:
+    """Envolve um embedder com o ``VectorCache``: só textos inéditos são calculados.
+
+    Textos repetidos dentro do mesmo lote também são enviados uma vez só.
+    ``hits`` e ``misses`` contam os textos servidos pelo cache e calculados.
+    """
+
+    def __init__(self, embedder, cache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model = embedder.model
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts):
+        keys = [VectorCache.key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(set(keys))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            computed = self.embedder.embed(list(missing.values()))
+            computed = dict(zip(missing, computed))
+            self.cache.put_many(computed)
+            vectors.update(computed)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [vectors[key] for key in keys]
+
+
+EMBEDDERS = {
+    'openai': OpenAIEmbedder,
+    'fake': FakeEmbedder,
+}
+
+
+def get_embedder(name, cache_path=None, **options):
+    """Instancia o embedder ``name`` (ver ``EMBEDDERS``), com cache opcional em disco."""
+    embedder = EMBEDDERS[name](**options)
+    if cache_path:
+        embedder = CachedEmbedder(embedder, VectorCache(cache_path))
+    return embedder
@@ -1,176 +1,1419 @@
 import argparse
+import asyncio
+import bisect
+import collections
+import contextlib
+import functools
+import glob
+import hashlib
+import itertools
 import json
-import weaviate
+import math
+import multiprocessing
+import re
+import sqlite3
+import sys
+import time
 import os
-import tiktoken
+import uuid as uuid_lib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
-from weaviate.util import generate_uuid5
-import weaviate.classes.config as wc
-from weaviate.classes.config import Configure
-from weaviate.classes.init import Auth
 from dotenv import load_dotenv
-from tqdm import tqdm
+from assessorai_crawler.columnar import ItemFilter, is_parquet, read_parquet_items
+from assessorai_crawler.dedup import DedupIndex
+from assessorai_crawler.local_index import LocalIndex, is_local_index
+from assessorai_crawler.shards import ShardManifest, is_manifest, split_shards
+from assessorai_crawler.utils import is_jsonl, iter_json_array, open_compressed
+from embeddings import EMBEDDERS, EMBEDDING_PRICES, CachedEmbedder, OpenAIEmbedder, get_embedder
 load_dotenv()
 
-def chunk_text(text, max_tokens=3500, overlap_tokens=150, model="text-embedding-ada-002"):
-    """Divide o texto em chunks baseados em tokens do modelo OpenAI."""
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model=DEFAULT_EMBEDDING_MODEL):
+    """Retorna o encoder do tiktoken para o modelo (carregado uma vez por processo)."""
+    import tiktoken
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(text)
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _is_word_end(data, pos):
+    """Indica se ``data[pos]`` é um espaço logo após uma letra.
+
+    Nessas posições o pré-tokenizador do tiktoken sempre abre um novo trecho,
+    qualquer que seja o ponto de partida do encode, então a contagem de
+    tokens do texto original vale também para um recorte que passe por ali.
+    """
+    if data[pos] != 0x20 or pos == 0:
+        return False
+    return data[max(0, pos - 4):pos].decode('utf-8', 'ignore')[-1:].isalpha()
+
+
+def _count_tokens(encoding, data, offsets, start, stop):
+    """Equivale a ``len(encoding.encode(data[start:stop].decode()))`` sem recodificar o meio.
+
+    Só as pontas do recorte (até a primeira e a partir da última fronteira de
+    palavra) são recodificadas; o miolo é contado pelos offsets dos tokens.
+    """
+    first = start + 1
+    while first < stop and not _is_word_end(data, first):
+        first += 1
+    last = stop - 1
+    while last > first and not _is_word_end(data, last):
+        last -= 1
+    if last <= first:
+        return len(encoding.encode(data[start:stop].decode('utf-8', 'replace')))
+    middle = bisect.bisect_left(offsets, last) - bisect.bisect_left(offsets, first)
+    head = encoding.encode(data[start:first].decode('utf-8', 'replace'))
+    tail = encoding.encode(data[last:stop].decode('utf-8', 'replace'))
+    return len(head) + middle + len(tail)
+
+
+def _chunk_tokens(encoding, text, tokens, max_tokens, overlap_tokens):
+    """Janela de tokens com corte em espaço, a partir de um único encode do texto."""
+    data = text.encode('utf-8')
+    offsets = list(itertools.accumulate(map(len, encoding.decode_tokens_bytes(tokens)), initial=0))
     chunks = []
     i = 0
+    starts = set()
     while i < len(tokens):
+        starts.add(i)
         end = min(i + max_tokens, len(tokens))
-        chunk_tokens = tokens[i:end]
-        chunk = encoding.decode(chunk_tokens)
+        window = data[offsets[i]:offsets[end]]
         if end < len(tokens):
-            pos = chunk.rfind(' ')
+            pos = window.rfind(b' ')
             if pos != -1:
-                chunk = chunk[:pos+1]
-                used = encoding.encode(chunk)
-                end = i + len(used)
-        chunks.append({"text": chunk, "number": len(chunks)})
+                window = window[:pos+1]
+                end = i + _count_tokens(encoding, data, offsets, offsets[i], offsets[i] + pos + 1)
+        chunks.append({"text": window.decode('utf-8', 'replace'), "number": len(chunks),
+                       "tokens": end - i})
         if end >= len(tokens):
             break
         i = end - overlap_tokens
-        overlap = encoding.decode(tokens[i:i+overlap_tokens])
-        sp = overlap.find(' ')
+        overlap = data[offsets[i]:offsets[i+overlap_tokens]]
+        sp = overlap.find(b' ')
         if sp != -1:
             adj = sp + 1
-            i += len(encoding.encode(overlap[:adj])) - overlap_tokens
+            i += len(encoding.encode(overlap[:adj].decode('utf-8', 'replace'))) - overlap_tokens
+        if i in starts:
+            # O ajuste de overlap voltou a uma janela já vista (texto quase sem
+            # espaços): sem isso o laço repetiria a mesma janela para sempre
+            i = max(starts) + 1
     return chunks
 
 
-def load_items(json_file):
-    """Carrega itens do JSON de saída do Scrapy."""
-    with open(json_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def chunk_text(text, max_tokens=3500, overlap_tokens=150, model=DEFAULT_EMBEDDING_MODEL,
+               strategy="tokens"):
+    """Divide o texto em chunks baseados em tokens do modelo OpenAI.
+
+    ``strategy="structure"`` agrupa artigos e parágrafos inteiros (ver
+    ``_chunk_sections``); ``"tokens"`` usa só a janela de tokens.
+    """
+    encoding = get_encoding(model)
+    return CHUNKERS[strategy](encoding, text, encoding.encode(text), max_tokens, overlap_tokens)
+
+
+def chunk_texts(texts, max_tokens=3500, overlap_tokens=150, model=DEFAULT_EMBEDDING_MODEL,
+                num_threads=8, strategy="tokens"):
+    """Versão em lote de ``chunk_text``: tokeniza os textos em paralelo com ``encode_batch``."""
+    encoding = get_encoding(model)
+    chunker = CHUNKERS[strategy]
+    texts = list(texts)
+    batch = encoding.encode_batch(texts, num_threads=num_threads)
+    return [chunker(encoding, text, tokens, max_tokens, overlap_tokens)
+            for text, tokens in zip(texts, batch)]
+
+
+# Início de um dispositivo: artigo, parágrafo ("§ 1º", "Parágrafo único") ou
+# divisão (capítulo, título, seção), no começo da linha ou após fim de frase
+_SECTION_RE = re.compile(
+    r'(?:^[ \t]*|(?<=[.;:] ))(?:(?P<article>Art(?:igo)?\.?\s*\d+)|§+\s*\d+|Par[áa]grafo\s+[úu]nico'
+    r'|(?P<division>(?:CAP[ÍI]TULO|T[ÍI]TULO|SE[ÇC][ÃA]O|LIVRO)\s+[IVXLC\d]+))',
+    re.MULTILINE | re.IGNORECASE,
+)
+
+
+def _section_blocks(text):
+    """Offsets (em caracteres) dos blocos do texto: cada artigo com seus
+    parágrafos; o preâmbulo e as divisões abrem blocos próprios.
+
+    Retorna uma lista de blocos, cada um uma lista de (início, fim) dos
+    dispositivos que o compõem.
+    """
+    blocks = [[]]
+    start = 0
+    for match in _SECTION_RE.finditer(text):
+        if match.start() == 0:
+            if match.group('article') or match.group('division'):
+                continue
+        if match.start() > start:
+            blocks[-1].append((start, match.start()))
+        start = match.start()
+        if (match.group('article') or match.group('division')) and blocks[-1]:
+            blocks.append([])
+    blocks[-1].append((start, len(text)))
+    return [block for block in blocks if block]
+
+
+def _chunk_sections(encoding, text, tokens, max_tokens, overlap_tokens):
+    """Chunks com artigos e parágrafos inteiros, até ``max_tokens`` cada.
+
+    Uma passada pelas expressões pré-compiladas acha os dispositivos; os
+    artigos (com seus parágrafos) são empacotados em sequência enquanto
+    couberem, sem sobreposição entre chunks. Um artigo maior que o limite é
+    dividido nos seus parágrafos, e só um dispositivo maior que o limite cai
+    na janela de tokens (``_chunk_tokens``). Os tokens de cada trecho são
+    contados pelos offsets do encode único do texto.
+    """
+    data = text.encode('utf-8')
+    if len(data) == len(text):
+        byte_offset = int
+    else:
+        prefix = list(itertools.accumulate((len(c.encode('utf-8')) for c in text), initial=0))
+        byte_offset = prefix.__getitem__
+    offsets = list(itertools.accumulate(map(len, encoding.decode_tokens_bytes(tokens)), initial=0))
+
+    def count(start, stop):
+        return (bisect.bisect_left(offsets, byte_offset(stop))
+                - bisect.bisect_left(offsets, byte_offset(start)))
+
+    chunks = []
+    pending = [0, 0, 0]  # início, fim e tokens do chunk em montagem
+
+    def emit(start, stop, size):
+        piece = text[start:stop].strip()
+        if piece:
+            chunks.append({"text": piece, "number": len(chunks), "tokens": size})
+
+    def flush():
+        if pending[2]:
+            emit(*pending)
+        pending[:] = [0, 0, 0]
+
+    def add(start, stop, size):
+        if pending[2] and pending[2] + size > max_tokens:
+            flush()
+        if not pending[2]:
+            pending[0] = start
+        pending[1] = stop
+        pending[2] += size
+
+    for block in _section_blocks(text):
+        size = count(block[0][0], block[-1][1])
+        if size <= max_tokens:
+            add(block[0][0], block[-1][1], size)
+            continue
+        for start, stop in block:
+            size = count(start, stop)
+            if size <= max_tokens:
+                add(start, stop, size)
+                continue
+            flush()
+            section = text[start:stop]
+            for chunk in _chunk_tokens(encoding, section, encoding.encode(section),
+                                       max_tokens, overlap_tokens):
+                chunks.append({**chunk, "number": len(chunks)})
+    flush()
+    return chunks
+
+
+CHUNKERS = {"tokens": _chunk_tokens, "structure": _chunk_sections}
+
+
+def load_items(*paths, columns=None, where=None):
+    """Gera os itens da saída do Scrapy sob demanda, um por vez.
+
+    Aceita arrays JSON (lidos incrementalmente), JSONL, variantes .gz/.zst,
+    pastas com um JSON por item (``JsonWriterPipeline``), arquivos Parquet
+    (``ParquetWriterPipeline``) e padrões glob como
+    ``output/*_proposicoes.jsonl.gz``, em qualquer combinação, além do índice
+    local ``.sqlite`` (``LocalIndexPipeline``) e de manifestos de shards
+    (``*.manifest.json``, lidos shard a shard). Dos arquivos Parquet só as
+    ``columns`` pedidas são lidas; neles e no índice local o ``where``
+    (``ItemFilter``) é aplicado na leitura, e nas demais entradas ele filtra
+    item a item.
+    """
+    for pattern in paths:
+        matches = sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern]
+        if not matches:
+            raise FileNotFoundError(f"Nenhum arquivo corresponde a {pattern}")
+        for path in matches:
+            if is_parquet(path):
+                yield from read_parquet_items(path, columns, where)
+                continue
+            if is_local_index(path):
+                index = LocalIndex(path)
+                try:
+                    yield from index.iter_items(where)
+                finally:
+                    index.close()
+                continue
+            if is_manifest(path):
+                items = load_items(*ShardManifest(path).shard_paths())
+            elif os.path.isdir(path):
+                items = load_items(*sorted(glob.glob(os.path.join(path, '*.json'))))
+            elif is_jsonl(path):
+                items = iter_jsonl(path)
+            else:
+                items = iter_json_array_or_object(path)
+            yield from (filter(where.matches, items) if where else items)
+
+
+def iter_jsonl(path):
+    with open_compressed(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_json_array_or_object(path):
+    """Lê um array JSON incrementalmente; um objeto solto vira um único item."""
+    with open_compressed(path, 'rt') as f:
+        head = f.read(64).lstrip('\ufeff \t\r\n')
+    if head.startswith('{'):
+        with open_compressed(path, 'rt') as f:
+            yield json.load(f)
+        return
+    yield from iter_json_array(path)
+
+
+# Propriedades como (nome, ``wc.DataType``); viram ``wc.Property`` só no
+# ``setup_schema``, para não importar o cliente do Weaviate sem necessidade
+DOCUMENT_PROPERTIES = [
+    ('title', 'TEXT'),
+    ('house', 'TEXT'),
+    ('type', 'TEXT'),
+    ('number', 'INT'),
+    ('presentation_date', 'TEXT'),
+    ('year', 'INT'),
+    ('author', 'TEXT_ARRAY'),
+    ('subject', 'TEXT'),
+    ('full_text', 'TEXT'),
+    ('length', 'INT'),
+    ('url', 'TEXT'),
+    ('scraped_at', 'TEXT'),
+]
+
+# Só no objeto-documento do modo normalizado: no tradicional a duplicata
+# ligada (--dedup link) não gera chunks, então a coleção não precisa do campo.
+# Coleções normalizadas criadas antes dele precisam de --reset
+DOCUMENT_LINK_PROPERTIES = [
+    ('duplicate_of', 'TEXT'),
+]
+
+CHUNK_PROPERTIES = [
+    ('chunk_text', 'TEXT'),
+    ('chunk_number', 'INT'),
+]
+
+# Colunas lidas dos arquivos Parquet (``meta`` e outras ficam de fora)
+IMPORT_COLUMNS = ['uuid'] + [name for name, _ in DOCUMENT_PROPERTIES + DOCUMENT_LINK_PROPERTIES]
+
+# Campos copiados para os chunks no modo normalizado: os filtráveis e os que
+# entram no vetor (title, subject)
+LEAN_CHUNK_FIELDS = ('title', 'house', 'type', 'number', 'presentation_date', 'year', 'subject')
+
+
+def chunk_class_name(class_name):
+    """Nome da coleção de chunks no modo normalizado (ex.: Bill -> BillChunk)."""
+    return f"{class_name}Chunk"
+
+
+def setup_schema(client, class_name, vector_config, reset=False, normalized=False):
+    """Cria ou reseta a classe no Weaviate com propriedades incluindo chunks.
 
+    No modo ``normalized``, ``class_name`` guarda um objeto por proposição
+    (sem vetor) e ``{class_name}Chunk`` guarda só os chunks, com os campos
+    filtráveis e uma referência ``bill`` ao documento.
+    """
+    import weaviate.classes.config as wc
+    from weaviate.classes.config import Configure
 
-def setup_schema(client, class_name, vector_config, reset=False):
-    """Cria ou reseta a classe no Weaviate com propriedades incluindo chunks."""
+    def properties(specs):
+        return [wc.Property(name=name, data_type=getattr(wc.DataType, kind)) for name, kind in specs]
+
+    names = [chunk_class_name(class_name), class_name] if normalized else [class_name]
     if reset:
-        try:
-            client.collections.delete(class_name)
-            print(f"Coleção '{class_name}' resetada.")
-        except Exception:
-            pass
-    if not client.collections.exists(class_name):
-        props = [
-            wc.Property(name='title', data_type=wc.DataType.TEXT),
-            wc.Property(name='house', data_type=wc.DataType.TEXT),
-            wc.Property(name='type', data_type=wc.DataType.TEXT),
-            wc.Property(name='number', data_type=wc.DataType.INT),
-            wc.Property(name='presentation_date', data_type=wc.DataType.TEXT),
-            wc.Property(name='year', data_type=wc.DataType.INT),
-            wc.Property(name='author', data_type=wc.DataType.TEXT_ARRAY),
-            wc.Property(name='subject', data_type=wc.DataType.TEXT),
-            wc.Property(name='full_text', data_type=wc.DataType.TEXT),
-            wc.Property(name='length', data_type=wc.DataType.INT),
-            wc.Property(name='url', data_type=wc.DataType.TEXT),
-            wc.Property(name='scraped_at', data_type=wc.DataType.TEXT),
-            # Propriedades de chunk
-            wc.Property(name='chunk_text', data_type=wc.DataType.TEXT),
-            wc.Property(name='chunk_number', data_type=wc.DataType.INT),
-        ]
-        client.collections.create(
-            name=class_name,
-            properties=props,
-            vectorizer_config=vector_config
-        )
-        print(f"Coleção '{class_name}' criada com chunks.")
+        for name in names:
+            try:
+                client.collections.delete(name)
+                print(f"Coleção '{name}' resetada.")
+            except Exception:
+                pass
+    if not normalized:
+        _create_collection(client, class_name, properties(DOCUMENT_PROPERTIES + CHUNK_PROPERTIES),
+                           vectorizer_config=vector_config)
+        return
+    _create_collection(client, class_name, properties(DOCUMENT_PROPERTIES + DOCUMENT_LINK_PROPERTIES),
+                       vectorizer_config=Configure.Vectorizer.none())
+    lean = [spec for spec in DOCUMENT_PROPERTIES if spec[0] in LEAN_CHUNK_FIELDS]
+    _create_collection(client, chunk_class_name(class_name), properties(lean + CHUNK_PROPERTIES),
+                       vectorizer_config=vector_config,
+                       references=[wc.ReferenceProperty(name='bill', target_collection=class_name)])
+
+
+def _create_collection(client, name, properties, **config):
+    if not client.collections.exists(name):
+        client.collections.create(name=name, properties=properties, **config)
+        print(f"Coleção '{name}' criada.")
     else:
-        print(f"Coleção '{class_name}' já existe. Pulando criação.")
+        print(f"Coleção '{name}' já existe. Pulando criação.")
+
+
+# Campos que determinam os objetos enviados (scraped_at muda a cada coleta)
+MANIFEST_FIELDS = ('title', 'house', 'type', 'number', 'presentation_date', 'year',
+                   'author', 'subject', 'full_text', 'url')
+
+
+def item_content_hash(item, strategy="tokens"):
+    """Hash dos campos do item que afetam os objetos/vetores no Weaviate."""
+    values = [item.get(f) for f in MANIFEST_FIELDS]
+    if item.get('duplicate_of'):
+        # Só entra quando presente, para não invalidar manifestos antigos
+        values.append(item['duplicate_of'])
+    if strategy != "tokens":
+        # Outro chunking gera outros chunks: o item precisa ser reenviado
+        values.append({'chunking': strategy})
+    payload = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ImportManifest:
+    """Registro local (SQLite) do que já foi enviado ao Weaviate.
+
+    Guarda, por ``uuid`` de item, o hash dos campos relevantes e os UUIDs dos
+    chunks enviados. Permite pular itens inalterados e apagar chunks que
+    deixaram de existir quando o texto muda. Os importadores gravam os itens
+    à medida que o Weaviate confirma seus lotes, então uma execução
+    interrompida não perde o que já foi enviado.
+    """
+
+    def __init__(self, path, strategy="tokens"):
+        self.path = path
+        self.strategy = strategy
+        # O modo async lê o manifesto na thread do chunking; os acessos nunca
+        # são simultâneos. Com --shard-workers, os processos esperam o lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS items (uuid TEXT PRIMARY KEY, hash TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS chunks (item_uuid TEXT, chunk_uuid TEXT)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS chunks_item ON chunks (item_uuid)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS chunks_chunk ON chunks (chunk_uuid)')
+        self.skipped = 0
+
+    def changed_items(self, items):
+        """Filtra os itens novos ou alterados desde a última importação."""
+        for item in items:
+            uuid = item.get('uuid')
+            if uuid is not None:
+                row = self.conn.execute('SELECT hash FROM items WHERE uuid = ?', (uuid,)).fetchone()
+                if row is not None and row[0] == item_content_hash(item, self.strategy):
+                    self.skipped += 1
+                    continue
+            yield item
+
+    def record(self, updates, failed_uuids=()):
+        """Grava os itens enviados e retorna os UUIDs de chunks órfãos.
+
+        ``updates`` mapeia uuid do item -> (hash, [uuids dos chunks], uuid do
+        documento ou None). Itens com algum objeto em ``failed_uuids`` não são
+        gravados, para que a próxima execução tente de novo.
+        """
+        failed = set(failed_uuids)
+        stale = set()
+        with self.conn:
+            for item_uuid, (content_hash, chunk_uuids, document_uuid) in updates.items():
+                if document_uuid in failed or failed.intersection(chunk_uuids):
+                    continue
+                old = {row[0] for row in self.conn.execute(
+                    'SELECT chunk_uuid FROM chunks WHERE item_uuid = ?', (item_uuid,))}
+                stale |= old - set(chunk_uuids)
+                self.conn.execute('DELETE FROM chunks WHERE item_uuid = ?', (item_uuid,))
+                self.conn.executemany(
+                    'INSERT INTO chunks (item_uuid, chunk_uuid) VALUES (?, ?)',
+                    ((item_uuid, chunk_uuid) for chunk_uuid in chunk_uuids))
+                self.conn.execute('INSERT OR REPLACE INTO items (uuid, hash) VALUES (?, ?)',
+                                  (item_uuid, content_hash))
+        return self.orphans(stale)
+
+    def orphans(self, chunk_uuids):
+        """Filtra os chunks que não pertencem a nenhum item registrado."""
+        # Chunks idênticos podem pertencer a outros itens: só apaga os sem dono
+        return [uuid for uuid in chunk_uuids if self.conn.execute(
+            'SELECT 1 FROM chunks WHERE chunk_uuid = ? LIMIT 1', (uuid,)).fetchone() is None]
+
+    def clear(self):
+        """Esquece tudo o que foi enviado (a coleção foi recriada com ``--reset``)."""
+        with self.conn:
+            self.conn.execute('DELETE FROM items')
+            self.conn.execute('DELETE FROM chunks')
+
+    def close(self):
+        self.conn.close()
+
+
+class DuplicateFilter:
+    """Etapa de deduplicação antes do chunking (ver ``assessorai_crawler.dedup``).
+
+    Com ``action="drop"`` as duplicatas não são importadas; com ``"link"``
+    seguem com ``duplicate_of`` apontando para o item canônico, sem chunks
+    próprios. Conta os chunks e tokens de chunk que deixaram de ser gerados
+    e vetorizados.
+    """
+
+    def __init__(self, index, action='drop', strategy="tokens"):
+        if action not in ('drop', 'link'):
+            raise ValueError(f"Ação de deduplicação inválida: {action}")
+        self.index = index
+        self.action = action
+        self.strategy = strategy
+        self.counts = collections.Counter()
+
+    def filter(self, items):
+        for item in items:
+            found = self.index.check(item.get('uuid'), item.get('full_text', ''))
+            if found is None:
+                yield item
+                continue
+            chunks = chunk_text(item.get('full_text', ''), strategy=self.strategy)
+            self.counts[found.kind] += 1
+            self.counts['chunks'] += len(chunks)
+            self.counts['tokens'] += sum(chunk['tokens'] for chunk in chunks)
+            if self.action == 'link':
+                yield {**item, 'duplicate_of': found.canonical}
+
+    def summary(self):
+        verb = "descartadas" if self.action == 'drop' else "ligadas ao item canônico"
+        return (f"Duplicatas: {self.counts['exact']} exatas e {self.counts['near']} aproximadas "
+                f"{verb}; {self.counts['chunks']} chunks e {self.counts['tokens']} tokens evitados.")
+
+    def close(self):
+        self.index.close()
+
+
+class ImportCheckpoint:
+    """Ponto de retomada durável de uma importação (``--checkpoint``/``--resume``).
+
+    Guarda as entradas da execução, o offset até o qual todos os itens foram
+    confirmados pelo Weaviate e os objetos que falharam mesmo após as
+    tentativas (uuid -> offset do item), para reprocessá-los ao retomar.
+    """
+
+    def __init__(self, path, inputs):
+        self.path = path
+        self.inputs = list(inputs)
+        self.offset = 0
+        self.failed = {}
+
+    @classmethod
+    def load(cls, path, inputs):
+        """Carrega o checkpoint de ``path``; exige as mesmas entradas da execução salva."""
+        checkpoint = cls(path, inputs)
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['inputs'] != checkpoint.inputs:
+            raise ValueError(f"Checkpoint {path} é de outra entrada: {state['inputs']}")
+        checkpoint.offset = state['offset']
+        checkpoint.failed = state['failed']
+        return checkpoint
+
+    def save(self):
+        """Grava o estado atomicamente (arquivo temporário + fsync + rename)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'inputs': self.inputs, 'offset': self.offset, 'failed': self.failed}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def select(self, items):
+        """Marca cada item com seu offset e pula os já confirmados."""
+        retry = set(self.failed.values())
+        for offset, item in enumerate(items):
+            if offset >= self.offset or offset in retry:
+                item['_offset'] = offset
+                yield item
+
+    def acknowledge(self, offsets, failed, next_offset):
+        """Registra itens concluídos e as falhas definitivas (uuid -> offset)."""
+        offsets = set(offsets)
+        self.failed = {uuid: off for uuid, off in self.failed.items() if off not in offsets}
+        self.failed.update(failed)
+        self.offset = max(self.offset, next_offset)
+
+
+def chunk_properties(item, chunk, normalized=False):
+    """Propriedades do objeto de um chunk no Weaviate."""
+    if normalized:
+        props = {field: item.get(field) for field in LEAN_CHUNK_FIELDS}
+        props['chunk_text'] = chunk['text']
+        props['chunk_number'] = chunk['number']
+        return props
+    return {
+        'title': item.get('title'),
+        'house': item.get('house'),
+        'type': item.get('type'),
+        'number': item.get('number'),
+        'presentation_date': item.get('presentation_date'),
+        'year': item.get('year'),
+        'author': item.get('author'),
+        'subject': item.get('subject'),
+        'full_text': item.get('full_text', ''),
+        'length': item.get('length'),
+        'url': item.get('url'),
+        'scraped_at': item.get('scraped_at'),
+        'chunk_text': chunk['text'],
+        'chunk_number': chunk['number'],
+    }
+
+
+def document_properties(item):
+    """Propriedades do objeto-documento (modo normalizado)."""
+    return {name: item.get(name) for name, _ in DOCUMENT_PROPERTIES + DOCUMENT_LINK_PROPERTIES}
+
+
+def generate_uuid5(identifier, namespace=""):
+    """Mesmo UUID de ``weaviate.util.generate_uuid5``, sem importar o cliente."""
+    return str(uuid_lib.uuid5(uuid_lib.NAMESPACE_DNS, str(namespace) + str(identifier)))
+
+
+def document_uuid(item):
+    """UUID estável do objeto-documento de um item."""
+    return str(generate_uuid5(item.get('uuid') or f"{item.get('house')}_{item.get('title')}"))
+
+
+# Resultado do chunking de um item: ``offset`` é a posição do item na entrada
+# (quando há checkpoint), ``document`` é (uuid, props) no modo normalizado e
+# None no tradicional, ``objects`` é a lista de (uuid, props) dos chunks e
+# ``tokens`` a soma dos tokens dos chunks e ``vectors`` os vetores dos chunks,
+# quando calculados no cliente
+PreparedItem = collections.namedtuple('PreparedItem', 'uuid offset document objects tokens vectors',
+                                      defaults=(0, None))
+
+
+def build_chunk_objects(items, normalized=False, strategy="tokens"):
+    """Chunking de um lote de itens: retorna um ``PreparedItem`` por item.
+
+    ``strategy`` escolhe o chunker (ver ``CHUNKERS``). Duplicatas ligadas a
+    outro item (``duplicate_of``) não geram chunks; no modo normalizado o
+    documento é enviado com a ligação.
+    """
+    texts = ['' if item.get('duplicate_of') else item.get('full_text', '') for item in items]
+    results = []
+    for item, chunks in zip(items, chunk_texts(texts, num_threads=1, strategy=strategy)):
+        document = None
+        namespace = ''
+        if normalized:
+            document = (document_uuid(item), document_properties(item))
+            # Chunks idênticos de proposições diferentes viram objetos distintos,
+            # cada um com sua referência
+            namespace = document[0]
+        objects = [(str(generate_uuid5(chunk['text'], namespace)),
+                    chunk_properties(item, chunk, normalized))
+                   for chunk in chunks]
+        results.append(PreparedItem(item.get('uuid'), item.get('_offset'), document, objects,
+                                    sum(chunk['tokens'] for chunk in chunks)))
+    return results
+
+
+def iter_chunk_objects(items, workers=1, ordered=True, task_size=8, max_pending=None,
+                       normalized=False, strategy="tokens"):
+    """Gera o resultado de ``build_chunk_objects`` por item, com chunking em paralelo.
 
+    Com ``workers > 1`` os itens são enviados em lotes de ``task_size`` a um
+    pool de processos; no máximo ``max_pending`` lotes ficam em voo, o que
+    limita a memória. ``ordered=False`` devolve os lotes conforme terminam.
+    """
+    batches = _batched(items, task_size)
+    build = functools.partial(build_chunk_objects, normalized=normalized, strategy=strategy)
+    if workers <= 1:
+        for batch in batches:
+            yield from build(batch)
+        return
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.submit(build, batch))
+            while len(pending) >= max_pending:
+                yield from _next_done(pending, ordered)
+        while pending:
+            yield from _next_done(pending, ordered)
 
-def import_items(client, class_name, items, batch_size=10, dry_run=False):
-    """Importa itens e seus chunks no Weaviate."""
-    collection = client.collections.get(class_name)
+
+# Vetor nomeado dos chunks e propriedades que entram nele
+VECTOR_NAME = "chunk_vector"
+VECTOR_SOURCE_PROPERTIES = ["title", "subject", "chunk_text"]
+
+
+def embedding_text(props):
+    """Texto de um chunk enviado ao embedder (as propriedades do vetor, em ordem)."""
+    return '\n'.join(str(props.get(name) or '') for name in VECTOR_SOURCE_PROPERTIES)
+
+
+def embed_prepared(prepared, embedder, batch_size=256):
+    """Calcula no cliente os vetores dos chunks, em lotes de ~``batch_size`` textos.
+
+    Anexa a cada ``PreparedItem`` os vetores no formato de vetor nomeado
+    (``{VECTOR_NAME: vetor}``), para que o Weaviate não vetorize de novo.
+    """
+    pending = []
+    size = 0
+    for item in itertools.chain(prepared, [None]):
+        if item is not None:
+            pending.append(item)
+            size += len(item.objects)
+            if size < batch_size:
+                continue
+        texts = [embedding_text(props) for pending_item in pending for _, props in pending_item.objects]
+        vectors = iter(embedder.embed(texts)) if texts else iter(())
+        for pending_item in pending:
+            yield pending_item._replace(
+                vectors=[{VECTOR_NAME: next(vectors)} for _ in pending_item.objects])
+        pending = []
+        size = 0
+    if isinstance(embedder, CachedEmbedder):
+        print(f"Embeddings: {embedder.misses} calculados, {embedder.hits} reaproveitados do cache.")
+
+
+def _batched(items, size):
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _next_done(pending, ordered):
+    """Retira um lote concluído da fila (o mais antigo, se ``ordered``)."""
+    if ordered:
+        return pending.popleft().result()
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = done.pop()
+    pending.remove(future)
+    return future.result()
+
+
+def payload_size(props):
+    """Tamanho aproximado (JSON UTF-8) das propriedades enviadas de um objeto."""
+    return len(json.dumps(props, ensure_ascii=False).encode('utf-8'))
+
+
+def import_items(client, class_name, items, batch_size=10, dry_run=False, workers=1, ordered=True,
+                 manifest=None, normalized=False, checkpoint=None, checkpoint_every=500,
+                 retries=3, retry_backoff=1.0, embedder=None, dedup=None, chunking="tokens"):
+    """Importa itens e seus chunks no Weaviate.
+
+    Com um ``ImportManifest``, só itens novos ou alterados são enviados e os
+    chunks que deixaram de existir são apagados da coleção; os itens são
+    gravados no manifesto ao fim de cada trecho de ``checkpoint_every``
+    itens. Com
+    ``normalized``, cada item vira um documento em ``class_name`` e chunks
+    enxutos em ``{class_name}Chunk`` (ver ``setup_schema``). Objetos que
+    falham são reenviados até ``retries`` vezes, com espera exponencial. Com
+    um ``ImportCheckpoint``, o envio é feito em trechos de
+    ``checkpoint_every`` itens e o checkpoint é gravado ao fim de cada um.
+    Com um ``embedder`` (ver ``embeddings.py``), os vetores são calculados no
+    cliente e enviados junto com os chunks. Com um ``DuplicateFilter``, as
+    duplicatas são descartadas ou ligadas antes do chunking. ``chunking``
+    escolhe a estratégia de chunking (``CHUNKERS``).
+    """
+    collection = client.collections.get(chunk_class_name(class_name) if normalized else class_name)
+    documents = client.collections.get(class_name) if normalized else None
     total = 0
-    with collection.batch.fixed_size(batch_size=batch_size) as batch:
-        for item in tqdm(items):
-            full = item.get('full_text', '')
-            chunks = chunk_text(full)
-            for chunk in chunks:
-                props = {
-                    'title': item.get('title'),
-                    'house': item.get('house'),
-                    'type': item.get('type'),
-                    'number': item.get('number'),
-                    'presentation_date': item.get('presentation_date'),
-                    'year': item.get('year'),
-                    'author': item.get('author'),
-                    'subject': item.get('subject'),
-                    'full_text': full,
-                    'length': item.get('length'),
-                    'url': item.get('url'),
-                    'scraped_at': item.get('scraped_at'),
-                    'chunk_text': chunk['text'],
-                    'chunk_number': chunk['number'],
-                }
-                uuid = generate_uuid5(chunk['text'])
-                if dry_run:
-                    print(f"DRY RUN: chunk {chunk['number']} -> UUID: {uuid}")
+    tokens = 0
+    sent_bytes = 0
+    updates = {}
+    recorded = {'items': 0, 'stale': 0}
+    failed_objects = []
+    if checkpoint is not None:
+        items = checkpoint.select(items)
+        ordered = True
+    if dedup is not None:
+        items = dedup.filter(items)
+    if manifest is not None:
+        items = manifest.changed_items(items)
+        hashes = {}
+        items = _remember_hashes(items, hashes, manifest.strategy)
+    prepared = iter_chunk_objects(items, workers=workers, ordered=ordered, normalized=normalized,
+                                  strategy=chunking)
+    if embedder is not None:
+        prepared = embed_prepared(prepared, embedder)
+    from tqdm import tqdm
+    prepared = tqdm(prepared)
+    # Checkpoint e manifesto avançam a cada trecho confirmado
+    segments = (_batched(prepared, checkpoint_every)
+                if checkpoint is not None or manifest is not None else [prepared])
+    stopped = False
+    for segment in segments:
+        document_batch_context = (documents.batch.fixed_size(batch_size=batch_size) if normalized
+                                  else contextlib.nullcontext())
+        offsets = {}
+        with collection.batch.fixed_size(batch_size=batch_size) as batch, \
+                document_batch_context as document_batch:
+            for item in segment:
+                references = None
+                if item.document is not None:
+                    doc_uuid, doc_props = item.document
+                    references = {'bill': doc_uuid}
+                    offsets[doc_uuid] = item.offset
+                    sent_bytes += payload_size(doc_props)
+                    if dry_run:
+                        print(f"DRY RUN: documento -> UUID: {doc_uuid}")
+                    else:
+                        document_batch.add_object(properties=doc_props, uuid=doc_uuid)
+                tokens += item.tokens
+                vectors = item.vectors or itertools.repeat(None)
+                for (uuid, props), vector in zip(item.objects, vectors):
+                    offsets[uuid] = item.offset
+                    sent_bytes += payload_size(props)
+                    if dry_run:
+                        print(f"DRY RUN: chunk {props['chunk_number']} -> UUID: {uuid}")
+                    else:
+                        batch.add_object(properties=props, uuid=uuid, references=references,
+                                         vector=vector)
+                    total += 1
+                if manifest is not None and item.uuid is not None:
+                    updates[item.uuid] = (hashes.pop(item.uuid, None),
+                                          [uuid for uuid, _ in item.objects],
+                                          item.document and item.document[0])
+                if batch.number_errors > 10:
+                    print("Batch import stopped due to excessive errors.")
+                    stopped = True
+                    break
+
+        failed = list(collection.batch.failed_objects)
+        if documents is not None:
+            failed += documents.batch.failed_objects
+        failed = retry_failed(client, failed, batch_size, retries, retry_backoff)
+        failed_objects += failed
+        if checkpoint is not None and not dry_run and not stopped:
+            done = [item.offset for item in segment]
+            checkpoint.acknowledge(done, {str(obj.object_.uuid): offsets.get(str(obj.object_.uuid))
+                                          for obj in failed},
+                                   max(done, default=-1) + 1)
+            checkpoint.save()
+        if manifest is not None and not dry_run:
+            stale = manifest.record(updates, {str(obj.object_.uuid) for obj in failed})
+            for uuid in stale:
+                collection.data.delete_by_id(uuid)
+            recorded['items'] += len(updates)
+            recorded['stale'] += len(stale)
+        updates = {}
+        if stopped:
+            break
+
+    if failed_objects:
+        print(f"Number of failed imports: {len(failed_objects)}")
+        print(f"First failed object: {failed_objects[0:5]}")
+
+    if manifest is not None and not dry_run:
+        print(f"Manifesto: {manifest.skipped} itens inalterados, "
+              f"{recorded['items']} enviados, {recorded['stale']} chunks antigos apagados.")
+
+    if dedup is not None:
+        print(dedup.summary())
+
+    mode = "normalizado" if normalized else "tradicional"
+    print(f"Modo {mode}: {sent_bytes / 1e6:.1f} MB de propriedades enviados.")
+    print(f"Chunking ({chunking}): {total} chunks, {tokens} tokens.")
+    print(f"Importação finalizada: {total} chunks.")
+
+
+def retry_failed(client, failed_objects, batch_size, retries, backoff):
+    """Reenvia objetos que falharam, com espera exponencial; retorna os que restaram."""
+    for attempt in range(retries):
+        if not failed_objects:
+            break
+        time.sleep(backoff * 2 ** attempt)
+        print(f"Reenviando {len(failed_objects)} objetos (tentativa {attempt + 1}/{retries})...")
+        by_collection = collections.defaultdict(list)
+        for obj in failed_objects:
+            by_collection[obj.object_.collection].append(obj.object_)
+        failed_objects = []
+        for name, objects in by_collection.items():
+            target = client.collections.get(name)
+            with target.batch.fixed_size(batch_size=batch_size) as batch:
+                for obj in objects:
+                    batch.add_object(properties=obj.properties, uuid=obj.uuid,
+                                     references=obj.references, vector=obj.vector)
+            failed_objects += target.batch.failed_objects
+    return failed_objects
+
+
+class AdaptiveBatchSize:
+    """Tamanho de lote que cresce ou encolhe conforme a latência e os erros observados."""
+
+    def __init__(self, initial=10, minimum=1, maximum=500, target_latency=1.0, max_error_rate=0.05):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+
+    def observe(self, size, latency, errors):
+        if errors > size * self.max_error_rate or latency > self.target_latency:
+            self.size = max(self.minimum, self.size // 2)
+        elif latency < self.target_latency / 2:
+            self.size = min(self.maximum, self.size + max(1, self.size // 2))
+
+
+async def import_items_async(client, class_name, items, batch_size=10, concurrency=4, dry_run=False,
+                             workers=1, ordered=True, manifest=None, normalized=False,
+                             target_latency=1.0, max_batch_size=500, max_errors=10,
+                             checkpoint=None, checkpoint_interval=10.0, retries=3, retry_backoff=1.0,
+                             embedder=None, dedup=None, chunking="tokens"):
+    """Versão assíncrona de ``import_items`` para o cliente async do Weaviate.
+
+    Uma corrotina produtora monta lotes a partir de ``iter_chunk_objects`` (o
+    chunking roda fora do event loop) e ``concurrency`` tarefas enviam lotes
+    com ``insert_many`` em paralelo. O tamanho do lote se adapta à latência e
+    à taxa de erro de cada envio, e a vazão (objetos/s) aparece ao vivo.
+    Objetos rejeitados são reenviados pela própria tarefa, com espera
+    exponencial; o checkpoint avança até o maior offset contíguo confirmado
+    e é gravado a cada ``checkpoint_interval`` segundos. Com manifesto, cada
+    item é gravado assim que todos os seus objetos são confirmados.
+    """
+    collection = client.collections.get(chunk_class_name(class_name) if normalized else class_name)
+    documents = client.collections.get(class_name) if normalized else None
+    sizer = AdaptiveBatchSize(batch_size, maximum=max_batch_size, target_latency=target_latency)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    from tqdm import tqdm
+    from weaviate.classes.data import DataObject
+    progress = tqdm(unit='obj', desc='Importando')
+    failed = {}
+    updates = {}
+    sent = {'objects': 0, 'bytes': 0}
+    # Manifesto: objetos ainda sem confirmação por item, itens com objetos
+    # rejeitados, itens confirmados à espera de gravação e chunks antigos
+    track = manifest is not None and not dry_run
+    owed = {}
+    rejected = set()
+    confirmed = {}
+    stale = set()
+    recorded = {'items': 0}
+    chunked = {'chunks': 0, 'tokens': 0}
+    # Offsets produzidos em ordem, objetos pendentes por offset, concluídos
+    # fora de ordem e concluídos desde a última gravação do checkpoint
+    produced = collections.deque()
+    remaining = {}
+    finished = set()
+    completed = []
+    watermark = {'next': checkpoint.offset if checkpoint else 0, 'saved_at': time.monotonic()}
+    if checkpoint is not None:
+        items = checkpoint.select(items)
+        ordered = True
+    if dedup is not None:
+        items = dedup.filter(items)
+    if manifest is not None:
+        items = manifest.changed_items(items)
+        hashes = {}
+        items = _remember_hashes(items, hashes, manifest.strategy)
+
+    def settle(offsets):
+        """Desconta objetos concluídos e avança/grava o checkpoint."""
+        for offset in offsets:
+            remaining[offset] -= 1
+            if remaining[offset] == 0:
+                del remaining[offset]
+                finished.add(offset)
+                completed.append(offset)
+        while produced and produced[0] in finished:
+            offset = produced.popleft()
+            finished.discard(offset)
+            watermark['next'] = offset + 1
+        if checkpoint is not None and not dry_run and \
+                time.monotonic() - watermark['saved_at'] >= checkpoint_interval:
+            save_checkpoint()
+
+    def save_checkpoint():
+        checkpoint.acknowledge(completed, failed, watermark['next'])
+        completed.clear()
+        checkpoint.save()
+        watermark['saved_at'] = time.monotonic()
+
+    def settle_items(objs, errors):
+        """Desconta objetos confirmados por item e separa os itens concluídos."""
+        rejected.update(owner for _, _, owner in errors)
+        for _, _, owner in objs:
+            if owner is None:
+                continue
+            owed[owner] -= 1
+            if not owed[owner]:
+                del owed[owner]
+                recorded['items'] += 1
+                update = updates.pop(owner)
+                if owner in rejected:
+                    rejected.discard(owner)
                 else:
-                    batch.add_object(properties=props, uuid=uuid)
-                total += 1
-                
-            if batch.number_errors > 10:
+                    confirmed[owner] = update
+
+    def record_confirmed():
+        """Grava no manifesto os itens concluídos sem falhas.
+
+        Só é chamada pela produtora, fora do ``to_thread``: o manifesto também
+        é lido na thread do chunking e os acessos não podem se sobrepor.
+        """
+        if confirmed:
+            stale.update(manifest.record(confirmed))
+            confirmed.clear()
+
+    async def produce():
+        prepared = iter_chunk_objects(items, workers=workers, ordered=ordered,
+                                      normalized=normalized, strategy=chunking)
+        if embedder is not None:
+            # Roda junto com o chunking, na thread de ``to_thread``
+            prepared = embed_prepared(prepared, embedder)
+        pending = {collection: [], documents: []}
+        while True:
+            if len(failed) > max_errors:
                 print("Batch import stopped due to excessive errors.")
                 break
-                    
+            if track:
+                record_confirmed()
+            item = await asyncio.to_thread(next, prepared, None)
+            if item is None:
+                break
+            chunked['chunks'] += len(item.objects)
+            chunked['tokens'] += item.tokens
+            references = None
+            owner = item.uuid if track else None
+            if owner is not None:
+                updates[owner] = (hashes.pop(owner, None), [uuid for uuid, _ in item.objects],
+                                  item.document and item.document[0])
+                owed[owner] = owed.get(owner, 0) + len(item.objects) + (item.document is not None)
+                if not owed[owner]:
+                    del owed[owner]
+                    recorded['items'] += 1
+                    confirmed[owner] = updates.pop(owner)
+            if item.offset is not None:
+                produced.append(item.offset)
+                remaining[item.offset] = len(item.objects) + (item.document is not None)
+                if not remaining[item.offset]:
+                    remaining[item.offset] = 1
+                    settle([item.offset])
+            if item.document is not None:
+                references = {'bill': item.document[0]}
+                pending[documents].append(
+                    (DataObject(properties=item.document[1], uuid=item.document[0]), item.offset,
+                     owner))
+            vectors = item.vectors or itertools.repeat(None)
+            pending[collection].extend(
+                (DataObject(properties=props, uuid=uuid, references=references, vector=vector),
+                 item.offset, owner)
+                for (uuid, props), vector in zip(item.objects, vectors))
+            for target, objs in pending.items():
+                while len(objs) >= sizer.size:
+                    await queue.put((target, objs[:sizer.size]))
+                    del objs[:sizer.size]
+        for target, objs in pending.items():
+            if objs:
+                await queue.put((target, objs))
+        for _ in range(concurrency):
+            await queue.put(None)
 
-        failed_objects = collection.batch.failed_objects
-        if failed_objects:
-            print(f"Number of failed imports: {len(failed_objects)}")
-            print(f"First failed object: {failed_objects[0:5]}")
+    async def send_once(target, objs):
+        """Envia um lote e retorna as entradas (objeto, offset, item) rejeitadas."""
+        start = time.perf_counter()
+        errors = []
+        if not dry_run:
+            try:
+                result = await target.data.insert_many([obj for obj, _, _ in objs])
+                errors = [objs[index] for index in result.errors]
+            except Exception as e:
+                print(f"Falha ao enviar lote de {len(objs)} objetos: {e}")
+                errors = list(objs)
+        sizer.observe(len(objs), time.perf_counter() - start, len(errors))
+        return errors
 
-    print(f"Importação finalizada: {total} chunks.")
+    async def send():
+        while (job := await queue.get()) is not None:
+            target, objs = job
+            sent['bytes'] += sum(payload_size(obj.properties) for obj, _, _ in objs)
+            errors = await send_once(target, objs)
+            for attempt in range(retries):
+                if not errors:
+                    break
+                await asyncio.sleep(retry_backoff * 2 ** attempt)
+                errors = await send_once(target, errors)
+            failed.update((str(obj.uuid), offset) for obj, offset, _ in errors)
+            sent['objects'] += len(objs) - len(errors)
+            progress.update(len(objs) - len(errors))
+            progress.set_postfix(lote=sizer.size, falhas=len(failed))
+            settle([offset for _, offset, _ in objs if offset is not None])
+            if track:
+                settle_items(objs, errors)
 
+    start = time.perf_counter()
+    await asyncio.gather(produce(), *(send() for _ in range(concurrency)))
+    progress.close()
+    elapsed = time.perf_counter() - start
+    if checkpoint is not None and not dry_run:
+        save_checkpoint()
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Importa JSON de proposições com chunking para o Weaviate"
+    if failed:
+        print(f"Number of failed imports: {len(failed)}")
+        print(f"First failed object: {sorted(failed)[0:5]}")
+
+    if track:
+        record_confirmed()
+        # Só no fim: um chunk órfão pode ter sido enviado por outro item ainda em voo
+        stale = manifest.orphans(stale)
+        for uuid in stale:
+            await collection.data.delete_by_id(uuid)
+        print(f"Manifesto: {manifest.skipped} itens inalterados, "
+              f"{recorded['items']} enviados, {len(stale)} chunks antigos apagados.")
+
+    if dedup is not None:
+        print(dedup.summary())
+
+    mode = "normalizado" if normalized else "tradicional"
+    print(f"Modo {mode}: {sent['bytes'] / 1e6:.1f} MB de propriedades enviados.")
+    print(f"Chunking ({chunking}): {chunked['chunks']} chunks, {chunked['tokens']} tokens.")
+    print(f"Importação finalizada: {sent['objects']} objetos em {elapsed:.1f}s "
+          f"({sent['objects'] / max(elapsed, 1e-9):.0f} objetos/s).")
+
+
+async def run_async_import(config, headers, auth, items, args, manifest=None, checkpoint=None,
+                           embedder=None, dedup=None):
+    """Conecta com o cliente async do Weaviate e roda ``import_items_async``."""
+    import weaviate
+    client = weaviate.use_async_with_weaviate_cloud(
+        cluster_url=config.get("weaviate_url"),
+        auth_credentials=auth,
+        headers=headers
     )
-    parser.add_argument("--input", required=True,
-                        help="Arquivo JSON (saída do Scrapy)")
-    parser.add_argument("--reset", action="store_true",
-                        help="Reseta a classe antes de criar")
-    parser.add_argument("--dry_run", action="store_true",
-                        help="Apenas imprime UUID sem inserir")
-    args = parser.parse_args()
-    
-    #load config from .env
-    config = {
+    await client.connect()
+    try:
+        await import_items_async(client, config.get("class_name"), items,
+                                 batch_size=args.batch_size, concurrency=args.concurrency,
+                                 dry_run=args.dry_run,
+                                 workers=args.workers, ordered=not args.unordered,
+                                 manifest=manifest, normalized=args.normalized,
+                                 checkpoint=checkpoint, retries=args.retries,
+                                 embedder=embedder, dedup=dedup, chunking=args.chunking)
+    finally:
+        await client.close()
+
+
+def _remember_hashes(items, hashes, strategy="tokens"):
+    """Anota o hash de cada item que segue para o chunking."""
+    for item in items:
+        if item.get('uuid') is not None:
+            hashes[item['uuid']] = item_content_hash(item, strategy)
+        yield item
+
+
+# Esquemas comparados pelo ``plan_import``, cada um com todas as estratégias de chunking
+PLAN_SCHEMAS = ("tradicional", "normalizado")
+
+
+def plan_import(items, batch_size=10, embedding_batch_size=256, model=OpenAIEmbedder.DEFAULT_MODEL,
+                price_per_mtok=None, max_tokens=3500, overlap_tokens=150, text_batch=64):
+    """Estimativa offline de uma importação, sem conectar ao Weaviate.
+
+    Lê os itens em streaming e, para cada esquema (``PLAN_SCHEMAS``) e
+    estratégia de chunking (``CHUNKERS``), soma chunks, objetos, tokens
+    enviados ao embedder (título, ementa e chunk, como ``embedding_text``) e
+    bytes de propriedades, por casa e ano. Cada texto é tokenizado uma vez
+    para todas as combinações. Retorna um dicionário pronto para JSON com os
+    totais e o histograma, incluindo requisições de ``batch_size`` objetos,
+    requisições ao embedder no cliente e o custo estimado dos embeddings.
+    """
+    from tqdm import tqdm
+    encoding = get_encoding(model)
+    if price_per_mtok is None:
+        price_per_mtok = EMBEDDING_PRICES.get(model, 0.0)
+    cells = collections.defaultdict(collections.Counter)
+    for batch in _batched(tqdm(items, desc='Planejando', unit='item'), text_batch):
+        texts = ['' if item.get('duplicate_of') else item.get('full_text') or '' for item in batch]
+        for item, text, tokens in zip(batch, texts, encoding.encode_batch(texts)):
+            key = (str(item.get('house') or '?'), str(item.get('year') or '?'))
+            # Tokens de "título\nementa\n", repetidos no texto embedado de cada chunk
+            header = len(encoding.encode(embedding_text(
+                {'title': item.get('title'), 'subject': item.get('subject')})))
+            document_bytes = payload_size(document_properties(item))
+            for strategy, chunker in CHUNKERS.items():
+                chunks = chunker(encoding, text, tokens, max_tokens, overlap_tokens)
+                embedded = sum(chunk['tokens'] + header for chunk in chunks)
+                for schema in PLAN_SCHEMAS:
+                    normalized = schema == "normalizado"
+                    counts = cells[key + (f"{schema}/{strategy}",)]
+                    counts['items'] += 1
+                    counts['chunks'] += len(chunks)
+                    counts['documents'] += normalized
+                    counts['tokens'] += embedded
+                    counts['bytes'] += sum(payload_size(chunk_properties(item, chunk, normalized))
+                                           for chunk in chunks)
+                    if normalized:
+                        counts['bytes'] += document_bytes
+
+    def summary(counts):
+        objects = counts['chunks'] + counts['documents']
+        return {
+            'items': counts['items'],
+            'chunks': counts['chunks'],
+            'objects': objects,
+            'embedding_tokens': counts['tokens'],
+            'bytes': counts['bytes'],
+            'bytes_per_object': round(counts['bytes'] / max(objects, 1)),
+            'bytes_per_batch': round(counts['bytes'] / max(objects, 1) * min(batch_size, objects)),
+            'requests': (math.ceil(counts['chunks'] / batch_size)
+                         + math.ceil(counts['documents'] / batch_size)),
+            'embedding_requests': math.ceil(counts['chunks'] / embedding_batch_size),
+            'embedding_cost_usd': round(counts['tokens'] / 1e6 * price_per_mtok, 4),
+        }
+
+    totals = collections.defaultdict(collections.Counter)
+    houses = collections.defaultdict(dict)
+    for (house, year, option), counts in sorted(cells.items()):
+        totals[option].update(counts)
+        houses[house].setdefault(year, {})[option] = summary(counts)
+    return {
+        'model': model,
+        'price_per_mtok': price_per_mtok,
+        'batch_size': batch_size,
+        'embedding_batch_size': embedding_batch_size,
+        'max_tokens': max_tokens,
+        'totals': {option: summary(counts) for option, counts in sorted(totals.items())},
+        'houses': houses,
+    }
+
+
+def load_config():
+    """Configuração do Weaviate e da OpenAI lida do ambiente (.env)."""
+    return {
         "weaviate_url": os.getenv("WEAVIATE_URL", ""),
         "weaviate_apikey": os.getenv("WEAVIATE_APIKEY", ""),
         "class_name": os.getenv("WEAVIATE_CLASS", "Bill"),
         "openai_apikey": os.getenv("OPENAI_APIKEY", ""),
     }
 
+
+def connection_params(config):
+    """Headers e credenciais de conexão ao Weaviate para ``config``."""
+    from weaviate.classes.init import Auth
     headers = {"X-OpenAI-Api-Key": config.get("openai_apikey")} if config.get("openai_apikey") else {}
     auth = Auth.api_key(api_key=config.get("weaviate_apikey")) if config.get("weaviate_apikey") else None
+    return headers, auth
+
 
-    client = weaviate.connect_to_weaviate_cloud(
+def connect(config):
+    """Abre o cliente síncrono do Weaviate Cloud."""
+    import weaviate
+    headers, auth = connection_params(config)
+    return weaviate.connect_to_weaviate_cloud(
         cluster_url=config.get("weaviate_url"),
         auth_credentials=auth,
         headers=headers
     )
-    print(f"Conectado a Weaviate em {config.get('weaviate_url')}")
 
-    vec_conf = [
+
+def vector_config(model=None):
+    """Vetor nomeado dos chunks (text2vec_openai sobre título, ementa e texto)."""
+    from weaviate.classes.config import Configure
+    model = {"model": model} if model else {}
+    return [
         Configure.NamedVectors.text2vec_openai(
-            name="chunk_vector",
-            source_properties=["title","subject","chunk_text"]
+            name=VECTOR_NAME,
+            source_properties=VECTOR_SOURCE_PROPERTIES,
+            **model
         )]
-    setup_schema(client, config.get("class_name"), vec_conf, reset=args.reset)
 
-    items = load_items(args.input)
-    import_items(client, config.get("class_name"), items, dry_run=args.dry_run)
 
-    client.close()
+def run_import(config, client, items, inputs, args, checkpoint_path):
+    """Importa ``items`` com as opções da linha de comando e fecha ``client``."""
+    manifest = ImportManifest(args.manifest, args.chunking) if args.manifest else None
+    embedder = None
+    if args.embedder != "weaviate":
+        model = {"model": args.embedding_model} if args.embedder == "openai" else {}
+        embedder = get_embedder(args.embedder, cache_path=args.vector_cache, **model)
+    dedup = None
+    if args.dedup:
+        dedup = DuplicateFilter(DedupIndex(args.dedup_index, threshold=args.dedup_threshold or None),
+                                args.dedup, args.chunking)
+    checkpoint = None
+    if args.resume:
+        checkpoint = ImportCheckpoint.load(checkpoint_path, inputs)
+        print(f"Retomando do item {checkpoint.offset} ({len(checkpoint.failed)} objetos com falha)")
+    elif checkpoint_path:
+        checkpoint = ImportCheckpoint(checkpoint_path, inputs)
+    if args.engine == "async":
+        client.close()
+        headers, auth = connection_params(config)
+        asyncio.run(run_async_import(config, headers, auth, items, args, manifest, checkpoint,
+                                     embedder, dedup))
+    else:
+        import_items(client, config.get("class_name"), items, batch_size=args.batch_size,
+                     dry_run=args.dry_run, workers=args.workers, ordered=not args.unordered,
+                     manifest=manifest, normalized=args.normalized, checkpoint=checkpoint,
+                     checkpoint_every=args.checkpoint_every, retries=args.retries,
+                     embedder=embedder, dedup=dedup, chunking=args.chunking)
+        client.close()
+    if manifest is not None:
+        manifest.close()
+    if dedup is not None:
+        dedup.close()
+    if isinstance(embedder, CachedEmbedder):
+        embedder.cache.close()
+
+
+def import_shard_group(job):
+    """Processo de ``--shard-workers``: importa um grupo de shards com a
+    própria conexão (e o próprio lote) ao Weaviate."""
+    number, paths, args, where = job
+    started = time.time()
+    config = load_config()
+    items = load_items(*paths, columns=IMPORT_COLUMNS, where=where)
+    inputs = list(paths) + ([f"filtro: {where}"] if where else [])
+    checkpoint_path = f"{args.checkpoint}.{number}" if args.checkpoint else None
+    run_import(config, connect(config), items, inputs, args, checkpoint_path)
+    return number, len(paths), time.time() - started
+
+
+def import_shards(args, where):
+    """Divide os shards dos manifestos entre ``--shard-workers`` processos.
+
+    Os grupos são equilibrados pelos bytes do manifesto e são sempre os
+    mesmos para as mesmas entradas, então ``--resume`` encontra o
+    checkpoint de cada processo (``{checkpoint}.{n}``).
+    """
+    manifests = [ShardManifest(path) for path in args.input]
+    shards = [shard for manifest in manifests for shard in manifest.shards]
+    groups = split_shards(shards, args.shard_workers)
+    print(f"{len(shards)} shards ({sum(len(m) for m in manifests)} itens) "
+          f"em {len(groups)} processos")
+    jobs = [(number, paths, args, where) for number, paths in enumerate(groups)]
+    context = multiprocessing.get_context('spawn')
+    # Sem Pool: os processos do Pool são daemon e não poderiam abrir os de --workers
+    with ProcessPoolExecutor(max_workers=len(jobs), mp_context=context) as executor:
+        for number, count, elapsed in executor.map(import_shard_group, jobs):
+            print(f"Processo {number}: {count} shards em {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importa JSON de proposições com chunking para o Weaviate"
+    )
+    parser.add_argument("--input", required=True, nargs='+',
+                        help="Arquivos JSON/JSONL (.gz/.zst), pastas de itens ou padrões glob")
+    parser.add_argument("--reset", action="store_true",
+                        help="Reseta a classe antes de criar (e limpa o --manifest)")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="Apenas imprime UUID sem inserir")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para tokenização/chunking em paralelo")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Envia os itens na ordem em que o chunking termina")
+    parser.add_argument("--manifest",
+                        help="Manifesto SQLite para importação incremental (só itens novos/alterados)")
+    parser.add_argument("--normalized", action="store_true",
+                        help="Um objeto por proposição + chunks enxutos em {classe}Chunk")
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync",
+                        help="async: envia lotes concorrentes com o cliente async, com lote adaptativo")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Lotes em voo simultâneos no modo --engine async")
+    parser.add_argument("--checkpoint",
+                        help="Arquivo de checkpoint gravado durante a importação")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma do --checkpoint, reenviando também os objetos que falharam")
+    parser.add_argument("--checkpoint-every", type=int, default=500,
+                        help="Itens entre gravações do checkpoint (engine sync)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Novas tentativas para objetos que falharam")
+    parser.add_argument("--embedder", choices=["weaviate", *EMBEDDERS], default="weaviate",
+                        help="Onde calcular os vetores: no Weaviate (text2vec_openai) ou no cliente")
+    parser.add_argument("--embedding-model",
+                        help="Modelo de embeddings da OpenAI (o mesmo é configurado no vetorizador)")
+    parser.add_argument("--vector-cache", default=".cache/vectors.sqlite",
+                        help="Cache SQLite de vetores calculados no cliente ('' desativa)")
+    parser.add_argument("--house", action="append",
+                        help="Só importa proposições desta casa (nome exato; pode repetir)")
+    parser.add_argument("--year-from", type=int,
+                        help="Só importa proposições deste ano em diante")
+    parser.add_argument("--type", action="append",
+                        help="Só importa proposições deste tipo, ex.: PL (pode repetir)")
+    parser.add_argument("--dedup", choices=["drop", "link"],
+                        help="Descarta ou liga ao item canônico as proposições com texto repetido")
+    parser.add_argument("--dedup-threshold", type=float, default=0.9,
+                        help="Similaridade (Jaccard) mínima das quase-duplicatas; 0 só compara o texto exato")
+    parser.add_argument("--dedup-index", default=".cache/dedup.sqlite",
+                        help="Índice SQLite dos textos já vistos")
+    parser.add_argument("--chunking", choices=list(CHUNKERS), default="tokens",
+                        help="tokens: janelas de tokens com sobreposição; structure: artigos e "
+                             "parágrafos inteiros até o limite de tokens")
+    parser.add_argument("--plan", nargs='?', const='-', metavar="ARQUIVO",
+                        help="Só estima chunks, tokens, bytes, requisições e custo por casa/ano, "
+                             "sem conectar ao Weaviate; grava o JSON no arquivo (ou na saída padrão)")
+    parser.add_argument("--batch-size", type=int, default=10,
+                        help="Objetos por requisição de lote (tamanho inicial no engine async)")
+    parser.add_argument("--price-per-mtok", type=float,
+                        help="Preço do embedding em USD por milhão de tokens (--plan); "
+                             "padrão: tabela do modelo em embeddings.py")
+    parser.add_argument("--shard-workers", type=int, default=1,
+                        help="Processos de importação em paralelo, cada um com sua conexão, "
+                             "dividindo os shards de --input (manifestos *.manifest.json)")
+    parser.add_argument("--get", metavar="UUID",
+                        help="Só imprime o item do manifesto de shards em --input, lido pelo offset")
+    args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume exige --checkpoint")
+    if (args.shard_workers > 1 or args.get) and not all(is_manifest(path) for path in args.input):
+        parser.error("--shard-workers e --get exigem manifestos de shards (*.manifest.json) em --input")
+    if args.shard_workers > 1 and args.dedup:
+        parser.error("--dedup não funciona com --shard-workers (o índice é sequencial)")
+
+    if args.get:
+        for path in args.input:
+            shards = ShardManifest(path)
+            item = shards.get(args.get)
+            shards.close()
+            if item is not None:
+                print(json.dumps(item, ensure_ascii=False, indent=2))
+                return
+        sys.exit(f"{args.get} não está em {', '.join(args.input)}")
+
+    where = ItemFilter(tuple(args.house or ()), args.year_from,
+                       tuple(kind.upper() for kind in args.type or ()))
+    if args.plan:
+        items = load_items(*args.input, columns=IMPORT_COLUMNS, where=where)
+        plan = plan_import(items, batch_size=args.batch_size,
+                           model=args.embedding_model or OpenAIEmbedder.DEFAULT_MODEL,
+                           price_per_mtok=args.price_per_mtok)
+        if args.plan == '-':
+            print(json.dumps(plan, ensure_ascii=False, indent=2))
+        else:
+            with open(args.plan, 'w', encoding='utf-8') as f:
+                json.dump(plan, f, ensure_ascii=False, indent=2)
+            print(f"Plano gravado em {args.plan}")
+        return
+    
+    config = load_config()
+    client = connect(config)
+    print(f"Conectado a Weaviate em {config.get('weaviate_url')}")
+
+    if args.embedder == "openai" and not args.embedding_model:
+        # Vetores do cliente e do vetorizador (usado nas consultas) precisam do mesmo modelo
+        args.embedding_model = OpenAIEmbedder.DEFAULT_MODEL
+    setup_schema(client, config.get("class_name"), vector_config(args.embedding_model),
+                 reset=args.reset, normalized=args.normalized)
+    if args.reset and args.manifest:
+        # A coleção foi recriada vazia: nada do manifesto está mais no Weaviate
+        manifest = ImportManifest(args.manifest, args.chunking)
+        manifest.clear()
+        manifest.close()
+        print(f"Manifesto {args.manifest} limpo.")
+
+    if args.shard_workers > 1:
+        client.close()
+        import_shards(args, where)
+        return
+    items = load_items(*args.input, columns=IMPORT_COLUMNS, where=where)
+    # O checkpoint só vale para as mesmas entradas com o mesmo filtro
+    inputs = list(args.input) + ([f"filtro: {where}"] if where else [])
+    run_import(config, client, items, inputs, args, args.checkpoint)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import sys
+import time
+
+from assessorai_crawler.local_index import LocalIndex
+
+
+def build(index, inputs):
+    """Indexa saídas já gravadas (JSON/JSONL/Parquet/pastas), só o que mudou"""
+    from importer import load_items
+    counts = {'new': 0, 'updated': 0, 'unchanged': 0}
+    started = time.time()
+    for item in load_items(*inputs):
+        counts[index.upsert(item)] += 1
+    index.commit()
+    print(f"{counts['new']} novos, {counts['updated']} alterados, {counts['unchanged']} sem mudanças "
+          f"em {time.time() - started:.1f}s; {len(index)} itens no índice {index.path}")
+
+
+def get(index, args):
+    """Imprime os itens encontrados; o código de saída indica se existem
+    (e, com --text-file, se o texto é o mesmo)"""
+    if args.uuid:
+        found = [item for item in [index.get(args.uuid)] if item is not None]
+    else:
+        found = index.find(args.house, args.type and args.type.upper(), args.number, args.year)
+    same_text = True
+    if args.text_file is not None:
+        with open(args.text_file, encoding='utf-8') as f:
+            text = f.read()
+        for item in found:
+            item['same_text'] = index.text_matches(item['uuid'], text)
+        same_text = any(item['same_text'] for item in found)
+    print(json.dumps(found, ensure_ascii=False, indent=2))
+    return 0 if found and same_text else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Consulta o índice local (SQLite + FTS5) dos itens raspados, sem o Weaviate"
+    )
+    parser.add_argument("--index", default=".cache/index.sqlite",
+                        help="Arquivo do índice (o mesmo LOCAL_INDEX_PATH dos spiders)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Indexa arquivos de saída existentes")
+    build_parser.add_argument("input", nargs="+",
+                              help="Arquivos JSON/JSONL (.gz/.zst), Parquet, pastas ou padrões glob")
+
+    get_parser = commands.add_parser("get", help="Verifica se uma proposição existe no índice")
+    get_parser.add_argument("--uuid", help="UUID do item")
+    get_parser.add_argument("--house", help="Casa legislativa (nome exato)")
+    get_parser.add_argument("--type", help="Tipo, ex.: PL")
+    get_parser.add_argument("--number", type=int, help="Número")
+    get_parser.add_argument("--year", type=int, help="Ano")
+    get_parser.add_argument("--text-file", help="Compara o texto indexado com o deste arquivo")
+
+    search_parser = commands.add_parser("search", help="Busca por palavras-chave (sintaxe FTS5)")
+    search_parser.add_argument("query", help='Consulta, ex.: "saúde mental" OR autismo')
+    search_parser.add_argument("--house", help="Só desta casa (nome exato)")
+    search_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "get" and not (args.uuid or args.house or args.type or args.number or args.year):
+        get_parser.error("informe --uuid ou ao menos um de --house/--type/--number/--year")
+
+    index = LocalIndex(args.index)
+    try:
+        if args.command == "build":
+            build(index, args.input)
+        elif args.command == "get":
+            sys.exit(get(index, args))
+        else:
+            for item in index.search(args.query, args.limit, args.house):
+                print(f"{item['score']:8.2f}  {item['uuid']}  {item['title']} ({item['house']})")
+                print(f"          {' '.join(item['snippet'].split())}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# importer.py e embeddings.py ficam na raiz; os fakes do Weaviate, em benchmarks/
+for path in (ROOT, os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch):
+    """Troca o tiktoken (que baixa o vocabulário) por um token por byte"""
+    import importer
+    from fakes import ByteEncoding
+    monkeypatch.setattr(importer, 'get_encoding', lambda model=None: ByteEncoding())
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def write_dataset(folder, count):
+    """Arquivos de metadados e de texto da ALESP com ``count`` proposições"""
+    os.makedirs(folder / 'sp')
+    titles = [f'PL {i}/2024' for i in range(1, count + 1)]
+    metadata = [{'Titulo': title, 'Autoria': 'Dep. Ana Souza', 'Ementa': f'Ementa {i}',
+                 'DataApresentacao': '2024-01-01', 'IdProposicaoOrigem': i}
+                for i, title in enumerate(titles, 1)]
+    texts = [{'Titulo': title, 'IdProposicaoOrigem': i, 'Texto': f'Texto da proposição {i}.'}
+             for i, title in enumerate(titles, 1)]
+    (folder / 'sp' / 'ProposicoesSP.json').write_text(json.dumps(metadata), encoding='utf-8')
+    (folder / 'sp' / 'ProjetoInteiroTeorSP.json').write_text(json.dumps(texts), encoding='utf-8')
+
+
+def crawl(tmp_path, *settings):
+    args = [sys.executable, '-m', 'scrapy', 'crawl', 'proposicoessp',
+            '-a', f'folder={tmp_path / "dados"}',
+            '-s', f'OUTPUT_DIR={tmp_path / "output"}',
+            '-s', f'METRICS_DIR={tmp_path / "metrics"}',
+            '-s', 'METRICS_INTERVAL=0', '-s', 'LOG_LEVEL=WARNING', *settings]
+    subprocess.run(args, cwd=ROOT, check=True, timeout=120)
+
+
+def test_default_crawl_writes_items_and_metrics(tmp_path):
+    write_dataset(tmp_path / 'dados', 30)
+    crawl(tmp_path)
+
+    with open(tmp_path / 'output' / 'proposicoessp_proposicoes.json', encoding='utf-8') as f:
+        items = json.load(f)
+    assert len(items) == 30
+    assert items[0]['subject'] == 'Ementa 1'
+
+    with open(tmp_path / 'metrics' / 'proposicoessp_stats.json', encoding='utf-8') as f:
+        stats = json.load(f)
+    assert stats['finished']
+    assert stats['items_scraped'] == 30
+    assert stats['stages']['pipeline/ValidationPipeline']['calls'] == 30
+    assert stats['stages']['pipeline/JsonWriterSinglePipeline']['calls'] == 30
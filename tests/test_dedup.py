@@ -0,0 +1,123 @@
+import asyncio
+import concurrent.futures
+import random
+
+import pytest
+
+from assessorai_crawler.dedup import DedupIndex
+
+
+def bill_text(seed, words=400):
+    rng = random.Random(seed)
+    vocabulary = [f'palavra{i}' for i in range(2000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(str(tmp_path / 'dedup.sqlite'), threshold=0.9)
+    yield index
+    index.close()
+
+
+def test_same_title_twice_is_exact(index):
+    text = bill_text(1)
+    assert index.check('u1', text) is None
+    found = index.check('u1', text)
+    assert found is not None
+    assert (found.kind, found.canonical) == ('exact', 'u1')
+
+
+def test_different_title_same_text_is_exact(index):
+    text = bill_text(1)
+    assert index.check('u1', text) is None
+    found = index.check('u2', ' ' + text.upper() + '.')
+    assert (found.kind, found.canonical) == ('exact', 'u1')
+
+
+def test_near_copy_is_near(index):
+    words = bill_text(1).split()
+    assert index.check('u1', ' '.join(words)) is None
+    words[200] = 'alterada'
+    found = index.check('u2', ' '.join(words))
+    assert found.kind == 'near'
+    assert found.canonical == 'u1'
+    assert 0.9 <= found.similarity < 1.0
+
+
+def test_same_title_near_copy_is_near(index):
+    words = bill_text(1).split()
+    assert index.check('u1', ' '.join(words)) is None
+    words[200] = 'alterada'
+    found = index.check('u1', ' '.join(words))
+    assert (found.kind, found.canonical) == ('near', 'u1')
+
+
+def test_different_texts_are_not_duplicates(index):
+    assert index.check('u1', bill_text(1)) is None
+    assert index.check('u2', bill_text(2)) is None
+    assert len(index) == 2
+
+
+def test_recheck_in_new_run_is_not_duplicate(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+    text = bill_text(1)
+    first = DedupIndex(path, threshold=0.9)
+    assert first.check('u1', text) is None
+    first.close()
+    second = DedupIndex(path, threshold=0.9)
+    assert second.check('u1', text) is None
+    # ... mas a repetição dentro da nova execução é duplicata
+    assert second.check('u1', text).kind == 'exact'
+    second.close()
+
+
+def test_index_can_be_used_from_another_thread(index):
+    # importer --engine async consulta o índice dentro de asyncio.to_thread
+    text = bill_text(1)
+    assert index.check('u1', text) is None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        found = pool.submit(index.check, 'u2', text).result()
+    assert (found.kind, found.canonical) == ('exact', 'u1')
+
+
+@pytest.mark.usefixtures('byte_encoding')
+@pytest.mark.parametrize('engine', ['sync', 'async'])
+def test_import_drops_duplicates(tmp_path, engine):
+    import importer
+    from fakes import FakeAsyncWeaviateClient, FakeWeaviateClient
+
+    items = [{'uuid': f'u{i}', 'title': f'PL {i}/2024', 'full_text': bill_text(i, words=50)}
+             for i in range(5)]
+    items += [{**items[0], 'uuid': 'copia0'}, {**items[3], 'uuid': 'copia3'}]
+    dedup = importer.DuplicateFilter(DedupIndex(str(tmp_path / 'dedup.sqlite')), action='drop')
+    if engine == 'sync':
+        client = FakeWeaviateClient()
+        importer.import_items(client, 'Bill', items, dedup=dedup)
+    else:
+        client = FakeAsyncWeaviateClient(latency=0, per_object_latency=0)
+        asyncio.run(importer.import_items_async(client, 'Bill', items, dedup=dedup))
+    dedup.close()
+    titles = sorted(obj['properties']['title']
+                    for obj in client.collections.get('Bill').objects.values())
+    assert titles == [f'PL {i}/2024' for i in range(5)]
+    assert dedup.counts['exact'] == 2
+
+
+def test_duplicate_of_is_only_in_the_normalized_document_schema():
+    import importer
+    from fakes import FakeWeaviateClient
+
+    def property_names(client, name):
+        return {prop.name for prop in client.collections.get(name).properties}
+
+    client = FakeWeaviateClient()
+    importer.setup_schema(client, 'Bill', importer.vector_config())
+    assert 'duplicate_of' not in property_names(client, 'Bill')
+
+    client = FakeWeaviateClient()
+    importer.setup_schema(client, 'Bill', importer.vector_config(), normalized=True)
+    assert 'duplicate_of' in property_names(client, 'Bill')
+    assert 'duplicate_of' not in property_names(client, 'BillChunk')
+    item = {'uuid': 'u2', 'title': 'PL 2/2024', 'duplicate_of': 'u1'}
+    assert importer.document_properties(item)['duplicate_of'] == 'u1'
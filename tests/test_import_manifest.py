@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+import importer
+from fakes import FakeAsyncWeaviateClient, FakeWeaviateClient
+from importer import ImportManifest
+
+pytestmark = pytest.mark.usefixtures('byte_encoding')
+
+
+def make_items(count):
+    return [{'uuid': f'u{i}', 'title': f'PL {i}/2024', 'full_text': f'texto da proposição {i}'}
+            for i in range(count)]
+
+
+def run_sync(client, items, manifest, **options):
+    importer.import_items(client, 'Bill', items, manifest=manifest, retry_backoff=0, **options)
+
+
+def run_async(client, items, manifest, **options):
+    options = {'concurrency': 2, 'max_errors': 1000, 'retry_backoff': 0, **options}
+    asyncio.run(importer.import_items_async(client, 'Bill', items, manifest=manifest, **options))
+
+
+def sync_client(object_error_rate=0.0):
+    return FakeWeaviateClient(object_error_rate=object_error_rate)
+
+
+def async_client(object_error_rate=0.0):
+    return FakeAsyncWeaviateClient(latency=0, per_object_latency=0,
+                                   object_error_rate=object_error_rate)
+
+
+CASES = [
+    pytest.param(run_sync, sync_client, id='sync'),
+    pytest.param(run_async, async_client, id='async'),
+]
+
+
+def sent_titles(client):
+    return sorted(obj['properties']['title']
+                  for obj in client.collections.get('Bill').objects.values())
+
+
+def titles(items):
+    return sorted(item['title'] for item in items)
+
+
+def recorded(manifest):
+    return {row[0] for row in manifest.conn.execute('SELECT uuid FROM items')}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = ImportManifest(str(tmp_path / 'manifest.sqlite'))
+    yield manifest
+    manifest.close()
+
+
+@pytest.mark.parametrize('run, make_client', CASES)
+def test_unchanged_items_are_skipped_and_changed_resent(manifest, run, make_client):
+    items = make_items(20)
+    client = make_client()
+    run(client, items, manifest)
+    assert sent_titles(client) == titles(items)
+    assert recorded(manifest) == {item['uuid'] for item in items}
+
+    client = make_client()
+    run(client, items, manifest)
+    assert sent_titles(client) == []
+    assert manifest.skipped == 20
+
+    # Texto alterado: o item é reenviado e o chunk antigo apagado
+    client = make_client()
+    collection = client.collections.get('Bill')
+    old_chunk = importer.generate_uuid5(items[3]['full_text'])
+    collection.objects[old_chunk] = {'properties': {'title': 'antigo'}}
+    changed = [*items[:3], {**items[3], 'full_text': 'texto novo'}, *items[4:]]
+    run(client, changed, manifest)
+    assert sent_titles(client) == ['PL 3/2024']
+    assert old_chunk not in collection.objects
+
+
+@pytest.mark.parametrize('run, make_client', CASES)
+def test_failed_items_are_not_recorded(manifest, run, make_client):
+    items = make_items(40)
+    client = make_client(0.3)
+    run(client, items, manifest, retries=0)
+    delivered = set(sent_titles(client))
+    missing = [item for item in items if item['title'] not in delivered]
+    assert missing
+    assert recorded(manifest) == {item['uuid'] for item in items if item['title'] in delivered}
+
+    client = make_client()
+    run(client, items, manifest, retries=0)
+    assert sent_titles(client) == titles(missing)
+
+
+class Crash(Exception):
+    pass
+
+
+def interrupted(items, at):
+    """Entrega os itens e simula uma queda do processo no item ``at``"""
+    for index, item in enumerate(items):
+        if index == at:
+            raise Crash
+        yield item
+
+
+@pytest.mark.parametrize('run, make_client, options', [
+    pytest.param(run_sync, sync_client, {'checkpoint_every': 5}, id='sync'),
+    pytest.param(run_async, async_client, {'concurrency': 1}, id='async'),
+])
+def test_items_are_recorded_per_confirmed_batch(manifest, run, make_client, options):
+    items = make_items(30)
+    with pytest.raises(Crash):
+        run(make_client(), interrupted(items, 17), manifest, **options)
+    done = recorded(manifest)
+    assert done
+    assert done <= {item['uuid'] for item in items[:17]}
+
+    client = make_client()
+    run(client, items, manifest, **options)
+    assert sent_titles(client) == titles(item for item in items if item['uuid'] not in done)
+
+
+def test_clear_forgets_sent_items(manifest):
+    items = make_items(5)
+    run_sync(sync_client(), items, manifest)
+    manifest.clear()
+    client = sync_client()
+    run_sync(client, items, manifest)
+    assert sent_titles(client) == titles(items)
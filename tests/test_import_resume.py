@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+import importer
+from fakes import FakeAsyncWeaviateClient, FakeWeaviateClient
+from importer import ImportCheckpoint
+
+pytestmark = pytest.mark.usefixtures('byte_encoding')
+
+
+def make_items(count):
+    # Textos curtos e distintos: um chunk por item, com uuid próprio
+    return [{'uuid': f'u{i}', 'title': f'PL {i}/2024', 'full_text': f'texto da proposição {i}'}
+            for i in range(count)]
+
+
+def chunk_uuid(item):
+    return importer.generate_uuid5(item['full_text'])
+
+
+def sent_items(client, items):
+    objects = client.collections.get('Bill').objects
+    return [item['uuid'] for item in items if chunk_uuid(item) in objects]
+
+
+def failed_items(checkpoint, items):
+    failed = {chunk_uuid(item): item['uuid'] for item in items}
+    return sorted(failed[uuid] for uuid in checkpoint.failed)
+
+
+def run_sync(client, items, checkpoint, **options):
+    importer.import_items(client, 'Bill', items, checkpoint=checkpoint, retry_backoff=0, **options)
+
+
+def run_async(client, items, checkpoint, **options):
+    options = {'concurrency': 2, 'max_errors': 1000, 'checkpoint_interval': 0,
+               'retry_backoff': 0, **options}
+    asyncio.run(importer.import_items_async(client, 'Bill', items, checkpoint=checkpoint, **options))
+
+
+def sync_client(object_error_rate=0.0, seed=0):
+    return FakeWeaviateClient(object_error_rate=object_error_rate, seed=seed)
+
+
+def async_client(object_error_rate=0.0, seed=0):
+    return FakeAsyncWeaviateClient(latency=0, per_object_latency=0,
+                                   object_error_rate=object_error_rate, seed=seed)
+
+
+CASES = [
+    pytest.param(run_sync, sync_client, id='sync'),
+    pytest.param(run_async, async_client, id='async'),
+]
+
+
+@pytest.mark.parametrize('run, make_client', CASES)
+def test_failures_are_recorded_and_retried_on_resume(tmp_path, run, make_client):
+    items = make_items(40)
+    path = str(tmp_path / 'checkpoint.json')
+    client = make_client(0.3)
+    checkpoint = ImportCheckpoint(path, ['entrada.jsonl'])
+    run(client, items, checkpoint, retries=0)
+
+    delivered = sent_items(client, items)
+    missing = sorted(item['uuid'] for item in items if item['uuid'] not in delivered)
+    assert missing
+    assert checkpoint.offset == len(items)
+    assert failed_items(checkpoint, items) == missing
+
+    # Retomada: só os que falharam são reenviados
+    resumed = ImportCheckpoint.load(path, ['entrada.jsonl'])
+    assert resumed.offset == len(items)
+    client = make_client()
+    run(client, items, resumed, retries=0)
+    assert sorted(sent_items(client, items)) == missing
+    assert resumed.failed == {}
+    assert ImportCheckpoint.load(path, ['entrada.jsonl']).failed == {}
+
+
+@pytest.mark.parametrize('run, make_client', CASES)
+def test_retries_recover_rejected_objects(tmp_path, run, make_client):
+    items = make_items(40)
+    client = make_client(0.3)
+    checkpoint = ImportCheckpoint(str(tmp_path / 'checkpoint.json'), ['entrada.jsonl'])
+    run(client, items, checkpoint, retries=5)
+    assert sent_items(client, items) == [item['uuid'] for item in items]
+    assert checkpoint.offset == len(items)
+    assert checkpoint.failed == {}
+
+
+class Crash(Exception):
+    pass
+
+
+def interrupted(items, at):
+    """Entrega os itens e simula uma queda do processo no item ``at``"""
+    # Não KeyboardInterrupt: o pytest interromperia a sessão inteira
+    for index, item in enumerate(items):
+        if index == at:
+            raise Crash
+        yield item
+
+
+@pytest.mark.parametrize('run, make_client, options', [
+    pytest.param(run_sync, sync_client, {'checkpoint_every': 5}, id='sync'),
+    pytest.param(run_async, async_client, {'checkpoint_interval': 0, 'concurrency': 1}, id='async'),
+])
+def test_resume_skips_acknowledged_items(tmp_path, run, make_client, options):
+    items = make_items(30)
+    path = str(tmp_path / 'checkpoint.json')
+    with pytest.raises(Crash):
+        run(make_client(), interrupted(items, 17), ImportCheckpoint(path, ['entrada.jsonl']),
+            **options)
+
+    resumed = ImportCheckpoint.load(path, ['entrada.jsonl'])
+    offset = resumed.offset
+    assert 0 < offset <= 17
+    assert resumed.failed == {}
+    client = make_client()
+    run(client, items, resumed, **options)
+    assert sent_items(client, items) == [item['uuid'] for item in items[offset:]]
+    assert ImportCheckpoint.load(path, ['entrada.jsonl']).offset == len(items)
+
+
+def test_checkpoint_rejects_other_inputs(tmp_path):
+    path = str(tmp_path / 'checkpoint.json')
+    ImportCheckpoint(path, ['a.jsonl']).save()
+    with pytest.raises(ValueError):
+        ImportCheckpoint.load(path, ['b.jsonl'])
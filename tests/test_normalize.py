@@ -0,0 +1,49 @@
+from assessorai_crawler.normalize import TextNormalizer
+
+HEADER = 'ASSEMBLEIA LEGISLATIVA DO ESTADO DE SÃO PAULO'
+
+
+def paged(pages):
+    """Junta páginas com cabeçalho, rodapé "Página N de M" e quebra de página"""
+    return '\f'.join(f'{HEADER}\n{body}\n\nPágina {n} de {len(pages)}\n'
+                     for n, body in enumerate(pages, 1))
+
+
+def test_headers_and_page_markers_at_page_edges_are_removed():
+    text = paged(['Art. 1º Texto um.', 'Art. 2º Texto dois.', 'Art. 3º Texto três.'])
+    out = TextNormalizer()(text)
+    assert out.count(HEADER) == 1
+    assert 'Página' not in out and '\f' not in out
+    assert all(f'Art. {n}º' in out for n in (1, 2, 3))
+
+
+def test_bare_page_numbers_at_page_edges_are_removed():
+    bodies = ['Primeira página.', 'Segunda página.', 'Terceira página.', 'Quarta página.']
+    text = '\f'.join(f'{body}\n{n}' for n, body in enumerate(bodies, 1))
+    assert TextNormalizer()(text).splitlines() == bodies
+
+
+def test_repeated_body_lines_survive():
+    body = '\n'.join(['Art. 1º Fica instituído o programa.', '(VETADO)', 'Texto.', '(VETADO)',
+                      'Mais texto.', '(VETADO)', 'Ainda mais texto.', 'Outro trecho.',
+                      'Parágrafo único.', 'Conteúdo.', 'Parágrafo único.', 'Conteúdo.',
+                      'Parágrafo único.', 'Itens:', '1', 'primeiro', '2', 'segundo', '3',
+                      'terceiro', 'Fim do corpo.', 'Última linha.'])
+    out = TextNormalizer()(paged([body, 'Art. 2º Outra página.', 'Art. 3º Mais uma.']))
+    assert out.count('(VETADO)') == 3
+    assert out.count('Parágrafo único.') == 3
+    assert all(line in out.splitlines() for line in ('1', '2', '3'))
+
+
+def test_text_without_page_breaks_keeps_repeated_lines():
+    text = '\n'.join(['Cabeçalho repetido', 'texto', '12'] * 4)
+    assert TextNormalizer(rules=['headers'])(text) == text
+
+
+def test_unicode_and_whitespace():
+    out = TextNormalizer()('Artiﬁcial  e​  ok \n\n\n\nfim')
+    assert out == 'Artificial e ok\n\nfim'
+
+
+def test_form_feed_removed_without_headers_rule():
+    assert '\f' not in TextNormalizer(rules=['unicode'])('a\fb')
@@ -0,0 +1,28 @@
+import gzip
+import json
+import logging
+import types
+
+import pytest
+
+from assessorai_crawler.pipelines import JsonWriterSinglePipeline
+
+SPIDER = types.SimpleNamespace(slug='teste', logger=logging.getLogger('pipelines-test'))
+
+
+@pytest.mark.parametrize('compression', [None, '', 'gzip'])
+def test_writer_accepts_supported_compression(tmp_path, compression):
+    writer = JsonWriterSinglePipeline(output_format='jsonl', compression=compression,
+                                      output_dir=str(tmp_path))
+    writer.open_spider(SPIDER)
+    writer.process_item({'uuid': 'u1'}, SPIDER)
+    writer.close_spider(SPIDER)
+    opener = gzip.open if compression else open
+    with opener(writer.file_path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'uuid': 'u1'}]
+
+
+def test_writer_rejects_unknown_compression(tmp_path):
+    message = r"OUTPUT_COMPRESSION inválido: 'zip' \(aceitos: None, 'gzip', 'zstd'\)"
+    with pytest.raises(ValueError, match=message):
+        JsonWriterSinglePipeline(compression='zip', output_dir=str(tmp_path))
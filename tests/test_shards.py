@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from assessorai_crawler.shards import ShardManifest, ShardWriter, is_manifest, split_shards
+
+
+def make_items(count):
+    return [{'uuid': f'u{i}', 'year': 2000 + i % 3, 'title': f'PL {i}/{2000 + i % 3}',
+             'full_text': 'texto ' * (i % 7 + 1)} for i in range(count)]
+
+
+def write(tmp_path, items, **options):
+    writer = ShardWriter(str(tmp_path), 'saida', **options)
+    for item in items:
+        writer.write(item)
+    return writer, writer.close()
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_get_reads_each_record_by_uuid(tmp_path, compression):
+    items = make_items(50)
+    _, path = write(tmp_path, items, max_items=7, shard_by='year', compression=compression)
+    manifest = ShardManifest(path)
+    assert is_manifest(path)
+    assert len(manifest) == 50
+    assert all(manifest.get(item['uuid']) == item for item in items)
+    assert manifest.get('ausente') is None
+    assert sorted(manifest.iter_items(), key=lambda item: int(item['uuid'][1:])) == items
+    manifest.close()
+
+
+def test_manifest_keeps_only_shard_summaries(tmp_path):
+    _, path = write(tmp_path, make_items(50), max_items=7, shard_by='year')
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert sum(shard['records'] for shard in data['shards']) == 50
+    assert {shard['key'] for shard in data['shards']} == {'2000', '2001', '2002'}
+    assert all(set(shard) == {'path', 'key', 'records', 'bytes'} for shard in data['shards'])
+    assert all(shard['records'] <= 7 for shard in data['shards'])
+
+
+def test_byte_cap_rotates_shards(tmp_path):
+    writer, _ = write(tmp_path, make_items(40), max_bytes=500)
+    assert len(writer.done) > 1
+    assert all(shard.bytes < 500 + 200 for shard in writer.done)
+
+
+def test_repeated_uuid_points_to_last_record(tmp_path):
+    items = [{'uuid': 'u1', 'full_text': 'primeiro'}, {'uuid': 'u1', 'full_text': 'segundo'}]
+    _, path = write(tmp_path, items)
+    assert ShardManifest(path).get('u1')['full_text'] == 'segundo'
+
+
+def test_split_balances_bytes_and_is_stable(tmp_path):
+    shards = [{'path': f's{i}', 'bytes': size} for i, size in enumerate([90, 50, 40, 30, 20, 10])]
+    groups = split_shards(shards, 3)
+    sizes = {shard['path']: shard['bytes'] for shard in shards}
+    assert sorted(sum(sizes[path] for path in group) for group in groups) == [70, 80, 90]
+    assert split_shards(list(reversed(shards)), 3) == groups
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="'gzip', 'zstd'"):
+        ShardWriter(str(tmp_path), 'saida', max_items=10, compression='zip')
+    assert not (tmp_path / 'saida.part').exists()
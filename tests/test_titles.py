@@ -0,0 +1,65 @@
+import hashlib
+
+import pytest
+
+from assessorai_crawler.titles import parse_title, parse_titles, title_key, title_keys, title_parts
+
+
+@pytest.mark.parametrize('title', ['PL 12/2020', 'PL. 012/2020', 'PL 12 2020', 'PL nº 12/20',
+                                   'pl 12-2020', ' PL 12/2020. '])
+def test_spelling_variants_share_key(title):
+    assert title_key(title) == 'PL:12:2020'
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Emenda 1 ao PL 123/2020', 'Emenda 1 ao PL 456/2021'),
+    ('PL 12/2020 - Substitutivo', 'PL 12/2020'),
+    ('PL 12/2020 (Substitutivo)', 'PL 12/2020 (Emenda)'),
+])
+def test_leftover_text_keeps_titles_apart(first, second):
+    assert title_key(first) != title_key(second)
+
+
+def test_leftover_text_is_normalized():
+    assert title_key('PL 12/2020 - Substitutivo') == title_key('PL 12/2020 (substitutivo)')
+
+
+def test_title_without_number_uses_raw_key():
+    assert title_key('  Moção  de aplauso ') == 'raw:MOÇÃO DE APLAUSO'
+    assert parse_title('Moção de aplauso') is None
+
+
+def test_batch_matches_single():
+    titles = ['PL 12/2020', 'Emenda 1 ao PL 123/2020', 'Moção', None, 'PEC 5/99 - Substitutivo']
+    assert parse_titles(titles) == [parse_title(title) for title in titles]
+    assert title_keys(titles) == [title_key(title) for title in titles]
+
+
+def test_title_parts_keeps_legacy_split():
+    assert title_parts('pl 012/20') == ('pl', '012', '20')
+    assert title_parts('PL 12') == ('PL', '12', '')
+    assert title_parts('') == ('', '', '')
+
+
+def test_cn_uuid_uses_legacy_inputs():
+    from assessorai_crawler.spiders.proposicoescn import ProposicoesCNSpider
+    item = ProposicoesCNSpider().build_item({'Titulo': 'pl 12/20', 'Texto': 'texto'})
+    expected = hashlib.md5('Câmara dos Deputados_pl_12_20'.encode('utf-8')).hexdigest()
+    assert item['uuid'] == expected
+    assert (item['type'], item['number'], item['year']) == ('PL', 12, 2020)
+
+
+def test_cn_uuid_without_number_uses_none():
+    from assessorai_crawler.spiders.proposicoescn import ProposicoesCNSpider
+    item = ProposicoesCNSpider().build_item({'Titulo': 'REQ sem número', 'Texto': 'texto'})
+    expected = hashlib.md5('Câmara dos Deputados_REQ_None_None'.encode('utf-8')).hexdigest()
+    assert item['uuid'] == expected
+
+
+def test_legislapi_uuid_is_raw_title_md5():
+    from assessorai_crawler.spiders.proposicoessp import ProposicoesSPSpider
+    spider = ProposicoesSPSpider()
+    spider.metadata = {}
+    item = spider.build_item({'Titulo': ' pl 12/20 ', 'Texto': 'texto'})
+    assert item['uuid'] == hashlib.md5(b'pl 12/20').hexdigest()
+    assert (item['type'], item['number'], item['year']) == ('PL', 12, 2020)
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+import types
+
+import pytest
+from twisted.internet import reactor
+
+from assessorai_crawler.pipelines import VectorStorePipeline
+from fakes import FakeWeaviateClient
+
+pytestmark = pytest.mark.usefixtures('byte_encoding')
+
+
+class Stats:
+    def __init__(self):
+        self.values = {}
+
+    def inc_value(self, key, count=1, start=0):
+        self.values[key] = self.values.get(key, start) + count
+
+    def get_value(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class ClosingClient(FakeWeaviateClient):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+SPIDER = types.SimpleNamespace(logger=logging.getLogger('vector-store-test'))
+
+
+def wait(d, timeout=5.0):
+    """Roda o reactor (sem ``run``) até o Deferred disparar; retorna o resultado"""
+    results = []
+    d.addBoth(results.append)
+    deadline = time.monotonic() + timeout
+    while not results and time.monotonic() < deadline:
+        reactor.iterate(0.01)
+    assert results, 'Deferred não disparou'
+    return results[0]
+
+
+def make_items(count):
+    return [{'uuid': f'u{i}', 'title': f'PL {i}/2024', 'full_text': f'texto da proposição {i}'}
+            for i in range(count)]
+
+
+@pytest.fixture
+def open_pipeline():
+    pipelines = []
+
+    def open_pipeline(client=None, **options):
+        client = client or ClosingClient()
+        pipeline = VectorStorePipeline(Stats(), client_factory=lambda: client,
+                                       retry_backoff=0, **options)
+        pipeline.open_spider(SPIDER)
+        pipelines.append(pipeline)
+        return pipeline, client
+
+    yield open_pipeline
+    for pipeline in pipelines:
+        # close_spider já para o pool; aqui só os testes que não chegam a fechar
+        if pipeline.threadpool.started:
+            pipeline.threadpool.stop()
+
+
+def gate_uploads(pipeline):
+    """Segura os envios até o evento retornado ser liberado"""
+    gate = threading.Event()
+    upload = pipeline.upload
+
+    def gated(items):
+        gate.wait(5)
+        return upload(items)
+    pipeline.upload = gated
+    return gate
+
+
+def test_items_are_sent_in_batches(open_pipeline):
+    pipeline, client = open_pipeline(batch_size=3)
+    items = make_items(7)
+    for item in items:
+        assert pipeline.process_item(item, SPIDER) is item
+    wait(pipeline.close_spider(SPIDER))
+
+    stats = pipeline.stats.values
+    assert stats['vector_store/items'] == 7
+    assert stats['vector_store/batches'] == 3
+    assert stats['vector_store/chunks'] == 7
+    assert stats['stages/pipeline/VectorStorePipeline/calls'] == 7
+    assert len(client.collections.get('Bill').objects) == 7
+    assert client.closed
+
+
+def test_backpressure_holds_items_until_a_batch_finishes(open_pipeline):
+    pipeline, client = open_pipeline(batch_size=2, max_pending=1)
+    gate = gate_uploads(pipeline)
+    items = make_items(3)
+    assert pipeline.process_item(items[0], SPIDER) is items[0]
+    # O segundo item fecha um lote e ocupa a única vaga: fica esperando
+    held = pipeline.process_item(items[1], SPIDER)
+    assert held is not items[1]
+    assert pipeline.stats.values['vector_store/backpressure_waits'] == 1
+    reactor.iterate(0.05)
+    assert not held.called
+
+    gate.set()
+    assert wait(held) is items[1]
+    assert pipeline.pending == []
+    assert pipeline.process_item(items[2], SPIDER) is items[2]
+    wait(pipeline.close_spider(SPIDER))
+    assert pipeline.stats.values['vector_store/items'] == 3
+
+
+def test_close_waits_for_batches_in_flight(open_pipeline):
+    pipeline, client = open_pipeline(batch_size=2)
+    gate = gate_uploads(pipeline)
+    for item in make_items(3):
+        pipeline.process_item(item, SPIDER)
+    closing = pipeline.close_spider(SPIDER)
+    assert len(pipeline.pending) == 2
+    reactor.iterate(0.05)
+    assert not closing.called
+    assert not client.closed
+
+    gate.set()
+    wait(closing)
+    assert client.closed
+    assert pipeline.stats.values['vector_store/items'] == 3
+    assert len(client.collections.get('Bill').objects) == 3
+
+
+def test_rejected_objects_are_counted(open_pipeline):
+    pipeline, client = open_pipeline(client=ClosingClient(object_error_rate=1.0), batch_size=5,
+                                     retries=2)
+    for item in make_items(5):
+        pipeline.process_item(item, SPIDER)
+    wait(pipeline.close_spider(SPIDER))
+    assert pipeline.stats.values['vector_store/failed_objects'] == 5
+    assert client.collections.get('Bill').objects == {}
+
+
+def test_failed_batches_are_counted_and_released(open_pipeline):
+    pipeline, client = open_pipeline(batch_size=2, max_pending=1)
+
+    def broken(items):
+        raise ConnectionError('fake: Weaviate fora do ar')
+    pipeline.upload = broken
+    items = make_items(4)
+    pipeline.process_item(items[0], SPIDER)
+    held = pipeline.process_item(items[1], SPIDER)
+    # O lote que falhou também libera a vaga
+    assert wait(held) is items[1]
+    pipeline.process_item(items[2], SPIDER)
+    pipeline.process_item(items[3], SPIDER)
+    wait(pipeline.close_spider(SPIDER))
+    assert pipeline.stats.values['vector_store/failed_items'] == 4
+    assert 'vector_store/items' not in pipeline.stats.values
+    assert client.closed